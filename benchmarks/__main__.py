@@ -0,0 +1,138 @@
+"""
+Run the benchmark suite.
+
+    python -m benchmarks                         # run everything
+    python -m benchmarks -k pluck                # run benchmarks with 'pluck' in the name
+    python -m benchmarks --save results.json     # save results
+    python -m benchmarks --compare results.json  # compare against saved results
+
+When comparing, the exit status is 1 if any benchmark is slower than the saved
+results by more than `--tolerance`.
+"""
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import Any, Dict, List
+
+from .suite import BENCHMARKS, Case
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    idx = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[idx]
+
+
+def _peak_memory(case: Case) -> int:
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def measure(case: Case, min_time: float, min_calls: int = 5) -> Dict[str, float]:
+    """Time `case` for at least `min_time` seconds, returning a summary."""
+    case.run()  # warm up
+
+    timings: List[float] = []
+    total = 0.0
+    while total < min_time or len(timings) < min_calls:
+        start = perf_counter()
+        case.run()
+        elapsed = perf_counter() - start
+        timings.append(elapsed)
+        total += elapsed
+
+    per_record = sorted(timing / case.records for timing in timings)
+
+    return {
+        "ops_per_sec": len(timings) * case.records / total,
+        "p50_us": _percentile(per_record, 0.50) * 1e6,
+        "p95_us": _percentile(per_record, 0.95) * 1e6,
+        "p99_us": _percentile(per_record, 0.99) * 1e6,
+        "peak_memory_kib": _peak_memory(case) / 1024,
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """Return the names of benchmarks that have got slower than `baseline`."""
+    regressions = []
+
+    print()
+    print(f"{'benchmark':<34} {'baseline':>12} {'now':>12} {'change':>8}")
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        before = baseline[name]["ops_per_sec"]
+        now = result["ops_per_sec"]
+        change = now / before - 1
+        flag = ""
+        if change < -tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+
+        print(f"{name:<34} {before:>12.0f} {now:>12.0f} {change:>+8.1%}{flag}")
+
+    return regressions
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-k", dest="keyword", default="", help="only run matching")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds each")
+    parser.add_argument("--save", help="save results as JSON to this file")
+    parser.add_argument("--compare", help="compare against results in this file")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, float]] = {}
+
+    print(
+        f"{'benchmark':<34} {'records/sec':>12} {'p50 µs':>9}"
+        f" {'p95 µs':>9} {'p99 µs':>9} {'peak KiB':>10}"
+    )
+
+    for name, setup in BENCHMARKS.items():
+        if args.keyword not in name:
+            continue
+
+        result = measure(setup(), args.min_time)
+        results[name] = result
+        print(
+            f"{name:<34} {result['ops_per_sec']:>12.0f} {result['p50_us']:>9.2f}"
+            f" {result['p95_us']:>9.2f} {result['p99_us']:>9.2f}"
+            f" {result['peak_memory_kib']:>10.1f}"
+        )
+
+    if args.save:
+        output: Dict[str, Any] = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "benchmarks": results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(output, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["benchmarks"]
+        if compare(results, baseline, args.tolerance):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,332 @@
+"""Synthetic payloads for benchmarking, with the dataclasses and paths to pluck them."""
+import json
+from dataclasses import dataclass, make_dataclass
+from typing import Any, Dict, List, Optional
+
+from plucker import Path
+
+# Path names can't contain digits.
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def names(count: int) -> List[str]:
+    return [f"field_{LETTERS[n // 26]}{LETTERS[n % 26]}" for n in range(count)]
+
+
+# Wide objects
+# ------------
+#
+# Lots of fields, all under the same nested object.
+
+WIDE_NAMES = names(40)
+
+Wide = make_dataclass("Wide", [(name, int) for name in WIDE_NAMES])
+
+WIDE_PATHS = {name: Path(f".payload.record.{name}") for name in WIDE_NAMES}
+
+
+def wide_record(n: Any) -> Dict[str, Any]:
+    return {"payload": {"record": {name: n for name in WIDE_NAMES}, "other": [n] * 10}}
+
+
+# The same, with every other field missing and defaulting to 0.
+
+SPARSE_PATHS = {name: Path(f".payload.record.{name}", default=0) for name in WIDE_NAMES}
+
+
+def sparse_record(n: int) -> Dict[str, Any]:
+    return {"payload": {"record": {name: n for name in WIDE_NAMES[::2]}}}
+
+
+# A large spec
+# ------------
+#
+# Hundreds of fields of a few types, some of them lists, to measure compiling.
+
+LARGE_NAMES = names(200)
+
+LARGE_TYPES = [int, Optional[str], List[int], float]
+
+Large = make_dataclass(
+    "Large", [(name, LARGE_TYPES[n % 4]) for n, name in enumerate(LARGE_NAMES)]
+)
+
+LARGE_PATHS = {
+    name: Path(f".payload.items[].{name}" if n % 4 == 2 else f".payload.{name}")
+    for n, name in enumerate(LARGE_NAMES)
+}
+
+
+# Deep nesting
+# ------------
+
+DEPTH = 30
+DEEP_PATH = "".join(f".{name}" for name in names(DEPTH)) + ".value"
+
+# For comparison, a path of a more usual length.
+SHORT_PATH = ".payload.who[].id"
+
+
+@dataclass
+class Deep:
+    """The value at the end of `DEEP_PATH`."""
+
+    value: int
+
+
+def deep_record(n: int) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"value": n}
+    for name in reversed(names(DEPTH)):
+        record = {name: record, "sibling": n}
+    return record
+
+
+# Long arrays
+# -----------
+
+
+@dataclass
+class Ids:
+    """The ids of the items of a long array."""
+
+    ids: List[int]
+
+
+IDS_PATHS = {"ids": Path(".items[].id")}
+
+
+def long_array(length: int) -> Dict[str, Any]:
+    return {"items": [{"id": n, "name": "x"} for n in range(length)]}
+
+
+# Filtering
+# ---------
+#
+# One event in ten is wanted.
+
+
+def events(length: int) -> Dict[str, Any]:
+    return {
+        "events": [
+            {"type": "add" if n % 10 == 0 else "remove", "id": n, "name": "x"}
+            for n in range(length)
+        ]
+    }
+
+
+@dataclass
+class Event:
+    """An event, of which one in ten has type `add`."""
+
+    type: str
+    id: int
+
+
+@dataclass
+class Events:
+    """A list of events."""
+
+    events: List[Event]
+
+
+EVENT_PATHS = {"type": Path(".type"), "id": Path(".id")}
+
+
+@dataclass
+class Item:
+    """An item of a long array."""
+
+    id: int
+
+
+@dataclass
+class Items:
+    """Each item of a long array."""
+
+    items: List[Item]
+
+
+ITEMS_PATHS = {"items": Path(".items[]").into(Item, id=Path(".id"))}
+
+NAMES_PATHS = {"names": Path(".items[].name").map_each(str.upper)}
+
+
+@dataclass
+class Names:
+    """The names of the items of a long array."""
+
+    names: List[str]
+
+
+# Nested into()
+# -------------
+
+
+@dataclass
+class Contact:
+    """Someone a message was sent to."""
+
+    id: int
+    name: str
+    email: str
+
+
+@dataclass
+class Message:
+    """A message, with dataclasses nested inside it."""
+
+    id: int
+    sender: str
+    contacts: List[Contact]
+
+
+MESSAGE_PATHS = {
+    "id": Path(".id"),
+    "sender": Path(".payload.from").map(str.upper),
+    "contacts": Path(".payload.who[]").into(
+        Contact,
+        id=Path(".id"),
+        name=Path(".name"),
+        email=Path(".email"),
+    ),
+}
+
+
+def message(n: int) -> Dict[str, Any]:
+    return {
+        "id": n,
+        "payload": {
+            "from": "someone",
+            "who": [
+                {"id": m, "name": f"name {m}", "email": f"{m}@example.com"}
+                for m in range(5)
+            ],
+        },
+    }
+
+
+# Summaries
+# ---------
+#
+# A few fields from a small object, as an API client might pluck.
+
+
+@dataclass
+class Summary:
+    """A few fields from a small object."""
+
+    num: int
+    state_from: str
+    state_to: str
+    ids: List[int]
+
+
+SUMMARY_PATHS = {
+    "num": Path(".number"),
+    "state_from": Path(".payload.from"),
+    "state_to": Path(".payload.to"),
+    "ids": Path(".payload.who[].id"),
+}
+
+
+def summary(n: int) -> Dict[str, Any]:
+    return {
+        "number": n,
+        "payload": {
+            "from": "M",
+            "to": "R",
+            "who": [{"id": m, "name": "X"} for m in range(10)],
+        },
+    }
+
+
+# Large responses
+# ---------------
+#
+# A message with a large history that isn't needed, as raw JSON.
+
+
+def large_response(length: int) -> bytes:
+    data = message(0)
+    data["history"] = [
+        {"id": n, "text": "lorem ipsum " * 10, "tags": ["a", "b"], "score": n / 7}
+        for n in range(length)
+    ]
+    return json.dumps(data).encode()
+
+
+# Small records
+# -------------
+
+
+@dataclass
+class Point:
+    """A record with only a few fields."""
+
+    x: int
+    y: int
+    label: str
+
+
+@dataclass(frozen=True)
+class FrozenPoint:
+    """A frozen record with only a few fields."""
+
+    x: int
+    y: int
+    label: str
+
+
+POINT_PATHS = {"x": Path(".x"), "y": Path(".y"), "label": Path(".label")}
+
+
+def point(n: int) -> Dict[str, Any]:
+    return {"x": n, "y": -n, "label": "p"}
+
+
+# Many paths
+# ----------
+#
+# Paths that differ only in an index, and so repeat the same few names over and over,
+# as the paths of a large spec tend to.
+
+
+def many_paths(count: int) -> List[str]:
+    keys = names(8)
+    return [f".payload.who[{n}].contact.{keys[n % 8]}" for n in range(count)]
+
+
+def many_paths_record(count: int) -> Dict[str, Any]:
+    contact = {name: n for n, name in enumerate(names(8))}
+    return {"payload": {"who": [{"contact": contact}] * count}}
+
+
+# Huge documents
+# --------------
+#
+# One object holding several long, independent arrays, whose items are nested into
+# dataclasses.
+
+
+@dataclass
+class Huge:
+    """Several long arrays from the same document."""
+
+    events: List[Event]
+    items: List[Item]
+    scores: List[float]
+
+
+HUGE_PATHS = {
+    "events": Path(".events[]").into(Event, **EVENT_PATHS),
+    "items": Path(".items[]").into(Item, id=Path(".id")),
+    "scores": Path(".scores[].value"),
+}
+
+
+def huge_document(length: int) -> Dict[str, Any]:
+    return {
+        "events": events(length)["events"],
+        "items": [{"id": n, "name": f"item {n}"} for n in range(length)],
+        "scores": [{"value": n / 2} for n in range(length)],
+    }
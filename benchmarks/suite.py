@@ -0,0 +1,308 @@
+"""
+The benchmarks run by `python -m benchmarks`.
+
+Each benchmark is a function taking no arguments which does the setup for the case
+and returns a `Case`: a callable to time, and how many records each call processes.
+"""
+import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+from plucker import compile, pluck, Path, PlanCache
+from plucker.construct import field_types
+from plucker.extractor import _get_from_path
+from plucker.tokeniser import tokenise, _tokenise
+from plucker import validators
+from plucker.validators import validator_for
+
+from . import payloads
+
+
+@dataclass
+class Case:
+    """A callable to time, and how many records each call processes."""
+
+    run: Callable[[], Any]
+    records: int = 1
+
+
+BENCHMARKS: Dict[str, Callable[[], Case]] = {}
+
+
+def benchmark(fn: Callable[[], Case]) -> Callable[[], Case]:
+    BENCHMARKS[fn.__name__] = fn
+    return fn
+
+
+@benchmark
+def tokenise_deep_uncached() -> Case:
+    uncached = _tokenise.__wrapped__  # type: ignore[attr-defined]
+    return Case(lambda: uncached(payloads.DEEP_PATH))
+
+
+@benchmark
+def tokenise_deep_cached() -> Case:
+    return Case(lambda: tokenise(payloads.DEEP_PATH))
+
+
+@benchmark
+def tokenise_short_uncached() -> Case:
+    uncached = _tokenise.__wrapped__  # type: ignore[attr-defined]
+    return Case(lambda: uncached(payloads.SHORT_PATH))
+
+
+@benchmark
+def tokenise_short_cached() -> Case:
+    return Case(lambda: tokenise(payloads.SHORT_PATH))
+
+
+@benchmark
+def extract_deep() -> Case:
+    data = payloads.deep_record(1)
+    tokens = tokenise(payloads.DEEP_PATH)
+    return Case(lambda: _get_from_path(data, tokens))
+
+
+@benchmark
+def extract_long_array() -> Case:
+    data = payloads.long_array(100_000)
+    tokens = tokenise(".items[].id")
+    return Case(lambda: _get_from_path(data, tokens), records=100_000)
+
+
+@benchmark
+def typecheck_long_array() -> Case:
+    data = list(range(100_000))
+    validate = validator_for(payloads.Ids.__annotations__["ids"])
+    return Case(lambda: validate(data), records=100_000)
+
+
+@benchmark
+def pluck_uncompiled_wide() -> Case:
+    data = payloads.wide_record(1)
+    return Case(lambda: pluck(data, payloads.Wide, **payloads.WIDE_PATHS))
+
+
+@benchmark
+def pluck_wide_per_path() -> Case:
+    data = payloads.wide_record(1)
+    plucker = compile(payloads.Wide, **payloads.WIDE_PATHS)
+    return Case(lambda: plucker._pluck_per_path(data))
+
+
+@benchmark
+def pluck_wide() -> Case:
+    data = payloads.wide_record(1)
+    plucker = compile(payloads.Wide, **payloads.WIDE_PATHS)
+    return Case(lambda: plucker.pluck(data))
+
+
+@benchmark
+def pluck_wide_codegen() -> Case:
+    data = payloads.wide_record(1)
+    plucker = compile(payloads.Wide, codegen=True, **payloads.WIDE_PATHS)
+    return Case(lambda: plucker.pluck(data))
+
+
+@benchmark
+def pluck_uncompiled_summary() -> Case:
+    data = payloads.summary(1)
+    return Case(lambda: pluck(data, payloads.Summary, **payloads.SUMMARY_PATHS))
+
+
+@benchmark
+def pluck_summary() -> Case:
+    data = payloads.summary(1)
+    plucker = compile(payloads.Summary, **payloads.SUMMARY_PATHS)
+    return Case(lambda: plucker.pluck(data))
+
+
+@benchmark
+def pluck_summary_codegen() -> Case:
+    data = payloads.summary(1)
+    plucker = compile(payloads.Summary, codegen=True, **payloads.SUMMARY_PATHS)
+    return Case(lambda: plucker.pluck(data))
+
+
+@benchmark
+def pluck_sparse_wide() -> Case:
+    data = payloads.sparse_record(1)
+    plucker = compile(payloads.Wide, **payloads.SPARSE_PATHS)
+    return Case(lambda: plucker.pluck(data))
+
+
+@benchmark
+def pluck_sparse_wide_codegen() -> Case:
+    data = payloads.sparse_record(1)
+    plucker = compile(payloads.Wide, codegen=True, **payloads.SPARSE_PATHS)
+    return Case(lambda: plucker.pluck(data))
+
+
+@benchmark
+def pluck_batch_collecting_errors() -> Case:
+    # Every other record has every field of the wrong type.
+    rows = [payloads.wide_record(n if n % 2 else str(n)) for n in range(1_000)]
+    plucker = compile(payloads.Wide, on_error="collect", **payloads.WIDE_PATHS)
+    return Case(lambda: plucker.pluck_batch(rows), records=1_000)
+
+
+@benchmark
+def pluck_deep() -> Case:
+    data = payloads.deep_record(1)
+    plucker = compile(payloads.Deep, value=Path(payloads.DEEP_PATH))
+    return Case(lambda: plucker.pluck(data))
+
+
+@benchmark
+def pluck_long_array() -> Case:
+    data = payloads.long_array(100_000)
+    plucker = compile(payloads.Ids, **payloads.IDS_PATHS)
+    return Case(lambda: plucker.pluck(data), records=100_000)
+
+
+@benchmark
+def pluck_long_array_into() -> Case:
+    data = payloads.long_array(100_000)
+    plucker = compile(payloads.Items, **payloads.ITEMS_PATHS)
+    return Case(lambda: plucker.pluck(data), records=100_000)
+
+
+@benchmark
+def pluck_long_array_map_each() -> Case:
+    data = payloads.long_array(100_000)
+    plucker = compile(payloads.Names, **payloads.NAMES_PATHS)
+    return Case(lambda: plucker.pluck(data), records=100_000)
+
+
+@benchmark
+def pluck_events_then_filter() -> Case:
+    data = payloads.events(10_000)
+    events = Path(".events[]").into(payloads.Event, **payloads.EVENT_PATHS)
+    plucker = compile(payloads.Events, events=events)
+
+    def run() -> Any:
+        return [e for e in plucker.pluck(data).events if e.type == "add"]
+
+    return Case(run, records=10_000)
+
+
+@benchmark
+def pluck_events_filtered() -> Case:
+    data = payloads.events(10_000)
+    events = Path('.events[?type=="add"]').into(payloads.Event, **payloads.EVENT_PATHS)
+    plucker = compile(payloads.Events, events=events)
+    return Case(lambda: plucker.pluck(data).events, records=10_000)
+
+
+@benchmark
+def pluck_many_nested_into() -> Case:
+    rows = [payloads.message(n) for n in range(1_000)]
+    plucker = compile(payloads.Message, **payloads.MESSAGE_PATHS)
+    return Case(lambda: plucker.pluck_many(rows), records=len(rows))
+
+
+@benchmark
+def pluck_many_nested_into_codegen() -> Case:
+    rows = [payloads.message(n) for n in range(1_000)]
+    plucker = compile(payloads.Message, codegen=True, **payloads.MESSAGE_PATHS)
+    return Case(lambda: plucker.pluck_many(rows), records=len(rows))
+
+
+@benchmark
+def pluck_large_response_loads() -> Case:
+    raw = payloads.large_response(10_000)
+    plucker = compile(payloads.Message, **payloads.MESSAGE_PATHS)
+    return Case(lambda: plucker.pluck(json.loads(raw)))
+
+
+@benchmark
+def pluck_large_response_bytes() -> Case:
+    raw = payloads.large_response(10_000)
+    plucker = compile(payloads.Message, **payloads.MESSAGE_PATHS)
+    return Case(lambda: plucker.pluck_bytes(raw))
+
+
+@benchmark
+def pluck_many_small_records() -> Case:
+    rows = [payloads.point(n) for n in range(10_000)]
+    plucker = compile(payloads.Point, codegen=True, **payloads.POINT_PATHS)
+    return Case(lambda: plucker.pluck_many(rows), records=len(rows))
+
+
+@benchmark
+def pluck_many_small_frozen_records() -> Case:
+    rows = [payloads.point(n) for n in range(10_000)]
+    plucker = compile(payloads.FrozenPoint, codegen=True, **payloads.POINT_PATHS)
+    return Case(lambda: plucker.pluck_many(rows), records=len(rows))
+
+
+@benchmark
+def tokenise_many_paths() -> Case:
+    uncached = _tokenise.__wrapped__  # type: ignore[attr-defined]
+    paths = payloads.many_paths(10_000)
+    return Case(lambda: [uncached(path) for path in paths], records=len(paths))
+
+
+@benchmark
+def extract_many_paths() -> Case:
+    data = payloads.many_paths_record(10_000)
+    paths = [tokenise(path) for path in payloads.many_paths(10_000)]
+    return Case(
+        lambda: [_get_from_path(data, path) for path in paths], records=len(paths)
+    )
+
+
+def _cold() -> None:
+    """Forget everything cached in memory, as in a newly started process."""
+    _tokenise.cache_clear()
+    field_types.cache_clear()
+    validators._cached.cache_clear()
+
+
+@benchmark
+def compile_large_spec() -> Case:
+    def run() -> Any:
+        _cold()
+        return compile(payloads.Large, codegen=True, **payloads.LARGE_PATHS)
+
+    return Case(run)
+
+
+@benchmark
+def compile_large_spec_from_plans() -> Case:
+    directory = tempfile.TemporaryDirectory()
+    plans = PlanCache(directory.name)
+    plans.compile(payloads.Large, codegen=True, **payloads.LARGE_PATHS)
+
+    def run() -> Any:
+        _cold()
+        # Referring to `directory` keeps it from being deleted while we run.
+        assert directory
+        return plans.compile(payloads.Large, codegen=True, **payloads.LARGE_PATHS)
+
+    return Case(run)
+
+
+@benchmark
+def pluck_huge_document() -> Case:
+    data = payloads.huge_document(200_000)
+    plucker = compile(payloads.Huge, **payloads.HUGE_PATHS)
+    return Case(lambda: plucker.pluck(data), records=200_000)
+
+
+@benchmark
+def pluck_huge_document_threads() -> Case:
+    data = payloads.huge_document(200_000)
+    plucker = compile(payloads.Huge, **payloads.HUGE_PATHS)
+    executor = ThreadPoolExecutor(4)
+    return Case(lambda: plucker.pluck_parallel(data, executor), records=200_000)
+
+
+@benchmark
+def pluck_huge_document_processes() -> Case:
+    data = payloads.huge_document(200_000)
+    plucker = compile(payloads.Huge, **payloads.HUGE_PATHS)
+    executor = ProcessPoolExecutor(4)
+    return Case(lambda: plucker.pluck_parallel(data, executor), records=200_000)
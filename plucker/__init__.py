@@ -1,4 +1,56 @@
-from .plucker import pluck, Path
-from .exceptions import PluckError
+from .plucker import (
+    pluck,
+    pluck_many,
+    pluck_batch,
+    pluck_bytes,
+    pluck_columns,
+    pluck_arrays,
+    pluck_stream,
+    pluck_ndjson,
+    pluck_parallel,
+    apluck,
+    apluck_many,
+    apluck_stream,
+    compile,
+    Path,
+    Plucker,
+    Batch,
+)
+from .cache import CachedMapper
+from .columns import ListColumn
+from .exceptions import PluckError, PluckErrors, FieldError
+from .plans import PlanCache
+from .registry import Registry, spec, plucker_for, warm_up
+from .trace import tracing, set_trace_hook, TraceEvent
 
-__all__ = ["pluck", "Path", "PluckError"]
+__all__ = [
+    "pluck",
+    "pluck_many",
+    "pluck_batch",
+    "pluck_bytes",
+    "pluck_columns",
+    "pluck_arrays",
+    "pluck_stream",
+    "pluck_ndjson",
+    "pluck_parallel",
+    "apluck",
+    "apluck_many",
+    "apluck_stream",
+    "compile",
+    "Path",
+    "Plucker",
+    "Batch",
+    "ListColumn",
+    "CachedMapper",
+    "PluckError",
+    "PluckErrors",
+    "FieldError",
+    "PlanCache",
+    "Registry",
+    "spec",
+    "plucker_for",
+    "warm_up",
+    "tracing",
+    "set_trace_hook",
+    "TraceEvent",
+]
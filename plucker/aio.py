@@ -0,0 +1,256 @@
+"""
+Pluck with mappers that do I/O, without blocking the event loop.
+
+A mapper passed to `Path.map()` or `Path.map_each()` may be a coroutine function (or
+return any other awaitable).  The `apluck*` functions await them, mapping every
+field of a record, and every item of a list, concurrently.  At most `concurrency`
+awaitables from a single call are awaited at once, so that e.g. a cache service
+isn't sent a thousand requests at once for a thousand-item list.
+
+Errors are the same as for `pluck()`: where several fields or items are bad, the one
+reported is the one `pluck()` would have found first.
+
+Input can also be an async iterable of bytes, such as an HTTP response body.  It is
+decoded by the scanner from `plucker.stream` in a worker thread as chunks arrive, so
+decoding overlaps with receiving, and only the parts the paths reach are decoded.
+"""
+import asyncio
+import inspect
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    TypeVar,
+    Union,
+    TYPE_CHECKING,
+)
+
+from .extractor import MISSING
+from .stream import parse_items, parse_pruned, Chunk
+from .tokeniser import Tokens
+from .types import JSONStructure, Mapper
+from .validators import Index, Invalid
+
+if TYPE_CHECKING:
+    from .plucker import Path, Plucker, _CompiledPath
+
+T = TypeVar("T")
+
+DEFAULT_CONCURRENCY = 10
+
+AsyncSource = Union[JSONStructure, AsyncIterable[Chunk]]
+
+_END = object()
+
+
+async def _all(awaitables: Iterable[Awaitable[Any]]) -> List[Any]:
+    """
+    Await `awaitables` concurrently, raising the first one's error if any fail.
+
+    Unlike a bare `asyncio.gather()`, which raises whichever error happens first, this
+    waits for everything so the error raised doesn't depend on timing.
+    """
+    results = await asyncio.gather(*awaitables, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+async def _amap(
+    spec: "Path",
+    mapper: Mapper,
+    data: Any,
+    tokens: Tokens,
+    indexes: Sequence[Index],
+    limit: asyncio.Semaphore,
+) -> Any:
+    """Like `Path._apply_map_fn()`, but awaiting the result if it's awaitable."""
+    if isinstance(mapper, dict):
+        return spec._apply_map_dict(mapper, data, tokens, indexes)
+
+    try:
+        result = mapper(data)
+        if inspect.isawaitable(result):
+            async with limit:
+                result = await result
+        return result
+    except Exception as exc:
+        raise spec._map_error(data, tokens, indexes) from exc
+
+
+def _check(path: "_CompiledPath", value: Any) -> Any:
+    """Type-check a finished value of `path`, returning it if it's valid."""
+    try:
+        path.validate(value)
+    except Invalid as exc:
+        raise path.type_error(exc) from None
+
+    return value
+
+
+async def _amap_each(
+    path: "_CompiledPath", mapper: Mapper, source: Any, limit: asyncio.Semaphore
+) -> List[Any]:
+    """Like `Path._apply_map_each()`, but awaiting the results if they're awaitable."""
+    spec = path.path
+    if not isinstance(source, list):
+        # Raises the same error as without async.
+        spec._apply_map_each(source, path.tokens)
+
+    return await _all(
+        _amap(spec, mapper, item, path.tokens, (idx,), limit)
+        for idx, item in enumerate(source)
+    )
+
+
+async def _afinish_item(
+    path: "_CompiledPath",
+    check: Callable[[Any, int], None],
+    item: Any,
+    idx: int,
+    limit: asyncio.Semaphore,
+) -> Any:
+    """Nest, map and check one item of a list, as `pluck()` does before the next."""
+    spec = path.path
+    if path.into is not None:
+        item = await _apluck(path.into, item, limit)
+    if spec.each_mapper is not None:
+        item = await _amap(spec, spec.each_mapper, item, path.tokens, (idx,), limit)
+
+    check(item, idx)
+    return item
+
+
+async def _afinish(path: "_CompiledPath", source: Any, limit: asyncio.Semaphore) -> Any:
+    """Do everything `_CompiledPath.finish()` does, awaiting mappers."""
+    if source is MISSING or not path.transforms:
+        return path.finish(source)
+
+    check = path.check_item
+    if check is not None and type(source) is list:
+        return await _all(
+            _afinish_item(path, check, item, idx, limit)
+            for idx, item in enumerate(source)
+        )
+
+    tokens = path.tokens
+    spec = path.path
+
+    if path.into is not None:
+        source = await _all(_apluck(path.into, item, limit) for item in source)
+
+    if spec.each_mapper is not None:
+        source = await _amap_each(path, spec.each_mapper, source, limit)
+
+    if spec.mapper is not None:
+        source = await _amap(spec, spec.mapper, source, tokens, (), limit)
+
+    return _check(path, source)
+
+
+async def _apluck(
+    plucker: "Plucker[T]", data: JSONStructure, limit: asyncio.Semaphore
+) -> T:
+    finishing = []
+    error = None
+
+    # Extract paths in order until one fails.  Any path before it that fails to
+    # finish would have been reported by `pluck()` first.
+    for path in plucker.paths.values():
+        try:
+            source = path.extract(data)
+        except Exception as exc:
+            error = exc
+            break
+        finishing.append(_afinish(path, source, limit))
+
+    values = await _all(finishing)
+    if error is not None:
+        raise error
+
+    return plucker._construct(*values)
+
+
+def _sync_chunks(
+    source: AsyncIterable[Chunk], loop: asyncio.AbstractEventLoop
+) -> Iterator[Chunk]:
+    """Iterate over `source` from a thread other than the one running `loop`."""
+    iterator = source.__aiter__()
+
+    async def next_chunk() -> Any:
+        try:
+            return await iterator.__anext__()
+        except StopAsyncIteration:
+            return _END
+
+    while True:
+        chunk = asyncio.run_coroutine_threadsafe(next_chunk(), loop).result()
+        if chunk is _END:
+            return
+        yield chunk
+
+
+async def apluck(
+    __data: AsyncSource,
+    __plucker: "Plucker[T]",
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> T:
+    """Pluck `__data`, which may be an async iterable of bytes, with `__plucker`."""
+    if isinstance(__data, AsyncIterable):
+        loop = asyncio.get_running_loop()
+        chunks = _sync_chunks(__data, loop)
+        data = await loop.run_in_executor(None, parse_pruned, chunks, __plucker)
+    else:
+        data = __data
+
+    return await _apluck(__plucker, data, asyncio.Semaphore(concurrency))
+
+
+async def apluck_many(
+    __rows: Union[Iterable[JSONStructure], AsyncIterable[JSONStructure]],
+    __plucker: "Plucker[T]",
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> List[T]:
+    """Pluck each of `__rows`, which may be an async iterable, with `__plucker`."""
+    limit = asyncio.Semaphore(concurrency)
+
+    if not isinstance(__rows, AsyncIterable):
+        return await _all(_apluck(__plucker, row, limit) for row in __rows)
+
+    # Start on each row as soon as it arrives.
+    tasks = []
+    async for row in __rows:
+        tasks.append(asyncio.ensure_future(_apluck(__plucker, row, limit)))
+    return await _all(tasks)
+
+
+async def apluck_items(
+    __source: AsyncIterable[Chunk],
+    __items: str,
+    __plucker: "Plucker[T]",
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> AsyncIterator[T]:
+    """
+    Pluck each item of the array at path `__items` in the async byte stream `__source`.
+
+    Each item is yielded as soon as it has been received.
+    """
+    loop = asyncio.get_running_loop()
+    items = parse_items(_sync_chunks(__source, loop), __items, __plucker)
+    limit = asyncio.Semaphore(concurrency)
+
+    while True:
+        item: Any = await loop.run_in_executor(None, next, items, _END)
+        if item is _END:
+            return
+        yield await _apluck(__plucker, item, limit)
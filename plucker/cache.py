@@ -0,0 +1,93 @@
+"""
+Memoise mapper functions.
+
+`Path(".date").map(parse_date, cache=4096)` wraps `parse_date` in a `CachedMapper`,
+which remembers the results for the 4096 most recently used input values.  This pays
+off when the same few values turn up over and over again, as dates, enum names and
+currency amounts tend to in feeds.
+
+Values are looked up by type as well as value, so `1`, `1.0` and `True` are cached
+separately.  Values that can't be hashed (lists and dicts) skip the cache, as do
+results that are awaitable, since those can only be awaited once.  Exceptions raised
+by the mapper aren't cached.
+
+A `CachedMapper` can be shared between threads.
+"""
+import inspect
+import threading
+from collections import OrderedDict
+from typing import Any, NamedTuple, Tuple
+
+from .types import MapperFn
+
+
+class CacheInfo(NamedTuple):
+    """Statistics for a `CachedMapper`, like those of `functools.lru_cache`."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class CachedMapper:
+    """A mapper function with a bounded LRU cache of its results."""
+
+    def __init__(self, mapper: MapperFn, maxsize: int):
+        """Cache the results of `mapper` for up to `maxsize` distinct values."""
+        if maxsize < 1:
+            raise ValueError("cache size must be at least 1")
+
+        self.mapper = mapper
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results: "OrderedDict[Tuple[type, Any], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, value: Any) -> Any:
+        """Return `mapper(value)`, from the cache if it's there."""
+        key = (type(value), value)
+
+        try:
+            with self._lock:
+                result = self._results[key]
+                self._results.move_to_end(key)
+                self.hits += 1
+                return result
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable.
+            return self.mapper(value)
+
+        result = self.mapper(value)
+        awaitable = inspect.isawaitable(result)
+
+        with self._lock:
+            self.misses += 1
+            if not awaitable:
+                self._results[key] = result
+                if len(self._results) > self.maxsize:
+                    self._results.popitem(last=False)
+
+        return result
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickle the mapper and cache size, but not the cached results."""
+        return CachedMapper, (self.mapper, self.maxsize)
+
+    def __repr__(self) -> str:
+        """Show the mapper and cache size."""
+        return f"CachedMapper({self.mapper!r}, maxsize={self.maxsize})"
+
+    def cache_info(self) -> CacheInfo:
+        """Report hits, misses and the size of the cache."""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._results))
+
+    def cache_clear(self) -> None:
+        """Empty the cache and reset its statistics."""
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = 0
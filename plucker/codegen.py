@@ -0,0 +1,403 @@
+"""
+Generate specialised Python functions for compiled paths.
+
+Walking a token list with `extractor._get_from_path` costs an `isinstance()` check, a
+function call and a list slice per token.  For a known token list we can instead
+write out the equivalent straight-line Python, e.g. `.payload.who[].id` becomes
+
+    [e0["id"] for e0 in _as_list(d["payload"]["who"])]
+
+and `exec()` it once.  For a whole plucker, the paths are generated from a
+`PathTrie`, so shared prefixes are looked up once and each `[]` becomes one loop.
+
+The generated code only handles the happy path: if anything
+goes wrong we re-run the input through the interpreted walk, which raises the same
+`ExtractError` or `PluckError` (with the same location information) as it would have
+without code generation.  Keys that are allowed to be missing, because the path has
+a default, are the exception: they are looked up with `optional_key()`, which gives
+`MISSING` rather than raising.
+"""
+import copy
+import linecache
+import weakref
+from contextvars import ContextVar
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Union, TYPE_CHECKING
+
+from .exceptions import PluckError
+from .extractor import (
+    _get_from_path,
+    _get_optional,
+    descendants,
+    optional_index,
+    optional_key,
+    MISSING,
+)
+from .tokeniser import (
+    Token,
+    Tokens,
+    ArrayToken,
+    NameToken,
+    IndexToken,
+    SliceToken,
+    WildcardToken,
+    DescendToken,
+    FilterToken,
+)
+from .filters import filtered
+from .trie import PathTrie
+from .validators import exact_type, Invalid
+
+if TYPE_CHECKING:
+    from .plans import Plan
+    from .plucker import Plucker
+
+_counter = count()
+
+# The plan that a spec is being compiled with, which supplies code compiled by an
+# earlier process, if any.  See `plucker.plans`.
+active_plan: ContextVar[Optional["Plan"]] = ContextVar("active_plan", default=None)
+
+
+def _as_list(data: Any) -> List[Any]:
+    """Make sure that `data` is something `[]` can iterate over."""
+    if not isinstance(data, list):
+        raise TypeError("expected a list")
+    return data
+
+
+def _as_dict(data: Any) -> Dict[str, Any]:
+    """Make sure that `data` is something `.*` can iterate over."""
+    if not isinstance(data, dict):
+        raise TypeError("expected a dict")
+    return data
+
+
+_HELPERS = {
+    "_as_list": _as_list,
+    "_as_dict": _as_dict,
+    "_descendants": descendants,
+    "_filtered": filtered,
+    "optional_key": optional_key,
+    "optional_index": optional_index,
+    "MISSING": MISSING,
+}
+
+
+def _constant(value: Any, constants: Dict[str, Any]) -> str:
+    """Add `value` to `constants`, returning the name generated code refers to it by."""
+    # Values aren't written out with `repr()`, which isn't valid Python for some
+    # floats, e.g. `inf` and `nan`.
+    name = f"fv{len(constants)}"
+    constants[name] = value
+    return name
+
+
+def _items(expr: str, token: Token, constants: Dict[str, Any]) -> str:
+    """
+    Produce an expression for the values that a mapping token picks out.
+
+    Any values the expression needs are added to `constants`.
+    """
+    if isinstance(token, ArrayToken):
+        return f"_as_list({expr})"
+    elif isinstance(token, SliceToken):
+        return f"_as_list({expr})[{token.start}:{token.stop}]"
+    elif isinstance(token, WildcardToken):
+        return f"_as_dict({expr}).values()"
+    elif isinstance(token, DescendToken):
+        return f"_descendants({expr}, {token.name!r})"
+    elif isinstance(token, FilterToken):
+        value = _constant(token.value, constants)
+        return f"_filtered({expr}, {token.name!r}, {token.op!r}, {value})"
+    raise ValueError(f"{token!r} doesn't pick out a list of values")
+
+
+def _expression(
+    var: str, tokens: Tokens, constants: Dict[str, Any], depth: int = 0
+) -> str:
+    """Produce an expression that walks `tokens` starting from the variable `var`."""
+    expr = var
+
+    for idx, token in enumerate(tokens):
+        if isinstance(token, NameToken):
+            expr += f"[{token.name!r}]"
+        elif isinstance(token, IndexToken):
+            expr = f"_as_list({expr})[{token.index}]"
+        else:
+            elem = f"e{depth}"
+            inner = _expression(elem, tokens[idx + 1 :], constants, depth + 1)
+            return f"[{inner} for {elem} in {_items(expr, token, constants)}]"
+
+    return expr
+
+
+def _optional_key(var: str, name: str) -> str:
+    """Produce an expression for `optional_key(var, name)`."""
+    # Save a function call in the usual case that `var` is a dict.
+    return (
+        f"({var}.get({name!r}, MISSING) if type({var}) is dict"
+        f" else optional_key({var}, {name!r}))"
+    )
+
+
+def _optional_step(var: str, token: Union[NameToken, IndexToken]) -> str:
+    """Produce an expression looking up `token` in `var`, giving `MISSING` if absent."""
+    if isinstance(token, NameToken):
+        return _optional_key(var, token.name)
+    else:
+        return f"optional_index({var}, {token.index})"
+
+
+def getter_source(
+    tokens: Tokens,
+    name: str = "get",
+    optional: bool = False,
+    constants: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Produce the source of a function that walks `tokens` over its argument.
+
+    With `optional`, the function returns `MISSING` where `_get_optional()` would.
+    The function needs the values added to `constants` in its namespace.
+    """
+    if constants is None:
+        constants = {}
+    if not optional:
+        return f"def {name}(d):\n    return {_expression('d', tokens, constants)}\n"
+
+    lines = [f"def {name}(d):"]
+    var = "d"
+    rest = 0
+
+    for token in tokens:
+        if not isinstance(token, (NameToken, IndexToken)):
+            break
+        lines += [
+            f"    t = {_optional_step(var, token)}",
+            "    if t is MISSING:",
+            "        return MISSING",
+        ]
+        var = "t"
+        rest += 1
+
+    lines.append(f"    return {_expression(var, tokens[rest:], constants)}")
+    return "\n".join(lines) + "\n"
+
+
+def _exec(source: str, namespace: Dict[str, Any], name: str) -> Callable[..., Any]:
+    """
+    Compile `source`, registering it so that tracebacks can show it.
+
+    The source is forgotten again once the function it defines is collected.
+    """
+    plan = active_plan.get()
+    if plan is None:
+        filename = f"<plucker-generated-{next(_counter)}>"
+        code = compile(source, filename, "exec")
+    else:
+        code = plan.code(source)
+        filename = code.co_filename
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+
+    exec(code, namespace)
+    function = namespace[name]
+    if plan is None:
+        # Plans' filenames are named after the source, and so shared by every
+        # function compiled from it; these are used once.
+        weakref.finalize(function, linecache.cache.pop, filename, None)
+    return function
+
+
+def compile_getter(tokens: Tokens, optional: bool = False) -> Callable[[Any], Any]:
+    """
+    Produce a function equivalent to `lambda data: _get_from_path(data, tokens)`.
+
+    With `optional`, the function is equivalent to `_get_optional()` instead.  Errors
+    are reported exactly as `_get_from_path` reports them.
+    """
+    constants: Dict[str, Any] = {}
+    source = getter_source(tokens, optional=optional, constants=constants)
+    fast = _exec(source, {**_HELPERS, **constants}, "get")
+    slow = _get_optional if optional else _get_from_path
+
+    def get(data: Any) -> Any:
+        try:
+            return fast(data)
+        except (LookupError, TypeError):
+            return slow(data, tokens)
+
+    return get
+
+
+# Given the index of a path and an expression for its value, produce a statement that
+# delivers the value to wherever it needs to go.
+_Sink = Callable[[int, str], str]
+
+
+class _TrieWriter:
+    """
+    Write out statements that walk a `PathTrie`.
+
+    Shared prefixes get assigned to a variable once, and each `[]` (or slice, `.*` or
+    `..name`) becomes a single loop that appends to a list for every path below it.
+    """
+
+    def __init__(self, constants: Dict[str, Any]):
+        """Write statements needing the values added to `constants`."""
+        self.lines: List[str] = []
+        self.constants = constants
+        self._names = count()
+
+    def write(self, node: PathTrie, var: str, sink: _Sink, indent: str) -> None:
+        for idx in node.here:
+            self.lines.append(indent + sink(idx, var))
+
+        for name, child in node.names.items():
+            if child.missing_ok:
+                step = _optional_key(var, name)
+            else:
+                step = f"{var}[{name!r}]"
+            self._write_step(child, step, sink, indent)
+
+        if node.array is not None:
+            self._write_loop(node.array, f"_as_list({var})", sink, indent)
+
+        for token, child in node.steps.values():
+            self._write_token(token, child, var, sink, indent)
+
+    def _write_token(
+        self, token: Token, node: PathTrie, var: str, sink: _Sink, indent: str
+    ) -> None:
+        """Write statements that walk `node`, reached from `var` through `token`."""
+        if not isinstance(token, IndexToken):
+            self._write_loop(node, _items(var, token, self.constants), sink, indent)
+        elif node.missing_ok:
+            step = f"optional_index({var}, {token.index})"
+            self._write_step(node, step, sink, indent)
+        else:
+            step = _expression(var, (token,), self.constants)
+            self._write_step(node, step, sink, indent)
+
+    def _write_step(self, node: PathTrie, step: str, sink: _Sink, indent: str) -> None:
+        """
+        Write statements that walk `node`, given an expression `step` for its value.
+
+        The value is `MISSING` if it doesn't exist and `node.missing_ok`.
+        """
+        if node.order == node.here == [node.here[0]]:
+            self.lines.append(indent + sink(node.here[0], step))
+            return
+
+        child_var = f"t{next(self._names)}"
+        self.lines.append(f"{indent}{child_var} = {step}")
+
+        if not node.missing_ok:
+            self.write(node, child_var, sink, indent)
+            return
+
+        self.lines.append(f"{indent}if {child_var} is MISSING:")
+        for idx in node.order:
+            self.lines.append(f"{indent}    {sink(idx, 'MISSING')}")
+        self.lines.append(f"{indent}else:")
+        self.write(node, child_var, sink, indent + "    ")
+
+    def _write_loop(self, node: PathTrie, items: str, sink: _Sink, indent: str):
+        """Write a loop over `items` that collects the values of each path below."""
+        n = next(self._names)
+
+        for idx in node.order:
+            self.lines.append(f"{indent}l{idx}_{n} = []")
+            self.lines.append(f"{indent}a{idx}_{n} = l{idx}_{n}.append")
+
+        self.lines.append(f"{indent}for e{n} in {items}:")
+        self.write(
+            node,
+            f"e{n}",
+            lambda idx, expr: f"a{idx}_{n}({expr})",
+            indent + "    ",
+        )
+
+        for idx in node.order:
+            self.lines.append(indent + sink(idx, f"l{idx}_{n}"))
+
+
+def plucker_source(
+    plucker: "Plucker[Any]",
+    name: str = "pluck",
+    constants: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Produce the source of a function that does everything `plucker.pluck()` does.
+
+    The function expects to be executed in the namespace produced by
+    `_plucker_namespace()`, along with the values added to `constants`.  Where a path
+    needs mapping or nesting into another dataclass, the generated code hands over to
+    that path's `finish()`.
+    """
+    lines = [f"def {name}(d):", "    try:"]
+
+    writer = _TrieWriter({} if constants is None else constants)
+    writer.write(plucker._trie, "d", lambda idx, expr: f"v{idx} = {expr}", " " * 8)
+    lines += writer.lines
+
+    lines += [
+        "    except PluckError:",
+        "        raise",
+        "    except (LookupError, TypeError):",
+        "        return slow(d)",
+    ]
+
+    for idx, path in enumerate(plucker.paths.values()):
+        if path.transforms:
+            # `finish()` deals with `MISSING` itself.
+            lines.append(f"    v{idx} = finish{idx}(v{idx})")
+            continue
+
+        if exact_type(path.expected_type) is not None:
+            check = [f"if type(v{idx}) is not type{idx}:", "    return slow(d)"]
+        else:
+            check = [
+                "try:",
+                f"    validate{idx}(v{idx})",
+                "except Invalid:",
+                "    return slow(d)",
+            ]
+
+        if path.optional:
+            default = f"copy(default{idx})" if path.copy_default else f"default{idx}"
+            lines += [f"    if v{idx} is MISSING:", f"        v{idx} = {default}"]
+            lines += ["    else:"] + [f"        {line}" for line in check]
+        else:
+            lines += [f"    {line}" for line in check]
+
+    args = ", ".join(f"v{idx}" for idx in range(len(plucker.paths)))
+    lines.append(f"    return construct({args})")
+
+    return "\n".join(lines) + "\n"
+
+
+def _plucker_namespace(plucker: "Plucker[Any]") -> Dict[str, Any]:
+    namespace: Dict[str, Any] = {
+        **_HELPERS,
+        "PluckError": PluckError,
+        "Invalid": Invalid,
+        "construct": plucker._construct,
+        "slow": plucker._pluck_per_path,
+        "copy": copy.copy,
+    }
+
+    for idx, path in enumerate(plucker.paths.values()):
+        namespace[f"finish{idx}"] = path.finish
+        namespace[f"validate{idx}"] = path.validate
+        namespace[f"type{idx}"] = exact_type(path.expected_type)
+        namespace[f"default{idx}"] = path.default
+
+    return namespace
+
+
+def compile_plucker(plucker: "Plucker[Any]") -> Callable[[Any], Any]:
+    """Produce a specialised function equivalent to `plucker.pluck`."""
+    constants: Dict[str, Any] = {}
+    source = plucker_source(plucker, constants=constants)
+    return _exec(source, {**_plucker_namespace(plucker), **constants}, "pluck")
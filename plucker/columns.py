@@ -0,0 +1,258 @@
+"""
+Pluck a batch of records into typed, contiguous columns.
+
+Fields annotated `int` or `float` are collected into an `array.array` of 64-bit
+integers or doubles, and fields annotated `List[int]` or `List[float]` into a
+`ListColumn`: the items of every record's list laid end to end in one array, with a
+second array of offsets marking where each record's items start (the same layout
+Apache Arrow uses for list columns).  Values are type-checked as they are copied in,
+rather than in a separate pass, and errors are the same as `pluck()` would raise.
+
+Any other field is collected into a list, as with `pluck_columns()`.  So is a field
+whose path has a default that doesn't fit in its array, e.g. an `int` defaulting to
+`None`, since defaults are used as they are, without being type-checked.
+
+With `numpy=True`, arrays are wrapped as NumPy arrays with `numpy.frombuffer()`,
+which shares the array's memory rather than copying it.
+"""
+import typing
+from array import array
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, TYPE_CHECKING
+
+from . import trace
+from .exceptions import PluckError
+from .extractor import MISSING
+from .types import JSONStructure
+from .validators import _describe, Invalid
+
+if TYPE_CHECKING:
+    from .plucker import Plucker, _CompiledPath
+
+# array.array typecodes for each of the types we can store unboxed.  "q" is a signed
+# 64-bit integer and "d" a double.
+TYPECODES = {int: "q", float: "d"}
+
+NUMPY_DTYPES = {"q": "int64", "d": "float64"}
+
+
+@dataclass
+class ListColumn:
+    """
+    A column of lists, stored as one flat array of items plus offsets into it.
+
+    The items for row `i` are `values[offsets[i]:offsets[i + 1]]`, so `offsets`
+    always has one more entry than there are rows.
+    """
+
+    values: Any
+    offsets: Any
+
+    def __len__(self) -> int:
+        """The number of rows."""
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> Any:
+        """Return the items for row `idx`, as a view on `values` rather than a copy."""
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        if isinstance(self.values, array):
+            return memoryview(self.values)[start:end]
+        return self.values[start:end]
+
+
+def _overflow(path: "_CompiledPath", value: Any) -> PluckError:
+    return PluckError(f"{path.path.path} value {value!r} doesn't fit in 64 bits")
+
+
+class _Column:
+    """Collects the values of one path, checking them against its type."""
+
+    def __init__(self, path: "_CompiledPath"):
+        self.path = path
+        self.values: List[Any] = []
+
+    def add(self, value: Any) -> None:
+        """Add a value, or the path's default if the value is `MISSING`."""
+        if value is MISSING:
+            value = self.path.default_value()
+        else:
+            try:
+                self.path.validate(value)
+            except Invalid as exc:
+                raise self.path.type_error(exc) from None
+        self.values.append(value)
+
+    def _default_for(self, value: Any) -> Any:
+        """Return the default in place of a missing value, and reject any other."""
+        if value is not MISSING:
+            expected = _describe(self.path.expected_type)
+            raise self.path.type_error(Invalid(expected, value))
+        return self.path.default_value()
+
+    def result(self, numpy: Any) -> Any:
+        return self.values
+
+
+class _ScalarColumn(_Column):
+    def __init__(self, path: "_CompiledPath", cls: type):
+        self.path = path
+        self.cls = cls
+        self.values = array(TYPECODES[cls])  # type: ignore[assignment]
+
+    def add(self, value: Any) -> None:
+        if type(value) is not self.cls:
+            value = self._default_for(value)
+        try:
+            self.values.append(value)
+        except OverflowError:
+            raise _overflow(self.path, value) from None
+
+    def result(self, numpy: Any) -> Any:
+        if numpy is None:
+            return self.values
+        return numpy.frombuffer(self.values, NUMPY_DTYPES[TYPECODES[self.cls]])
+
+
+class _ListColumn(_Column):
+    def __init__(self, path: "_CompiledPath", cls: type):
+        self.path = path
+        self.cls = cls
+        self.values = array(TYPECODES[cls])  # type: ignore[assignment]
+        self.offsets = array("q", [0])
+
+    def add(self, value: Any) -> None:
+        if not isinstance(value, list):
+            value = self._default_for(value)
+
+        values, cls = self.values, self.cls
+        append = values.append
+        start = len(values)
+        try:
+            for x in value:
+                if type(x) is not cls:
+                    break
+                append(x)
+            else:
+                self.offsets.append(len(values))
+                return
+        except OverflowError:
+            x = value[len(values) - start]
+            del values[start:]
+            raise _overflow(self.path, x) from None
+
+        # Leave the column as it was before this row, then report the bad item.
+        idx = len(values) - start
+        del values[start:]
+        exc = Invalid(cls.__name__, value[idx])
+        exc._indexes.append(idx)
+        raise self.path.type_error(exc)
+
+    def result(self, numpy: Any) -> ListColumn:
+        if numpy is None:
+            return ListColumn(self.values, self.offsets)
+        return ListColumn(
+            numpy.frombuffer(self.values, NUMPY_DTYPES[TYPECODES[self.cls]]),
+            numpy.frombuffer(self.offsets, "int64"),
+        )
+
+
+def _fits(path: "_CompiledPath", cls: type, values: Any) -> bool:
+    """Whether `values`, holding the default of `path`, can go in an array of `cls`."""
+    if not path.optional:
+        return True
+    elif type(values) is not list or any(type(x) is not cls for x in values):
+        return False
+
+    try:
+        array(TYPECODES[cls], values)
+    except OverflowError:
+        return False
+    return True
+
+
+def _column_for(path: "_CompiledPath") -> _Column:
+    expected = path.expected_type
+    if expected in TYPECODES and _fits(path, expected, [path.default]):
+        return _ScalarColumn(path, expected)
+
+    if typing.get_origin(expected) is list:
+        item = typing.get_args(expected)[0]
+        if item in TYPECODES and _fits(path, item, path.default):
+            return _ListColumn(path, item)
+
+    return _Column(path)
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("numpy=True needs NumPy to be installed") from None
+    return numpy
+
+
+def _transform(path: "_CompiledPath") -> Callable[[Any], Any]:
+    """Return `path.transform`, but passing `MISSING` on for the column to handle."""
+    transform = path.transform
+    if not path.optional:
+        return transform
+
+    def transform_present(source: Any) -> Any:
+        return source if source is MISSING else transform(source)
+
+    return transform_present
+
+
+def _finish_traced(path: "_CompiledPath", row: JSONStructure) -> Any:
+    source = path._extract_traced(row)
+    return source if source is MISSING else path._finish_traced(source)
+
+
+def _sources(plucker: "Plucker[Any]") -> Callable[[JSONStructure], Iterable[Any]]:
+    """
+    Return a function giving the mapped but unchecked value of each path.
+
+    Values are mapped one at a time as they're asked for, so that each path's value
+    is checked before the next is mapped, as `pluck()` does.  Missing values are
+    given as `MISSING`, leaving the column to fill in the default.
+    """
+    paths = list(plucker.paths.values())
+    transforms = [_transform(path) for path in paths]
+    walk_all = plucker._trie.walk_all
+
+    def sources(row: JSONStructure) -> Iterable[Any]:
+        try:
+            values = walk_all(row)
+        except (LookupError, TypeError):
+            # Walk each path separately, and only once the previous path's value has
+            # been checked, to get the same error as `pluck()` would.
+            return (
+                transform(path.extract(row))
+                for path, transform in zip(paths, transforms)
+            )
+
+        return (transform(value) for transform, value in zip(transforms, values))
+
+    def sources_traced(row: JSONStructure) -> Iterable[Any]:
+        return (_finish_traced(path, row) for path in paths)
+
+    return sources if trace.hook is None else sources_traced
+
+
+def pluck_arrays(
+    __rows: Iterable[JSONStructure], __plucker: "Plucker[Any]", *, numpy: bool = False
+) -> Dict[str, Any]:
+    """Pluck each of `__rows` into a column per field of `__plucker`."""
+    numpy_module = _import_numpy() if numpy else None
+    columns = [_column_for(path) for path in __plucker.paths.values()]
+    adds = [column.add for column in columns]
+    sources = _sources(__plucker)
+
+    for row in __rows:
+        for add, value in zip(adds, sources(row)):
+            add(value)
+
+    return {
+        attr: column.result(numpy_module)
+        for attr, column in zip(__plucker.paths, columns)
+    }
@@ -0,0 +1,167 @@
+"""
+Construct dataclass instances from plucked values.
+
+Calling a dataclass with keyword arguments, `into(**attrs)`, is a large share of the
+time it takes to pluck a small record: the values are packed into a dict, only for
+`__init__` to unpack them again.  Instead, each plucker has a constructor generated
+for its fields, which takes their values positionally.
+
+Where `__init__` is the one `@dataclass` generated and there is no `__post_init__`
+(or `__new__`), the constructor does what that `__init__` would, without calling it:
+it creates the instance with `object.__new__()`, sets each field and fills in the
+defaults of fields that aren't plucked.  The fields of frozen dataclasses are stored
+straight into the instance's `__dict__` or slots rather than going through
+`object.__setattr__()` as `__init__` does, which is quicker still.  Otherwise, the
+constructor calls the dataclass, passing as many values positionally as it can.
+
+The types of a dataclass's fields, including any it inherits, are looked up once.
+"""
+import dataclasses
+import inspect
+import typing
+from functools import lru_cache
+from types import MappingProxyType, MemberDescriptorType
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Type, TypeVar
+
+from .codegen import _exec
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=1024)
+def field_types(cls: type) -> Mapping[str, Any]:
+    """
+    Return the type of each field of the dataclass `cls`, in order.
+
+    Fields inherited from base dataclasses are included, and string annotations are
+    resolved if possible.
+    """
+    fields = dataclasses.fields(cls)
+    hints: Dict[str, Any] = {}
+
+    if any(isinstance(field.type, str) for field in fields):
+        try:
+            hints = typing.get_type_hints(cls)
+        except Exception:
+            # e.g. a name that can't be found, such as that of a local class.
+            pass
+
+    return MappingProxyType({f.name: hints.get(f.name, f.type) for f in fields})
+
+
+def _call(cls: type, values: Dict[str, str]) -> List[str]:
+    """Call the dataclass, passing values positionally up to the first one missing."""
+    args = []
+    remaining = dict(values)
+
+    for field in dataclasses.fields(cls):
+        if not field.init or getattr(field, "kw_only", False) is True:
+            continue
+        elif field.name not in remaining:
+            break
+        args.append(remaining.pop(field.name))
+
+    # Anything left over, including names that aren't fields, which `__init__` will
+    # complain about in the usual way.
+    args += [f"{name}={value}" for name, value in remaining.items()]
+    return [f"return cls({', '.join(args)})"]
+
+
+def _can_bypass_init(cls: type, names: Sequence[str]) -> bool:
+    """Tell whether constructing `cls` without calling `__init__` is equivalent."""
+    params = cls.__dict__.get("__dataclass_params__")
+    init = cls.__dict__.get("__init__")
+    if params is None or not params.init or init is None:
+        return False
+    elif hasattr(cls, "__post_init__") or getattr(cls, "__new__") is not object.__new__:
+        return False
+    elif (
+        getattr(init, "__code__", None) is None
+        or init.__code__.co_filename != "<string>"
+    ):
+        # `__init__` was written by hand rather than generated.
+        return False
+
+    fields = {field.name for field in dataclasses.fields(cls)}
+    parameters = list(inspect.signature(init).parameters.values())[1:]
+
+    # Every parameter must be a field (not an `InitVar`), and be given a value or
+    # have a default, and every value must be for a parameter.
+    return set(names) <= {param.name for param in parameters} and all(
+        param.name in fields
+        and (param.name in names or param.default is not inspect.Parameter.empty)
+        for param in parameters
+    )
+
+
+def _set_field(
+    cls: type, frozen: bool, name: str, value: str, namespace: Dict[str, Any]
+) -> str:
+    """Produce a statement setting the field `name` of `self` to `value`."""
+    if not frozen:
+        # Exactly what `__init__` does.
+        return f"self.{name} = {value}"
+
+    attr = inspect.getattr_static(cls, name, None)
+    if isinstance(attr, MemberDescriptorType):
+        namespace[f"set_{name}"] = attr.__set__
+        return f"set_{name}(self, {value})"
+    elif hasattr(type(attr), "__set__"):
+        return f"setattr(self, {name!r}, {value})"
+    else:
+        return f"d[{name!r}] = {value}"
+
+
+def _bypass_init(
+    cls: type, values: Dict[str, str], namespace: Dict[str, Any]
+) -> List[str]:
+    """Create an instance and set each of its fields as `__init__` would."""
+    params = getattr(cls, "__dataclass_params__")
+    slotted = "__slots__" in cls.__dict__
+    lines = ["self = new(cls)"]
+
+    for field in dataclasses.fields(cls):
+        if field.name in values:
+            value = values[field.name]
+        elif field.default_factory is not dataclasses.MISSING:
+            namespace[f"factory_{field.name}"] = field.default_factory
+            value = f"factory_{field.name}()"
+        elif field.default is not dataclasses.MISSING and (field.init or slotted):
+            # Fields that aren't in `__init__` are otherwise left to the class
+            # attribute holding the default.
+            namespace[f"default_{field.name}"] = field.default
+            value = f"default_{field.name}"
+        else:
+            continue
+
+        lines.append(_set_field(cls, params.frozen, field.name, value, namespace))
+
+    if any(line.startswith("d[") for line in lines):
+        lines.insert(1, "d = self.__dict__")
+
+    return lines + ["return self"]
+
+
+def constructor(cls: Type[T], names: Sequence[str]) -> Callable[..., T]:
+    """
+    Produce a function returning an instance of `cls` as `cls(**values)` would.
+
+    The function takes the values of the fields `names` of the dataclass `cls`, in
+    that order.
+    """
+    args = [f"v{idx}" for idx in range(len(names))]
+    values = dict(zip(names, args))
+    namespace: Dict[str, Any] = {
+        "cls": cls,
+        "new": object.__new__,
+        "setattr": object.__setattr__,
+    }
+
+    if _can_bypass_init(cls, names):
+        lines = _bypass_init(cls, values, namespace)
+    else:
+        lines = _call(cls, values)
+
+    source = f"def construct({', '.join(args)}):\n"
+    source += "".join(f"    {line}\n" for line in lines)
+    return _exec(source, namespace, "construct")
@@ -1,10 +1,17 @@
-from typing import Optional
-from .tokeniser import Token
+import json
+from typing import Any, List, Optional, Sequence, Union
+from .tokeniser import Token, _reconstruct_path
+
+
+def _line_prefix(line: Optional[int]) -> str:
+    return "" if line is None else f"Line {line}: "
 
 
 class PluckError(TypeError):
     """A mismatched type error while trying to populate a dataclass."""
 
+    line: Optional[int] = None
+
     def __init__(self, message: str):
         """Initialise a type error with a message."""
         self.message = message
@@ -12,7 +19,7 @@ class PluckError(TypeError):
     def __str__(self):
         """Provide a useful string representation of the error."""
         # TODO: actually make this useful
-        return self.message
+        return _line_prefix(self.line) + self.message
 
 
 class ExtractError(ValueError):
@@ -25,6 +32,7 @@ class ExtractError(ValueError):
     message: str
     token: Token
     path: Optional[str]
+    line: Optional[int] = None
 
     def __init__(self, token: Token, message: str):
         """Initialise an error while processing a given token with a message."""
@@ -36,9 +44,93 @@ class ExtractError(ValueError):
         """Provide a useful string representation of the error."""
         if self.path:
             return (
-                f"{self.message}:\n"
+                f"{_line_prefix(self.line)}{self.message}:\n"
                 f"{self.path}\n"
                 f"{' ' * self.token.location.start}{'^' * len(self.token.location)}"
             )
         else:
-            return self.message
+            return _line_prefix(self.line) + self.message
+
+
+class FieldError(PluckError):
+    """
+    A problem with the value of one field, kept as data rather than as a message.
+
+    For a value of the wrong type, `indexes` locates the bad value within the value at
+    `tokens`, `expected` describes the type it should have been and `value` is the bad
+    value.  For anything else (a missing key, a failed mapping), `error` is what was
+    raised and `expected` is None.  `field` is the name of the dataclass field, where
+    known.
+
+    The message is only written out when it is read, since writing out the path is
+    the expensive part of an error.
+    """
+
+    def __init__(
+        self,
+        tokens: Sequence[Token],
+        indexes: Sequence[Union[int, str]] = (),
+        expected: Optional[str] = None,
+        value: Any = None,
+        error: Optional[Exception] = None,
+        field: Optional[str] = None,
+    ):
+        """Record a bad value, or an `error` found while plucking a field."""
+        self.tokens = tokens
+        self.indexes = indexes
+        self.expected = expected
+        self.value = value
+        self.error = error
+        self.field = field
+
+    @property
+    def actual(self) -> str:
+        """The name of the type of the bad value."""
+        return type(self.value).__name__
+
+    @property
+    def message(self) -> str:  # type: ignore[override]
+        """The message, written out from the details of the error."""
+        if self.error is not None:
+            return str(self.error)
+
+        path = _reconstruct_path(self.tokens, self.indexes)
+        return f"{path} should be '{self.expected}' but is '{self.actual}' instead"
+
+
+class PluckErrors(PluckError):
+    """Every bad field found in a record, when plucking with `on_error="collect"`."""
+
+    def __init__(self, errors: List[FieldError]):
+        """Collect `errors`, which shouldn't be empty."""
+        self.errors = errors
+
+    @property
+    def message(self) -> str:  # type: ignore[override]
+        """A line for each of `errors`, after one giving the number of bad fields."""
+        lines = [f"{len(self.errors)} bad field(s):"]
+        lines += [f"{error.field}: {error.message}" for error in self.errors]
+        return "\n".join(lines)
+
+
+class DecodeError(json.JSONDecodeError):
+    """
+    Bad JSON on one line of newline-delimited JSON.
+
+    `line` and `lineno` are the line number of the record in the whole input, while
+    `colno` and `pos` are the position of the error within the record.
+    """
+
+    def __init__(self, msg: str, doc: str, pos: int, line: int):
+        """Record an error at `pos` in `doc`, the record on `line`."""
+        super().__init__(msg, doc, pos)
+        self.line = self.lineno = line
+
+    def __str__(self) -> str:
+        """Give the line number the same way as plucking errors do."""
+        where = f"column {self.colno} (char {self.pos})"
+        return f"{_line_prefix(self.line)}{self.msg}: {where}"
+
+    def __reduce__(self) -> Any:
+        """Keep the line number when pickled, e.g. to leave a worker process."""
+        return type(self), (self.msg, self.doc, self.pos, self.line)
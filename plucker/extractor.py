@@ -1,12 +1,37 @@
 from typing import List, Any, Tuple, Dict
-from .tokeniser import tokenise, Token, ArrayToken, NameToken
+from .tokeniser import (
+    tokenise,
+    Token,
+    Tokens,
+    ArrayToken,
+    NameToken,
+    IndexToken,
+    SliceToken,
+    WildcardToken,
+    DescendToken,
+    FilterToken,
+)
 from .exceptions import ExtractError
+from .filters import matching
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "MISSING"
+
+    def __reduce__(self) -> str:
+        # Unpickle as the same object, so that `is MISSING` still works.
+        return "MISSING"
+
+
+# Stands in for a value that isn't there, for paths with a default.
+MISSING: Any = _Missing()
 
 
 def _get_array_from_path(
     data: List[Any],
     head: ArrayToken,
-    rest: List[Token],
+    rest: Tokens,
 ):
     """
     Return a new array containing the contents of each of data's entries at location 'path'.
@@ -28,7 +53,7 @@ def _get_array_from_path(
 def _get_name_from_path(
     data: Dict[str, Any],
     head: NameToken,
-    rest: List[Token],
+    rest: Tokens,
 ):
     try:
         data = data[head.name]
@@ -38,8 +63,50 @@ def _get_name_from_path(
     return _get_from_path(data, rest)
 
 
-def _get_from_path(data: Any, path: List[Token]) -> Any:
-    if path == []:
+def _get_index_from_path(
+    data: List[Any],
+    head: IndexToken,
+    rest: Tokens,
+):
+    try:
+        data = data[head.index]
+    except IndexError:
+        raise ExtractError(head, f"Expected index {head.index} to exist")
+
+    return _get_from_path(data, rest)
+
+
+def descendants(data: Any, name: str) -> List[Any]:
+    """
+    Return the value of every `name` key in `data`, at any depth, in document order.
+
+    Values found are searched as well, so `{"a": {"a": 1}}` gives `[{"a": 1}, 1]`.
+    """
+    found = []
+    stack = [data]
+
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if name in node:
+                found.append(node[name])
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+    return found
+
+
+def _not_a(expected: str, head: Token, data: Any) -> ExtractError:
+    return ExtractError(
+        head,
+        f"Data not in expected format; expected '{expected}'"
+        f" but it was '{data.__class__.__name__}'",
+    )
+
+
+def _get_from_path(data: Any, path: Tokens) -> Any:  # noqa: C901
+    if not path:
         return data
 
     head = path[0]
@@ -57,16 +124,81 @@ def _get_from_path(data: Any, path: List[Token]) -> Any:
     elif isinstance(head, ArrayToken):
         if not isinstance(data, list):
             # TODO: Check this error makes sense
-            raise ExtractError(
-                head,
-                f"Data not in expected format; expected 'list'"
-                f" but it was '{data.__class__.__name__}'",
-            )
+            raise _not_a("list", head, data)
 
         return _get_array_from_path(data, head, path[1:])
 
+    elif isinstance(head, IndexToken):
+        if not isinstance(data, list):
+            raise _not_a("list", head, data)
+
+        return _get_index_from_path(data, head, path[1:])
+
+    elif isinstance(head, SliceToken):
+        if not isinstance(data, list):
+            raise _not_a("list", head, data)
+
+        # Only the items in the slice are visited.
+        return [_get_from_path(e, path[1:]) for e in data[head.start : head.stop]]
+
+    elif isinstance(head, WildcardToken):
+        if not isinstance(data, dict):
+            raise _not_a("dict", head, data)
+
+        return [_get_from_path(e, path[1:]) for e in data.values()]
+
+    elif isinstance(head, DescendToken):
+        return [_get_from_path(e, path[1:]) for e in descendants(data, head.name)]
+
+    elif isinstance(head, FilterToken):
+        if not isinstance(data, list):
+            raise _not_a("list", head, data)
+
+        # Items that don't match are skipped before the rest of the path is walked.
+        return [_get_from_path(e, path[1:]) for e in matching(data, head)]
+
+
+def optional_key(data: Any, name: str) -> Any:
+    """Return `data[name]`, or `MISSING` if `data` is null or has no such key."""
+    if isinstance(data, dict):
+        return data.get(name, MISSING)
+    elif data is None:
+        return MISSING
+    raise TypeError("expected a dict")
+
+
+def optional_index(data: Any, index: int) -> Any:
+    """Return `data[index]`, or `MISSING` if `data` is null or too short."""
+    if isinstance(data, list):
+        return data[index] if -len(data) <= index < len(data) else MISSING
+    elif data is None:
+        return MISSING
+    raise TypeError("expected a list")
+
+
+def _get_optional(data: Any, path: Tokens) -> Any:
+    """
+    Like `_get_from_path()`, but return `MISSING` if a key or index doesn't exist.
+
+    Looking up a key or index in null also gives `MISSING`.  This only goes for the
+    steps before the path gets to a list of values: nothing is missing from the items
+    of a list, so a key missing from one of them is still an error.
+    """
+    for idx, head in enumerate(path):
+        if isinstance(head, NameToken) and (data is None or isinstance(data, dict)):
+            data = optional_key(data, head.name)
+        elif isinstance(head, IndexToken) and (data is None or isinstance(data, list)):
+            data = optional_index(data, head.index)
+        else:
+            return _get_from_path(data, path[idx:])
+
+        if data is MISSING:
+            return MISSING
+
+    return data
+
 
-def extract(data: Any, path: str) -> Tuple[Any, List[Token]]:
+def extract(data: Any, path: str) -> Tuple[Any, Tokens]:
     """Navigate an input using a string path, returning the leaf value."""
     tokens = tokenise(path)
     try:
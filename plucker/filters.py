@@ -0,0 +1,84 @@
+"""
+Compile filter tokens, e.g. `[?type=="add"]`, into predicate functions.
+
+Each predicate is built once per distinct filter and does as little as possible per
+item: a type check, a key lookup and one comparison.
+
+Items that aren't objects, or don't have the key being compared, never match.  Values
+are only compared with values of the same kind, where ints and floats are the same
+kind but booleans are not numbers, so `1` doesn't match `true` and ordering a string
+against a number is simply false rather than an error.  `!=` matches any value that
+`==` doesn't.
+"""
+import operator
+from functools import lru_cache
+from typing import Any, Callable, List, Optional
+
+from .tokeniser import FilterToken
+
+Predicate = Callable[[Any], bool]
+
+_OPS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _kind(value: Any) -> type:
+    cls = type(value)
+    return float if cls is int else cls
+
+
+def _compare(op: str, value: Any) -> Predicate:
+    """Return a predicate comparing a value against `value` with `op`."""
+    kind = _kind(value)
+    compare = _OPS[op]
+
+    if op == "!=":
+
+        def test(x: Any) -> bool:
+            return _kind(x) is not kind or x != value
+
+    else:
+
+        def test(x: Any) -> bool:
+            return _kind(x) is kind and compare(x, value)
+
+    return test
+
+
+@lru_cache(maxsize=None)
+def _predicate(name: Optional[str], op: str, kind: str, value: Any) -> Predicate:
+    # `kind` is the name of the value's type, which is only there so that e.g. 1 and
+    # True are cached separately.
+    test = _compare(op, value)
+    if name is None:
+        return test
+
+    def test_key(item: Any) -> bool:
+        if type(item) is not dict or name not in item:
+            return False
+        return test(item[name])
+
+    return test_key
+
+
+def predicate(token: FilterToken) -> Predicate:
+    """Return a (cached) function telling whether an item matches `token`."""
+    return _predicate(token.name, token.op, type(token.value).__name__, token.value)
+
+
+def matching(data: List[Any], token: FilterToken) -> List[Any]:
+    """Return the items of `data` that match `token`."""
+    return list(filter(predicate(token), data))
+
+
+def filtered(data: Any, name: Optional[str], op: str, value: Any) -> List[Any]:
+    """Return the items of the list `data` that match, for generated code."""
+    if not isinstance(data, list):
+        raise TypeError("expected a list")
+    return list(filter(_predicate(name, op, type(value).__name__, value), data))
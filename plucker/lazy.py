@@ -0,0 +1,115 @@
+"""
+Lazily plucked dataclasses.
+
+`lazy_class(plucker)` generates a subclass of the plucker's dataclass in which each
+plucked field is a property.  The first time a field is read its path is extracted,
+mapped and type-checked, and the result is memoised in a slot; fields that are never
+read cost nothing.
+
+Instances compare equal to (and hash the same as) eagerly plucked instances with the
+same values, and work with `dataclasses.asdict()`, `dataclasses.replace()` and
+pickling, all of which read every field.  `__post_init__` is not run, and errors in
+the input are only raised when the bad field is read.
+"""
+import dataclasses
+from typing import Any, Callable, Dict, List, Tuple, Type, TypeVar, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .plucker import Plucker, _CompiledPath
+
+T = TypeVar("T")
+
+_DATA = "_plucker_data"
+_DEFAULTS = "_plucker_defaults"
+
+
+def _construct(cls: Type[T], attrs: Dict[str, Any]) -> T:
+    return cls(**attrs)
+
+
+def _field_property(attr: str, path: "_CompiledPath") -> property:
+    slot = f"_lazy_{attr}"
+    pluck = path.pluck
+
+    def get(self) -> Any:
+        try:
+            return getattr(self, slot)
+        except AttributeError:
+            value = pluck(getattr(self, _DATA))
+            object.__setattr__(self, slot, value)
+            return value
+
+    def set(self, value: Any):
+        object.__setattr__(self, slot, value)
+
+    return property(get, set)
+
+
+def _eq(into: type, names: List[str]) -> Callable[[Any, Any], Any]:
+    def __eq__(self, other: Any) -> Any:
+        if not isinstance(other, into):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in names)
+
+    return __eq__
+
+
+def lazy_class(plucker: "Plucker[T]") -> Type[T]:
+    """Generate a lazily-plucking subclass of `plucker.into`."""
+    into: type = plucker.into
+    fields = dataclasses.fields(into)
+    params = getattr(into, "__dataclass_params__")
+
+    namespace: Dict[str, Any] = {
+        "__slots__": (_DATA, *(f"_lazy_{attr}" for attr in plucker.paths)),
+        "__qualname__": into.__qualname__,
+        "__module__": into.__module__,
+        "__reduce__": lambda self: (
+            _construct,
+            (into, {f.name: getattr(self, f.name) for f in fields if f.init}),
+        ),
+    }
+
+    for attr, path in plucker.paths.items():
+        namespace[attr] = _field_property(attr, path)
+
+    namespace[_DEFAULTS] = _defaults(plucker)
+
+    if params.eq:
+        namespace["__eq__"] = _eq(into, [f.name for f in fields if f.compare])
+        # Defining __eq__ would otherwise set __hash__ to None.
+        namespace["__hash__"] = into.__hash__
+
+    return type(into.__name__, (into,), namespace)
+
+
+def _constant(value: Any) -> Callable[[], Any]:
+    return lambda: value
+
+
+def _defaults(plucker: "Plucker[Any]") -> List[Tuple[str, Callable[[], Any]]]:
+    """Work out how to fill in any fields that don't have a path to pluck them from."""
+    defaults: List[Tuple[str, Callable[[], Any]]] = []
+
+    for field in dataclasses.fields(plucker.into):
+        if field.name in plucker.paths:
+            continue
+        elif field.default is not dataclasses.MISSING:
+            defaults.append((field.name, _constant(field.default)))
+        elif field.default_factory is not dataclasses.MISSING:
+            defaults.append((field.name, field.default_factory))
+        elif field.init:
+            raise TypeError(f"No path given for required field {field.name!r}")
+
+    return defaults
+
+
+def make_lazy(cls: Type[T], data: Any) -> T:
+    """Create an instance of `cls` (from `lazy_class`) that will pluck from `data`."""
+    instance = object.__new__(cls)
+    object.__setattr__(instance, _DATA, data)
+
+    for name, default in getattr(cls, _DEFAULTS):
+        object.__setattr__(instance, name, default())
+
+    return instance
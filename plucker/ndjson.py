@@ -0,0 +1,164 @@
+"""
+Pluck newline-delimited JSON, where each line of the input is one record.
+
+Input is read in large blocks (using `mmap` when given a filename), which are cut at
+line boundaries.  Each block is parsed and plucked as a unit, either in this process
+or in a pool of worker processes that each hold their own compiled copy of the
+plucker.  Results come back in input order, with only a bounded number of blocks in
+flight at once.
+
+Errors raised while decoding or plucking a record have their `line` attribute set to
+the (1-based) line number of the record in the input.  Bad JSON is raised as a
+`DecodeError`, a `JSONDecodeError` whose `lineno` is that line number too.
+"""
+import json
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import (
+    Any,
+    AnyStr,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    TYPE_CHECKING,
+)
+
+from .exceptions import DecodeError, ExtractError, PluckError
+
+if TYPE_CHECKING:
+    from .plucker import Plucker
+
+T = TypeVar("T")
+
+BLOCK_SIZE = 1024 * 1024
+
+Source = Union[str, "os.PathLike[str]", Any]
+
+
+def _read_file(path: Union[str, "os.PathLike[str]"]) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start in range(0, len(mm), BLOCK_SIZE):
+                yield mm[start : start + BLOCK_SIZE]
+
+
+def _read_stream(f: Any) -> Iterator[AnyStr]:
+    return iter(lambda: f.read(BLOCK_SIZE), f.read(0))
+
+
+def _blocks(chunks: Iterable[AnyStr]) -> Iterator[Tuple[int, AnyStr]]:
+    """Regroup `chunks` into blocks of whole lines, with each block's first line number."""
+    line = 1
+    rest: Optional[AnyStr] = None
+
+    for chunk in chunks:
+        newline = b"\n" if isinstance(chunk, bytes) else "\n"
+        if rest:
+            chunk = rest + chunk
+
+        cut = chunk.rfind(newline) + 1
+        block, rest = chunk[:cut], chunk[cut:]
+        if block:
+            yield line, block
+            line += block.count(newline)
+
+    if rest:
+        yield line, rest
+
+
+def _decode(text: AnyStr, line: int) -> Any:
+    """Decode the record on `line`, tagging any error with the line number."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise DecodeError(exc.msg, exc.doc, exc.pos, line) from None
+    except ValueError as exc:
+        # Text that isn't UTF-8 (or -16 or -32).
+        exc.line = line  # type: ignore[attr-defined]
+        raise exc
+
+
+def _pluck_block(plucker: "Plucker[T]", line: int, block: AnyStr) -> List[T]:
+    newline = b"\n" if isinstance(block, bytes) else "\n"
+    results = []
+
+    for offset, text in enumerate(block.split(newline)):
+        if not text.strip():
+            continue
+
+        data = _decode(text, line + offset)
+        try:
+            results.append(plucker.pluck(data))
+        except (ExtractError, PluckError) as exc:
+            exc.line = line + offset
+            raise exc
+
+    return results
+
+
+# Each worker process has its own copy of the plucker, sent once when it starts.
+_worker_plucker: Optional["Plucker[Any]"] = None
+
+
+def _init_worker(plucker: "Plucker[Any]"):
+    global _worker_plucker
+    _worker_plucker = plucker
+
+
+def _pluck_block_in_worker(line: int, block: AnyStr) -> List[Any]:
+    assert _worker_plucker is not None
+    return _pluck_block(_worker_plucker, line, block)
+
+
+def pluck_lines(
+    __source: Source,
+    __plucker: "Plucker[T]",
+    *,
+    workers: int = 0,
+) -> Iterator[T]:
+    """
+    Pluck each line of the newline-delimited JSON `__source` with `__plucker`.
+
+    `__source` can be a filename or a file opened in text or binary mode.  With
+    `workers` > 0, blocks of lines are plucked in that many worker processes; the
+    plucker's dataclass (and any mappers) must then be picklable.
+    """
+    if isinstance(__source, (str, os.PathLike)):
+        chunks: Iterable[Any] = _read_file(__source)
+    else:
+        chunks = _read_stream(__source)
+
+    if workers <= 0:
+        for line, block in _blocks(chunks):
+            yield from _pluck_block(__plucker, line, block)
+    else:
+        yield from _pluck_in_workers(_blocks(chunks), __plucker, workers)
+
+
+def _pluck_in_workers(
+    blocks: Iterable[Tuple[int, Any]], plucker: "Plucker[T]", workers: int
+) -> Iterator[T]:
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(plucker,),
+    ) as pool:
+        pending: Deque["Future[List[T]]"] = deque()
+
+        for line, block in blocks:
+            pending.append(pool.submit(_pluck_block_in_worker, line, block))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
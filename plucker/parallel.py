@@ -0,0 +1,161 @@
+"""
+Pluck a single huge document using several workers.
+
+`Plucker.pluck_parallel()` splits the work of plucking a document into units, and
+runs them on a `concurrent.futures` executor:
+
+- each path is a unit, starting from the value at the longest prefix of the path
+  that is only names and indexes, e.g. `.payload.items` for `.payload.items[].id`,
+  which is looked up first;
+- where a path goes through `[]` into a list longer than `chunk_size`, and its value
+  can be finished (nested `into()`, mapped with `map_each()` and type-checked) item
+  by item, each `chunk_size` items of the list are a unit instead.
+
+Values that aren't lists or objects are finished straight away rather than being sent
+to a worker.  Units are sent the module-level `_run()` with the plucker and the part
+of the document they need, so they can run in a process pool, as long as the plucker
+can be pickled; each worker process compiles the plucker once.  Results are put back
+together in order, so the result is the same as `pluck()`'s.  If any unit fails to
+pluck, the document is plucked again without an executor, to raise the same error as
+`pluck()` would.  Other errors, such as failing to pickle a unit or a broken process
+pool, are raised as they are.
+
+Whether this is any quicker depends on the executor.  In a process pool, each unit's
+part of the document and its results are pickled on the way to and from the worker,
+which only pays off where finishing the values (say, nesting them into dataclasses
+or mapping them) costs more than copying them.  Threads share the document, but
+only run Python code in parallel on a free-threaded build of Python.
+`default_executor()` returns a thread pool there and a process pool elsewhere.
+Starting a pool of processes takes far longer than plucking most documents, so make
+one executor and pass it to every call.
+"""
+import sys
+import typing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple, TypeVar, Union, TYPE_CHECKING
+
+from .exceptions import ExtractError, PluckError
+from .extractor import _get_from_path, _get_optional, MISSING
+from .tokeniser import ArrayToken, IndexToken, NameToken
+
+if TYPE_CHECKING:
+    from .plucker import Plucker, _CompiledPath
+
+T = TypeVar("T")
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def free_threaded() -> bool:
+    """Tell whether this Python is running without the global interpreter lock."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def default_executor(max_workers: Optional[int] = None) -> Executor:
+    """A thread pool on free-threaded Python, otherwise a process pool."""
+    if free_threaded():
+        return ThreadPoolExecutor(max_workers)
+    return ProcessPoolExecutor(max_workers)
+
+
+def _prefix_length(path: "_CompiledPath") -> int:
+    """The number of names and indexes at the start of `path`'s tokens."""
+    for idx, token in enumerate(path.tokens):
+        if not isinstance(token, (NameToken, IndexToken)):
+            return idx
+    return len(path.tokens)
+
+
+def _chunkable(path: "_CompiledPath") -> bool:
+    """Whether finishing the items of `path`'s list separately gives the same result."""
+    return path.path.mapper is None and typing.get_origin(path.expected_type) is list
+
+
+def _run(plucker: "Plucker[Any]", idx: int, start: int, value: Any, items: bool) -> Any:
+    """
+    Finish the path `idx` of `plucker` from `value`, which is at its token `start`.
+
+    With `items`, `value` is part of the list at the path's first `[]`, and each of its
+    items is finished.
+    """
+    path = list(plucker.paths.values())[idx]
+    if items:
+        rest = path.tokens[start + 1 :]
+        return path.finish([_get_from_path(item, rest) for item in value])
+
+    rest = path.tokens[start:]
+    get = _get_optional if path.optional else _get_from_path
+    return path.finish(get(value, rest))
+
+
+# A unit's result, or the futures of each of its chunks.
+_Pending = Union[Tuple[Any], List["Future[Any]"], "Future[Any]"]
+
+
+def _submit(
+    executor: Executor,
+    plucker: "Plucker[Any]",
+    idx: int,
+    data: Any,
+    chunk_size: int,
+) -> _Pending:
+    path = list(plucker.paths.values())[idx]
+    start = _prefix_length(path)
+    get = _get_optional if path.optional else _get_from_path
+    value = get(data, path.tokens[:start])
+
+    if value is MISSING:
+        return (path.default_value(),)
+    elif not isinstance(value, (list, dict)):
+        return (_run(plucker, idx, start, value, False),)
+    elif (
+        start < len(path.tokens)
+        and isinstance(path.tokens[start], ArrayToken)
+        and isinstance(value, list)
+        and len(value) > chunk_size
+        and _chunkable(path)
+    ):
+        return [
+            executor.submit(_run, plucker, idx, start, value[i : i + chunk_size], True)
+            for i in range(0, len(value), chunk_size)
+        ]
+
+    return executor.submit(_run, plucker, idx, start, value, False)
+
+
+def _result(pending: _Pending) -> Any:
+    if isinstance(pending, tuple):
+        return pending[0]
+    elif isinstance(pending, list):
+        return [item for chunk in pending for item in chunk.result()]
+    return pending.result()
+
+
+def _cancel(pending: List[_Pending]) -> None:
+    for unit in pending:
+        for future in unit if isinstance(unit, list) else [unit]:
+            if isinstance(future, Future):
+                future.cancel()
+
+
+def pluck_concurrently(
+    __data: Any, __plucker: "Plucker[T]", executor: Executor, chunk_size: int
+) -> T:
+    """Pluck `__data` with `__plucker`, running units of the work on `executor`."""
+    pending: List[_Pending] = []
+
+    try:
+        for idx in range(len(__plucker.paths)):
+            pending.append(_submit(executor, __plucker, idx, __data, chunk_size))
+        values = [_result(unit) for unit in pending]
+    except (ExtractError, PluckError):
+        _cancel(pending)
+        # The error may not be the one `pluck()` raises: that may be for an earlier
+        # path, or with `on_error="collect"`, for every bad path.
+        return __plucker.pluck(__data)
+    except BaseException:
+        _cancel(pending)
+        raise
+
+    return __plucker._construct(*values)
@@ -0,0 +1,219 @@
+"""
+Keep compiled specs on disk, so that short-lived processes needn't compile them anew.
+
+Most of the time it takes to compile a large spec goes on tokenising its paths and,
+with `codegen=True`, on compiling the generated source into bytecode.  A `PlanCache`
+saves both in a directory, as a "plan" file per spec, and loads them the next time
+the spec is compiled:
+
+    cache = PlanCache("~/.cache/plucker")
+    plucker = cache.compile(Message, codegen=True, **paths)
+
+Each plan is keyed by a hash of the version of this library, the Python bytecode
+version, the dataclass's name and fields, and the spec's paths (including those of
+nested `into()` specs).  Upgrading the library so changes the key, and the old plan
+is simply never read again.
+
+Plans are only ever a shortcut: tokens are looked up by path, and code by a hash of
+the source it was compiled from, so whatever a plan holds, the result is the same as
+compiling without it.  Anything missing from a plan is compiled as usual and the
+plan is saved again.  A plan that can't be read is ignored, and one that can't be
+written is skipped, so a read-only or full cache directory doesn't stop plucking.
+
+Validators, constructors and the trie are still built from scratch each time: they
+are made of functions that can't be saved, and are quick to build.
+
+Plans are loaded with `pickle` and `marshal`, so only use a cache directory that
+only you can write to, as you would for `__pycache__`.
+"""
+import builtins
+import dataclasses
+import hashlib
+import importlib.metadata
+import marshal
+import os
+import pickle
+import sys
+import tempfile
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Dict, List, Mapping, Optional, Type, TypeVar, Union
+
+from .codegen import active_plan
+from .extractor import MISSING
+from .plucker import compile, Path, Plucker
+from .tokeniser import tokenise, Tokens
+
+T = TypeVar("T")
+
+_SUFFIX = ".plan"
+
+
+@lru_cache(maxsize=None)
+def _library_version() -> str:
+    """The installed version, or when running from a source tree, its fingerprint."""
+    try:
+        return importlib.metadata.version("plucker")
+    except importlib.metadata.PackageNotFoundError:
+        pass
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    stats = []
+    for name in sorted(os.listdir(here)):
+        if name.endswith(".py"):
+            stat = os.stat(os.path.join(here, name))
+            stats.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "source-" + hashlib.sha256("\n".join(stats).encode()).hexdigest()
+
+
+def _describe_class(cls: type) -> List[Any]:
+    fields = [
+        (
+            field.name,
+            repr(field.type),
+            field.init,
+            field.default is dataclasses.MISSING,
+            field.default_factory is dataclasses.MISSING,
+        )
+        for field in dataclasses.fields(cls)
+    ]
+    return [
+        cls.__module__,
+        cls.__qualname__,
+        repr(getattr(cls, "__dataclass_params__")),
+        fields,
+    ]
+
+
+def _describe_spec(into: type, kwargs: Mapping[str, Path]) -> List[Any]:
+    """Describe everything about a spec that compiling it depends on."""
+    paths = [
+        (
+            attr,
+            path.path,
+            path.default is MISSING,
+            path.mapper is None,
+            path.each_mapper is None,
+            None if path.type is None else _describe_spec(path.type, path.type_kwargs),
+        )
+        for attr, path in kwargs.items()
+    ]
+    return _describe_class(into) + [paths]
+
+
+def plan_key(
+    __into: type, *, codegen: bool = False, on_error: str = "raise", **kwargs: Path
+) -> str:
+    """Return the key of the plan for compiling `kwargs` into `__into`."""
+    description = [
+        _library_version(),
+        sys.implementation.cache_tag,
+        codegen,
+        on_error,
+        _describe_spec(__into, kwargs),
+    ]
+    return hashlib.sha256(repr(description).encode()).hexdigest()
+
+
+class Plan:
+    """
+    The tokens of a spec's paths and the code generated for it.
+
+    Tokens are kept by path and code by a hash of its source, and compiling the
+    spec looks them up rather than making them anew.
+    """
+
+    def __init__(
+        self,
+        tokens: Optional[Dict[str, Tokens]] = None,
+        code: Optional[Dict[str, bytes]] = None,
+    ):
+        """Make a plan holding `tokens` and `code`, or an empty one."""
+        self.tokens: Dict[str, Tokens] = tokens or {}
+        self.code_by_hash: Dict[str, bytes] = code or {}
+        # Whether anything has been added since the plan was loaded.
+        self.changed = False
+
+    def tokenise(self, path: str) -> Tokens:
+        """Return the tokens of `path`, tokenising it if it isn't in the plan."""
+        tokens = self.tokens.get(path)
+        if tokens is None:
+            tokens = self.tokens[path] = tokenise(path)
+            self.changed = True
+        return tokens
+
+    def code(self, source: str) -> CodeType:
+        """Return the code of `source`, compiling it if it isn't in the plan."""
+        digest = hashlib.sha256(source.encode()).hexdigest()
+        data = self.code_by_hash.get(digest)
+        if data is not None:
+            return marshal.loads(data)
+
+        # Named after the source, which is the same wherever the code is loaded.
+        code = builtins.compile(source, f"<plucker-plan-{digest[:16]}>", "exec")
+        self.code_by_hash[digest] = marshal.dumps(code)
+        self.changed = True
+        return code
+
+
+class PlanCache:
+    """A directory of plans, each saved in a file named after its key."""
+
+    def __init__(self, directory: Union[str, "os.PathLike[str]"]):
+        """Keep plans in `directory`, which is made when the first plan is saved."""
+        self.directory = os.path.expanduser(os.fspath(directory))
+
+    def _filename(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def load(self, key: str) -> Plan:
+        """Load the plan with `key`, or return an empty plan if there isn't one."""
+        try:
+            with open(self._filename(key), "rb") as f:
+                tokens, code = pickle.load(f)
+            return Plan(tokens, code)
+        except Exception:
+            # Missing, unreadable or corrupt.
+            return Plan()
+
+    def save(self, key: str, plan: Plan) -> None:
+        """
+        Save `plan` with `key`.
+
+        The plan is written to a temporary file first so that other processes never
+        read half a plan.  Failing to save isn't an error.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump((plan.tokens, plan.code_by_hash), f, protocol=4)
+                os.replace(temp, self._filename(key))
+            except BaseException:
+                os.unlink(temp)
+                raise
+        except OSError:
+            pass
+
+    def compile(
+        self,
+        __into: Type[T],
+        *,
+        codegen: bool = False,
+        on_error: str = "raise",
+        **kwargs: Path,
+    ) -> Plucker[T]:
+        """Compile a spec as `compile` does, loading its plan and saving any changes."""
+        key = plan_key(__into, codegen=codegen, on_error=on_error, **kwargs)
+        plan = self.load(key)
+
+        token = active_plan.set(plan)
+        try:
+            plucker = compile(__into, codegen=codegen, on_error=on_error, **kwargs)
+        finally:
+            active_plan.reset(token)
+
+        if plan.changed:
+            self.save(key, plan)
+        return plucker
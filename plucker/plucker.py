@@ -1,118 +1,285 @@
+import copy
+import threading
 import typing
-from dataclasses import is_dataclass
-from typing import Any, TypeVar, Type, Optional, List, Tuple, Dict
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass, is_dataclass
+from functools import partial
+from types import MappingProxyType
+from typing import (
+    Any,
+    TypeVar,
+    Type,
+    Optional,
+    List,
+    Dict,
+    Generic,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+    Tuple,
+    Union,
+    AsyncIterable,
+    AsyncIterator,
+)
 
-from .extractor import extract
-from .tokeniser import Token, ArrayToken, NameToken
+from . import aio, trace
+from .cache import CachedMapper
+from .codegen import active_plan, compile_getter, compile_plucker
+from .construct import constructor, field_types
+from .columns import pluck_arrays as _pluck_arrays
+from .extractor import _get_from_path, _get_optional, MISSING
+from .lazy import lazy_class, make_lazy
+from .ndjson import pluck_lines, Source as NDJSONSource
+from .parallel import pluck_concurrently, DEFAULT_CHUNK_SIZE
+from .stream import parse_bytes, pluck_items, _prune_tree, _Node, Buffer, Chunk, Source
+from .tokeniser import tokenise, Tokens, _reconstruct_path
+from .trie import PathTrie
 from .types import JSONStructure, Mapper, MapperFn
-from .exceptions import PluckError
+from .validators import (
+    exact_type,
+    is_optional,
+    validator_for,
+    Index,
+    Invalid,
+    Validator,
+)
+from .exceptions import PluckError, ExtractError, FieldError, PluckErrors
 
 T = TypeVar("T")
 
+_NO_KWARGS: Mapping[str, "Path"] = MappingProxyType({})
 
-def _reconstruct_path(tokens: List[Token], indexes: List[int]) -> str:
-    path = ""
-    cur_idx = 0
+# What to do on finding a bad field: raise an error for it straight away, or carry on
+# to find every bad field in the record and raise them together as `PluckErrors`.
+ON_ERROR = ("raise", "collect")
 
-    for t in tokens:
-        if isinstance(t, NameToken):
-            path += f".{t.name}"
-        if isinstance(t, ArrayToken):
-            path += f"[{indexes[cur_idx]}]"
-            cur_idx += 1
+# The types of default that can be shared between results rather than copied for each.
+_IMMUTABLE = (type(None), bool, int, float, complex, str, bytes, tuple, frozenset)
 
-    return path
 
+def _type_error(exc: Invalid, tokens: Tokens) -> PluckError:
+    return FieldError(tokens, exc.indexes, exc.expected, exc.value)
 
-def _get_type(
-    expected_type: Type[Any],
-) -> Tuple[Type[Any], Optional[Type[Any]]]:
-    e_type: Optional[Type[Any]]
-    e_subtype: Optional[Type[Any]]
 
-    if expected_type.__module__ == "typing":
-        e_type = typing.get_origin(expected_type)
-        e_subtype = typing.get_args(expected_type)[0]
-    else:
-        e_type = expected_type
-        e_subtype = None
+def _uses_tokens(plucker: "Plucker[Any]", tokens: Tokens) -> bool:
+    """Tell whether `plucker`, or a plucker nested in it, has a path with `tokens`."""
+    return any(
+        path.tokens is tokens
+        or (path.into is not None and _uses_tokens(path.into, tokens))
+        for path in plucker.paths.values()
+    )
 
-    if e_type is None:
-        # TODO: Find a better error message
-        raise ValueError("expected_type is none")
-        pass
 
-    return e_type, e_subtype
+def _field_error(attr: str, path: "_CompiledPath", exc: Exception) -> FieldError:
+    """Record an error raised while plucking `path` for the field `attr`."""
+    # Drop the traceback and context, which keep every frame they passed through
+    # alive.
+    exc.__traceback__ = exc.__context__ = None
 
+    # An error is this path's own if it has the path's tokens, unless a nested path
+    # shares them, as paths with the same string do.
+    if isinstance(exc, FieldError) and exc.tokens is path.tokens:
+        if path.into is None or not _uses_tokens(path.into, path.tokens):
+            exc.field = attr
+            return exc
 
-# This doesn't work for List[List[int]], ie doubly nested, types.
-# We will need to rewrite this to be recursive to handle these.
-def _typecheck(data: Any, expected_type, tokens: List[Token]):
-    e_type, e_subtype = _get_type(expected_type)
+    return FieldError(path.tokens, error=exc, field=attr)
 
-    if e_subtype is None:
-        if type(data) != e_type:
-            path = _reconstruct_path(tokens, [])
-            desired_type = e_type.__name__
-            type_name = type(data).__name__
-            raise PluckError(
-                f"{path} should be '{desired_type}' but is '{type_name}' instead"
-            )
-
-    else:
-        if e_type != list:
-            raise PluckError(f"Unknown e_type type {e_type}")
 
-        for idx, x in enumerate(data):
-            actual_type = type(x)
-            if actual_type != e_subtype:
-                path = _reconstruct_path(tokens, [idx])
-                desired_type = e_subtype.__name__
-                type_name = actual_type.__name__
-                raise PluckError(
-                    f"{path} should be '{desired_type}' but is '{type_name}' instead"
-                )
+def _typecheck(data: Any, validate: Validator, tokens: Tokens):
+    try:
+        validate(data)
+    except Invalid as exc:
+        raise _type_error(exc, tokens) from None
 
 
 class Path:
-    """A path to a value in a JSON representation."""
+    """
+    A path to a value in a JSON representation.
+
+    Paths are immutable: `map()`, `into()` and the other builder methods return a new
+    `Path`, so a spec can be shared between threads and reused.  Paths compare equal
+    if they are built the same way, and can be hashed, e.g. to key a cache of
+    compiled specs.  The hash is worked out once, when the path is built.
+    """
+
+    _attrs = ("path", "default", "mapper", "type", "type_kwargs", "each_mapper")
+    __slots__ = _attrs + ("_hash",)
+
+    path: str
+    default: Any
+    mapper: Optional[Mapper]
+    type: Optional[Type[Any]]
+    type_kwargs: Mapping[str, "Path"]
+    each_mapper: Optional[Mapper]
+    _hash: int
+
+    def __init__(self, path: str, *, default: Any = MISSING):
+        """
+        Specify a path to fill in as the value part of kwargs passed to `pluck`.
+
+        If a key or index on the way to the value doesn't exist, or is null, the field
+        is set to `default` instead of raising an error.  Fields annotated
+        `Optional[T]` default to `None` without needing to say so.  A mutable default,
+        such as a list, is copied for each result, so that no two results share it.
+        """
+        self._set(
+            path=path,
+            default=default,
+            mapper=None,
+            type=None,
+            type_kwargs=_NO_KWARGS,
+            each_mapper=None,
+        )
+
+    def _set(self, **values: Any):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_hash", self._compute_hash())
+
+    def _state(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self._attrs}
+
+    def _replace(self, **changes: Any) -> "Path":
+        """Return a copy of this path with some of its attributes changed."""
+        path = object.__new__(Path)
+        path._set(**{**self._state(), **changes})
+        return path
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Refuse to change an attribute, since paths are immutable."""
+        raise AttributeError(f"Path is immutable; can't set {name}")
+
+    def __delattr__(self, name: str) -> None:
+        """Refuse to delete an attribute, since paths are immutable."""
+        raise AttributeError(f"Path is immutable; can't delete {name}")
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the attributes to pickle."""
+        # A mappingproxy can't be pickled.
+        return {**self._state(), "type_kwargs": dict(self.type_kwargs)}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore the attributes of an unpickled path."""
+        self._set(**{**state, "type_kwargs": MappingProxyType(state["type_kwargs"])})
+
+    def _key(self) -> Tuple[Any, ...]:
+        state = {**self._state(), "type_kwargs": tuple(self.type_kwargs.items())}
+        # So that e.g. defaults of 1 and True aren't equal.
+        return (type(self.default), *state.values())
+
+    def _compute_hash(self) -> int:
+        """Hash the same attributes as `__eq__()` compares, where possible."""
+        try:
+            return hash(self._key())
+        except TypeError:
+            # Mapping with a dict, or an unhashable default.  Paths that are equal
+            # still hash the same.
+            return hash((self.path, self.type))
+
+    def __eq__(self, other: Any) -> bool:
+        """Compare every attribute, including the type of the default."""
+        if not isinstance(other, Path):
+            return NotImplemented
+        elif self is other:
+            return True
+        return self._hash == other._hash and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        """Return the hash worked out when the path was built."""
+        return self._hash
+
+    def __repr__(self) -> str:
+        """Show the calls that build this path."""
+        text = f"Path({self.path!r}"
+        if self.default is not MISSING:
+            text += f", default={self.default!r}"
+        text += ")"
+        if self.type is not None:
+            kwargs = "".join(f", {k}={v!r}" for k, v in self.type_kwargs.items())
+            text += f".into({self.type.__qualname__}{kwargs})"
+        if self.each_mapper is not None:
+            text += f".map_each({self.each_mapper!r})"
+        if self.mapper is not None:
+            text += f".map({self.mapper!r})"
+        return text
+
+    def optional(self) -> "Path":
+        """Use `None` if the value doesn't exist, like `Path(path, default=None)`."""
+        return self._replace(default=None)
+
+    def map(self, mapper: Mapper, *, cache: Optional[int] = None) -> "Path":
+        """
+        Transform the value in the input using `mapper`.
+
+        With `cache=N`, the results of a mapper function are cached for the `N` most
+        recently seen values; see `plucker.cache`.
+        """
+        return self._replace(mapper=self._cached(mapper, cache))
 
-    def __init__(self, path: str):
-        """Specify a path to fill in as the value part of kwargs passed to `pluck`."""
-        self.path: str = path
-        self.mapper: Optional[Mapper] = None
-        self.type: Optional[Type[Any]] = None
+    def map_each(self, mapper: Mapper, *, cache: Optional[int] = None) -> "Path":
+        """
+        Transform each item of the list in the input using `mapper`.
 
-    def map(self, mapper: Mapper) -> "Path":
-        """Transform the value in the input using `mapper`."""
-        self.mapper = mapper
-        return self
+        This happens after `into()` and before `map()`.  `cache` is as for `map()`.
+        """
+        return self._replace(each_mapper=self._cached(mapper, cache))
 
-    def into(self, __into: Type[Any], **kwargs) -> "Path":
+    @staticmethod
+    def _cached(mapper: Mapper, cache: Optional[int]) -> Mapper:
+        if cache is None:
+            return mapper
+        elif isinstance(mapper, dict):
+            raise ValueError("Only mapper functions can be cached")
+        else:
+            return CachedMapper(mapper, cache)
+
+    def into(self, __into: Type[Any], **kwargs: "Path") -> "Path":
         """Parse the value in the input into another dataclass."""
-        self.type = __into
-        self.type_kwargs = kwargs
-        return self
+        return self._replace(type=__into, type_kwargs=MappingProxyType(kwargs))
 
     @staticmethod
-    def _apply_map_dict(mapper: Dict[str, Any], data: Any, tokens: List[Token]) -> Any:
+    def _apply_map_dict(
+        mapper: Dict[str, Any],
+        data: Any,
+        tokens: Tokens,
+        indexes: Sequence[Index] = (),
+    ) -> Any:
         """Map using a dict, producing an error if necessary."""
         try:
             return mapper[data]
         except KeyError:
-            path = _reconstruct_path(tokens, [])
-            raise PluckError(f"Couldn't map {path} (value is {repr(data)})")
+            raise Path._map_error(data, tokens, indexes)
 
     @staticmethod
-    def _apply_map_fn(mapper: MapperFn, data: Any, tokens: List[Token]) -> Any:
+    def _apply_map_fn(
+        mapper: MapperFn, data: Any, tokens: Tokens, indexes: Sequence[Index] = ()
+    ) -> Any:
         """Map using a function, producing an error if necessary."""
         try:
             return mapper(data)
         except Exception as exc:
-            path = _reconstruct_path(tokens, [])
-            raise PluckError(f"Couldn't map {path} (value is {repr(data)})") from exc
+            raise Path._map_error(data, tokens, indexes) from exc
+
+    @staticmethod
+    def _map_error(data: Any, tokens: Tokens, indexes: Sequence[Index]) -> PluckError:
+        path = _reconstruct_path(tokens, indexes)
+        return PluckError(f"Couldn't map {path} (value is {repr(data)})")
 
-    def _apply_map(self, data: Any, tokens: List[Token]) -> Any:
+    @classmethod
+    def _mapper_fn(
+        cls, mapper: Mapper
+    ) -> Callable[[Any, Tokens, Sequence[Index]], Any]:
+        """Return a function applying `mapper` and producing an error if necessary."""
+        if isinstance(mapper, dict):
+            return partial(cls._apply_map_dict, mapper)
+        else:
+            return partial(cls._apply_map_fn, mapper)
+
+    def _apply_map(self, data: Any, tokens: Tokens) -> Any:
         """Apply mapping if provided."""
         if self.mapper is None:
             return data
@@ -121,34 +288,872 @@ class Path:
         else:
             return self._apply_map_fn(self.mapper, data, tokens)
 
-    def _apply_into(self, data: Any) -> List[T]:
-        if not self.type:
+    def _apply_map_each(self, data: Any, tokens: Tokens) -> Any:
+        """Apply item-wise mapping if provided."""
+        if self.each_mapper is None:
+            return data
+        elif not isinstance(data, list):
+            path = _reconstruct_path(tokens, [])
+            raise PluckError(
+                f"Couldn't map each item of {path} (value is {repr(data)})"
+            )
+
+        apply = self._mapper_fn(self.each_mapper)
+        return [apply(item, tokens, (idx,)) for idx, item in enumerate(data)]
+
+    def _compile(self, expected_type: Type[Any], codegen: bool) -> "_CompiledPath":
+        """Tokenise the path and resolve everything that doesn't depend on input."""
+        into = (
+            compile(self.type, codegen=codegen, on_error="raise", **self.type_kwargs)
+            if self.type
+            else None
+        )
+        plan = active_plan.get()
+        tokens = tokenise(self.path) if plan is None else plan.tokenise(self.path)
+        return _CompiledPath(self, tokens, into, expected_type, codegen)
+
+
+def _item_checker(
+    item_type: Any, type_error: Callable[[Invalid], PluckError]
+) -> Callable[[Any, int], None]:
+    """Return a function type-checking the item at an index of a list."""
+    validate_item = validator_for(item_type)
+
+    def check(item: Any, idx: int) -> None:
+        try:
+            validate_item(item)
+        except Invalid as exc:
+            exc._indexes.append(idx)
+            raise type_error(exc) from None
+
+    return check
+
+
+def _item_finisher(
+    into: Optional[Callable[[Any], Any]],
+    each: Optional[Callable[[Any, Tokens, Sequence[Index]], Any]],
+    tokens: Tokens,
+    exact: Optional[type],
+    check: Callable[[Any, int], None],
+) -> Callable[[List[Any]], List[Any]]:
+    """Return a function nesting, mapping and checking each item of a list."""
+
+    def finish_items(source: List[Any]) -> List[Any]:
+        items: List[Any] = []
+        append = items.append
+
+        for idx, item in enumerate(source):
+            if into is not None:
+                item = into(item)
+            if each is not None:
+                item = each(item, tokens, (idx,))
+            if type(item) is not exact:
+                check(item, idx)
+            append(item)
+
+        return items
+
+    return finish_items
+
+
+class _CompiledPath:
+    """A `Path` with its tokens, nested plucker and expected type worked out."""
+
+    def __init__(
+        self,
+        path: Path,
+        tokens: Tokens,
+        into: Optional["Plucker[Any]"],
+        expected_type: Type[Any],
+        codegen: bool,
+    ):
+        self.path = path
+        self.tokens = tokens
+        self.into = into
+        self.expected_type = expected_type
+        self.validate = validator_for(expected_type)
+
+        # The value if the path doesn't exist, which is used as it is, without going
+        # through `into()`, mapping or type-checking.
+        if path.default is not MISSING:
+            self.default = path.default
+        else:
+            self.default = None if is_optional(expected_type) else MISSING
+        self.optional = self.default is not MISSING
+        self.copy_default = self.optional and not isinstance(self.default, _IMMUTABLE)
+
+        self._get = compile_getter(tokens, self.optional) if codegen else None
+
+        # Whether there's anything to do with the value besides type-checking it.
+        self.transforms = (
+            into is not None or path.mapper is not None or path.each_mapper is not None
+        )
+        # Type-checks an item of a list, where its items are finished one at a time.
+        self.check_item: Optional[Callable[[Any, int], None]] = None
+        self._finish_items = self._fuse_items()
+
+    def _fuse_items(self) -> Optional[Callable[[List[Any]], List[Any]]]:
+        """
+        Return a function doing everything to the items of a list in a single loop.
+
+        Where a list's items are nested `into()` another dataclass or mapped with
+        `map_each()`, that's done and each item type-checked before moving on to the
+        next.  Errors are those of the first bad item, rather than of the first step
+        that fails for any item.
+        """
+        fusable = self.into is not None or self.path.each_mapper is not None
+        if not fusable or self.path.mapper is not None:
+            return None
+        elif typing.get_origin(self.expected_type) is not list:
+            return None
+
+        item_type = (typing.get_args(self.expected_type) or (Any,))[0]
+        # Only called when tracing is off, so the nested plucker can skip checking.
+        into = self.into._pluck if self.into is not None else None
+        each = (
+            self.path._mapper_fn(self.path.each_mapper)
+            if self.path.each_mapper is not None
+            else None
+        )
+        check = self.check_item = _item_checker(item_type, self.type_error)
+        return _item_finisher(into, each, self.tokens, exact_type(item_type), check)
+
+    def _apply_into(self, data: Any) -> Any:
+        if self.into is None:
             return data
         else:
-            return [pluck(row, self.type, **self.type_kwargs) for row in data]
+            return self.into.pluck_many(data)
+
+    def extract(self, data: JSONStructure) -> Any:
+        """Return the value at the path, or `MISSING` if it has a default and is missing."""
+        try:
+            if self._get is not None:
+                return self._get(data)
+            elif self.optional:
+                return _get_optional(data, self.tokens)
+            else:
+                return _get_from_path(data, self.tokens)
+        except ExtractError as exc:
+            exc.path = self.path.path
+            raise exc
+
+    def type_error(self, exc: Invalid) -> PluckError:
+        return _type_error(exc, self.tokens)
+
+    def default_value(self) -> Any:
+        """Return the default, copied if it's mutable."""
+        return copy.copy(self.default) if self.copy_default else self.default
+
+    def transform(self, source: Any) -> Any:
+        """Apply `into()` and `map()` to an extracted value."""
+        if source is MISSING:
+            return self.default_value()
 
-    def _pluck(self, data: JSONStructure, expected_type: Type[T]) -> T:
-        source, tokens = extract(data, self.path)
         source = self._apply_into(source)
-        source = self._apply_map(source, tokens)
+        source = self.path._apply_map_each(source, self.tokens)
+        return self.path._apply_map(source, self.tokens)
+
+    def finish(self, source: Any) -> Any:
+        if source is MISSING:
+            return self.default_value()
+        elif self._finish_items is not None and type(source) is list:
+            return self._finish_items(source)
+
+        source = self.transform(source)
+        _typecheck(source, self.validate, self.tokens)
+
+        return source
+
+    def pluck(self, data: JSONStructure) -> Any:
+        if trace.hook is not None:
+            return self._pluck_traced(data)
+
+        return self.finish(self.extract(data))
+
+    def _pluck_traced(self, data: JSONStructure) -> Any:
+        return self._finish_traced(self._extract_traced(data))
+
+    def _extract_traced(self, data: JSONStructure) -> Any:
+        with trace.span("extract", self.path.path):
+            return self.extract(data)
 
-        print(source)
-        print(type(source), expected_type)
-        _typecheck(source, expected_type, tokens)
+    def _finish_traced(self, source: Any) -> Any:
+        path = self.path.path
+
+        if source is MISSING:
+            return self.default_value()
+        if self.into is not None:
+            with trace.span("into", path):
+                source = self._apply_into(source)
+        if self.path.mapper is not None or self.path.each_mapper is not None:
+            with trace.span("map", path):
+                source = self.path._apply_map_each(source, self.tokens)
+                source = self.path._apply_map(source, self.tokens)
+        with trace.span("typecheck", path):
+            _typecheck(source, self.validate, self.tokens)
 
         return source
 
 
-def pluck(__data: JSONStructure, __into: Type[T], **kwargs: Path) -> T:
-    """Pluck a set of data specified using kwargs into `__into` using `__data` as input."""
+@dataclass
+class Batch(Generic[T]):
+    """
+    The result of `pluck_batch()`.
+
+    That's the rows that could be plucked, in order, and the errors in each row that
+    couldn't, keyed by the row's index in the input.
+    """
+
+    values: List[T]
+    errors: Dict[int, List[FieldError]]
+
+
+class Plucker(Generic[T]):
+    """
+    A compiled set of paths, ready to pluck input into a dataclass.
+
+    Everything that doesn't depend on the input - tokenising paths, looking up the
+    types of the dataclass's fields, compiling nested `into()` specs - is done once
+    up front, so `pluck()` only has to walk the data.  Paths are merged into a trie
+    (see `plucker.trie`) so that where they share a prefix it is only walked once.
+
+    With `codegen=True`, the walk itself is turned into a specialised Python function
+    (see `plucker.codegen`), which is considerably faster again.
+
+    With `on_error="collect"`, a record with bad fields raises `PluckErrors`, listing
+    every bad field, rather than an error for the first one.  The record is plucked
+    as usual first, so only bad records pay for checking each field separately.
+    """
+
+    def __init__(
+        self,
+        __into: Type[T],
+        *,
+        codegen: bool = False,
+        on_error: str = "raise",
+        **kwargs: Path,
+    ):
+        """Compile `kwargs` for plucking into `__into`.  Prefer using `compile()`."""
+        if not is_dataclass(__into):
+            raise ValueError("__into must be a dataclass")
+        if on_error not in ON_ERROR:
+            raise ValueError(f"on_error should be one of {', '.join(ON_ERROR)}")
+
+        self.into = __into
+        self.on_error = on_error
+        self._spec = (codegen, on_error, kwargs)
+        types = field_types(__into)
+        self.paths = {
+            attr: path._compile(types[attr], codegen) for attr, path in kwargs.items()
+        }
+        # Pluckers used only once, e.g. by `pluck()` for a spec it hasn't seen before,
+        # call the dataclass rather than paying for generating a constructor.
+        self._construct: Callable[..., T] = (
+            constructor(__into, list(self.paths)) if codegen else self._construct_once
+        )
+        self._trie = PathTrie.build(
+            [path.tokens for path in self.paths.values()],
+            {idx for idx, path in enumerate(self.paths.values()) if path.optional},
+        )
+        self._lazy_class: Optional[Type[T]] = None
+        self._pruned: Optional[_Node] = None
+
+        pluck = compile_plucker(self) if codegen else self._pluck_interpreted
+        self._pluck: Callable[[JSONStructure], T]
+        self._traced: Callable[[JSONStructure], T]
+        if on_error == "collect":
+            self._pluck = partial(self._pluck_collecting, pluck)
+            self._traced = partial(self._pluck_collecting, self._pluck_traced)
+        else:
+            self._pluck = pluck
+            self._traced = self._pluck_traced
+
+    def __reduce__(self):
+        """
+        Pickle the spec rather than its compiled form.
+
+        The compiled form is rebuilt on unpickling, or reused if the same spec has been
+        unpickled before.
+        """
+        codegen, on_error, kwargs = self._spec
+        return _compile_cached, (self.into, codegen, on_error, tuple(kwargs.items()))
+
+    def _construct_once(self, *values: Any) -> T:
+        self._construct = self._construct_again
+        return self.into(**dict(zip(self.paths, values)))
+
+    def _construct_again(self, *values: Any) -> T:
+        self._construct = constructor(self.into, list(self.paths))
+        return self._construct(*values)
+
+    def _values(self, __data: JSONStructure) -> List[Any]:
+        """Pluck the value of each path, walking any shared prefixes only once."""
+        try:
+            sources = self._trie.walk_all(__data)
+        except (LookupError, TypeError):
+            # Walk each path separately to get the same error as we would without the
+            # trie.
+            return [path.pluck(__data) for path in self.paths.values()]
+
+        paths = self.paths.values()
+        return [path.finish(source) for path, source in zip(paths, sources)]
+
+    def _values_traced(self, __data: JSONStructure) -> List[Any]:
+        return [path.pluck(__data) for path in self.paths.values()]
+
+    def _pluck_per_path(self, __data: JSONStructure) -> T:
+        return self._construct(*[path.pluck(__data) for path in self.paths.values()])
+
+    def _pluck_interpreted(self, __data: JSONStructure) -> T:
+        return self._construct(*self._values(__data))
+
+    def _pluck_traced(self, __data: JSONStructure) -> T:
+        values = [path.pluck(__data) for path in self.paths.values()]
+
+        with trace.span("construct", self.into.__qualname__):
+            return self._construct(*values)
+
+    def _collect(self, __data: JSONStructure, stop: bool) -> List[FieldError]:
+        """
+        Pluck each path separately, returning an error for each one that fails.
+
+        With `stop`, only the first error is returned.
+        """
+        errors = []
+
+        for attr, path in self.paths.items():
+            try:
+                path.pluck(__data)
+            except (PluckError, ExtractError) as exc:
+                errors.append(_field_error(attr, path, exc))
+                if stop:
+                    break
+
+        return errors
+
+    def _pluck_collecting(
+        self, __pluck: Callable[[Any], T], __data: JSONStructure
+    ) -> T:
+        try:
+            return __pluck(__data)
+        except (PluckError, ExtractError):
+            errors = self._collect(__data, stop=False)
+            if not errors:
+                raise
+
+        raise PluckErrors(errors)
+
+    def pluck(self, __data: JSONStructure) -> T:
+        """Pluck `__data` into this plucker's dataclass."""
+        if trace.hook is not None:
+            return self._traced(__data)
+
+        return self._pluck(__data)
+
+    def pluck_lazy(self, __data: JSONStructure) -> T:
+        """
+        Pluck `__data` lazily, deferring the work for each field until it is read.
+
+        The result is an instance of a generated subclass of this plucker's dataclass
+        which compares equal to an eagerly plucked instance.  Errors in the input are
+        only raised when the bad field is read.  See `plucker.lazy` for details.
+        """
+        if self._lazy_class is None:
+            self._lazy_class = lazy_class(self)
+        return make_lazy(self._lazy_class, __data)
+
+    def pluck_bytes(self, __raw: Buffer) -> T:
+        """
+        Pluck the JSON document `__raw`, which can be `bytes` or a `memoryview`.
+
+        This gives the same result as `pluck(json.loads(__raw))`, but only the values
+        the paths reach are decoded; the rest are skipped over in place.  See
+        `plucker.stream.parse_bytes()` for details.
+        """
+        if self._pruned is None:
+            self._pruned = _prune_tree(self)
+        return self.pluck(parse_bytes(__raw, self._pruned))
+
+    def pluck_parallel(
+        self,
+        __data: JSONStructure,
+        executor: Executor,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> T:
+        """
+        Pluck `__data`, finishing each path, and long lists in chunks, on `executor`.
+
+        Each `chunk_size` items of a long list are finished separately.  The result, or
+        error, is the same as `pluck()`'s.  Use the same executor for every call, e.g.
+        one from `plucker.parallel.default_executor()`: starting a process pool for
+        each call is slower than plucking without one.  See `plucker.parallel` for
+        details.
+        """
+        if trace.hook is not None:
+            return self.pluck(__data)
+        return pluck_concurrently(__data, self, executor, chunk_size)
+
+    def pluck_many(self, __rows: Iterable[JSONStructure]) -> List[T]:
+        """Pluck each of `__rows` into this plucker's dataclass."""
+        pluck = self._pluck if trace.hook is None else self._traced
+        return [pluck(row) for row in __rows]
+
+    def pluck_batch(self, __rows: Iterable[JSONStructure]) -> Batch[T]:
+        """
+        Pluck each of `__rows`, returning the errors in bad rows rather than raising.
+
+        Each bad row gets a list of `FieldError`s, returned alongside the good rows:
+        one for every bad field with `on_error="collect"`, otherwise just the first.
+        """
+        pluck = self._pluck if trace.hook is None else self._traced
+        values = []
+        errors = {}
+
+        for idx, row in enumerate(__rows):
+            try:
+                values.append(pluck(row))
+            except PluckErrors as exc:
+                errors[idx] = exc.errors
+            except (PluckError, ExtractError) as exc:
+                # Find out which field it was.
+                first = self._collect(row, stop=True)
+                errors[idx] = first or [FieldError((), error=exc)]
+
+        return Batch(values, errors)
+
+    def pluck_columns(self, __rows: Iterable[JSONStructure]) -> Dict[str, List[Any]]:
+        """
+        Pluck each of `__rows`, returning a list of values for each field.
+
+        No dataclass instances are constructed, so the paths passed to `compile()`
+        can cover just the fields you need.
+        """
+        columns: List[List[Any]] = [[] for _ in self.paths]
+        appends = [column.append for column in columns]
+        values = self._values if trace.hook is None else self._values_traced
+
+        for row in __rows:
+            for append, value in zip(appends, values(row)):
+                append(value)
+
+        return dict(zip(self.paths, columns))
+
+    def pluck_arrays(
+        self, __rows: Iterable[JSONStructure], *, numpy: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Pluck each of `__rows` into typed columns, one per field.
+
+        `int` and `float` fields are returned as `array.array`s and `List[int]` and
+        `List[float]` fields as `ListColumn`s, with every record's values in one
+        contiguous buffer.  With `numpy=True` these are NumPy arrays instead.  Other
+        fields are returned as lists.  See `plucker.columns` for details.
+        """
+        return _pluck_arrays(__rows, self, numpy=numpy)
+
+    async def apluck(
+        self, __data: aio.AsyncSource, *, concurrency: int = aio.DEFAULT_CONCURRENCY
+    ) -> T:
+        """
+        Pluck `__data`, awaiting any mappers that return awaitables.
+
+        Fields, and the items of lists, are mapped concurrently, with at most
+        `concurrency` mappers awaited at once.  `__data` can also be an async
+        iterable of bytes, which is decoded as it arrives.  See `plucker.aio` for
+        details.
+        """
+        return await aio.apluck(__data, self, concurrency=concurrency)
+
+    async def apluck_many(
+        self,
+        __rows: Union[Iterable[JSONStructure], AsyncIterable[JSONStructure]],
+        *,
+        concurrency: int = aio.DEFAULT_CONCURRENCY,
+    ) -> List[T]:
+        """Pluck each of `__rows` (which can be an async iterable) like `apluck()`."""
+        return await aio.apluck_many(__rows, self, concurrency=concurrency)
+
+    def apluck_stream(
+        self,
+        __source: AsyncIterable[Chunk],
+        __items: str,
+        *,
+        concurrency: int = aio.DEFAULT_CONCURRENCY,
+    ) -> AsyncIterator[T]:
+        """
+        Like `pluck_stream()`, for an async iterable of bytes.
+
+        Each item is plucked as `apluck()` does, awaiting any async mappers.
+        """
+        return aio.apluck_items(__source, __items, self, concurrency=concurrency)
+
+    def pluck_stream(self, __source: Source, __items: str) -> Iterator[T]:
+        """
+        Pluck each item of the array at path `__items` in the JSON input `__source`.
+
+        The input is read incrementally and each item is yielded as soon as it has
+        been read, so the whole document is never held in memory.  See
+        `plucker.stream` for details.
+        """
+        return pluck_items(__source, __items, self)
+
+    def pluck_ndjson(self, __source: NDJSONSource, *, workers: int = 0) -> Iterator[T]:
+        """
+        Pluck each line of the newline-delimited JSON `__source`.
+
+        `__source` can be a filename or a file.  With `workers` > 0, lines are plucked
+        in a pool of that many processes.  See `plucker.ndjson` for details.
+        """
+        return pluck_lines(__source, self, workers=workers)
+
+
+def compile(
+    __into: Type[T], *, codegen: bool = False, on_error: str = "raise", **kwargs: Path
+) -> Plucker[T]:
+    """
+    Compile a set of paths specified using kwargs for repeated plucking into `__into`.
+
+    `on_error` is `"raise"` to raise an error for the first bad field found, or
+    `"collect"` to find every bad field and raise them together as `PluckErrors`.
+    `codegen` and `on_error` are reserved as keywords and so can't be used as field
+    names.
+    """
+    return Plucker(__into, codegen=codegen, on_error=on_error, **kwargs)
+
+
+# A spec for `Plucker`: its dataclass, `codegen`, `on_error` and paths.
+_Spec = Tuple[type, bool, str, Tuple[Tuple[str, Path], ...]]
+
+
+class _SpecKey:
+    """A spec for `Plucker`, to key a cache with, which is only hashed once."""
+
+    __slots__ = ("spec", "hash")
+
+    def __init__(self, spec: _Spec):
+        """Key a cache with `spec`, hashed using the hashes of its paths."""
+        self.spec = spec
+        into, codegen, on_error, paths = spec
+        hashes = tuple([(attr, path._hash) for attr, path in paths])
+        self.hash = hash((into, codegen, on_error, hashes))
+
+    def __hash__(self) -> int:
+        """Return the hash of the spec."""
+        return self.hash
+
+    def __eq__(self, other: Any) -> bool:
+        """Compare the specs."""
+        return isinstance(other, _SpecKey) and self.spec == other.spec
+
+
+_CACHE_SIZE = 256
+
+# Pluckers compiled for specs that have been used more than once (with the key they
+# are cached with, so that they can be moved to the end without comparing specs), and
+# specs that have only been used once so far, each least recently used first.  A spec
+# is only compiled and cached the second time it's used, so that specs that never
+# compare equal to an earlier one (`map()` with a lambda made anew on each call, say,
+# as mappers compare by identity) don't push the ones that are reused out.
+_pluckers: "OrderedDict[_SpecKey, Tuple[_SpecKey, Plucker[Any]]]" = OrderedDict()
+_used_once: "OrderedDict[_SpecKey, None]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache(key: _SpecKey) -> "Plucker[Any]":
+    """Compile the spec `key`, and cache it unless another thread just did."""
+    into, codegen, on_error, paths = key.spec
+    plucker: Plucker[Any] = Plucker(
+        into, codegen=codegen, on_error=on_error, **dict(paths)
+    )
+
+    with _cache_lock:
+        key, plucker = _pluckers.setdefault(key, (key, plucker))
+        _pluckers.move_to_end(key)
+        if len(_pluckers) > _CACHE_SIZE:
+            _pluckers.popitem(last=False)
+    return plucker
+
+
+def _cached(key: _SpecKey) -> "Optional[Plucker[Any]]":
+    """Return the cached `Plucker` for the spec `key`, if there is one."""
+    with _cache_lock:
+        cached = _pluckers.get(key)
+        if cached is None:
+            return None
+        _pluckers.move_to_end(cached[0])
+        return cached[1]
+
+
+def _compile_cached(
+    into: type, codegen: bool, on_error: str, paths: Tuple[Tuple[str, Path], ...]
+) -> "Plucker[Any]":
+    """Return the cached `Plucker` for a spec, compiling and caching it if need be."""
+    key = _SpecKey((into, codegen, on_error, paths))
+    plucker = _cached(key)
+    return plucker if plucker is not None else _cache(key)
+
+
+def _reused(
+    __into: Type[T], kwargs: Mapping[str, Path], codegen: bool, on_error: str
+) -> Optional[Plucker[T]]:
+    """
+    Return the cached `Plucker` for a spec that has been used before, or None.
+
+    Paths are immutable, and so safe to key the cache with.  While tracing, nothing is
+    reused, so that the tokenise steps are reported.
+    """
+    if trace.hook is not None:
+        return None
+
+    key = _SpecKey((__into, codegen, on_error, tuple(kwargs.items())))
+    plucker = _cached(key)
+    if plucker is not None:
+        return plucker
+
+    with _cache_lock:
+        if _used_once.pop(key, MISSING) is MISSING:
+            _used_once[key] = None
+            if len(_used_once) > _CACHE_SIZE:
+                _used_once.popitem(last=False)
+            return None
+
+    return _cache(key)
+
+
+def _compiled(
+    __into: Type[T],
+    kwargs: Mapping[str, Path],
+    codegen: bool = False,
+    on_error: str = "raise",
+) -> Plucker[T]:
+    """
+    Like `compile()`, but reusing the `Plucker` for a spec that has been used before.
+
+    This is so that the one-off functions below don't recompile on every call.
+    """
+    plucker = _reused(__into, kwargs, codegen, on_error)
+    if plucker is None:
+        plucker = Plucker(__into, codegen=codegen, on_error=on_error, **kwargs)
+    return plucker
+
+
+def _pluck_once(
+    __data: JSONStructure, __into: Type[T], kwargs: Mapping[str, Path]
+) -> T:
+    """
+    Pluck `__data` as `Plucker(__into, **kwargs).pluck()` would, without compiling.
+
+    Only the paths are compiled, and plucked one by one.  For a spec that may never be
+    used again, this is quicker than compiling it.
+    """
     if not is_dataclass(__into):
         raise ValueError("__into must be a dataclass")
 
-    attrs = {}
-    for attr, path in kwargs.items():
-        type_of_attr = __into.__annotations__[attr]
-        attrs[attr] = path._pluck(__data, type_of_attr)
+    types = field_types(__into)
+    attrs = {
+        attr: path._compile(types[attr], False).pluck(__data)
+        for attr, path in kwargs.items()
+    }
+    return __into(**attrs)
+
+
+def pluck(
+    __data: JSONStructure,
+    __into: Type[T],
+    *,
+    lazy: bool = False,
+    **kwargs: Path,
+) -> T:
+    """
+    Pluck a set of data specified using kwargs into `__into` using `__data` as input.
+
+    With `lazy=True`, each field is only plucked when it is first read; see
+    `Plucker.pluck_lazy()`.  `lazy` is reserved as a keyword and so can't be used as
+    a field name.
+    """
+    plucker = _reused(__into, kwargs, False, "raise")
+    if plucker is None and not lazy and trace.hook is None:
+        return _pluck_once(__data, __into, kwargs)
+    elif plucker is None:
+        plucker = compile(__into, codegen=False, on_error="raise", **kwargs)
+
+    return plucker.pluck_lazy(__data) if lazy else plucker.pluck(__data)
+
+
+def pluck_bytes(
+    __raw: Buffer,
+    __into: Type[T],
+    *,
+    codegen: bool = False,
+    **kwargs: Path,
+) -> T:
+    """
+    Pluck the JSON document `__raw` into `__into`.
+
+    Only the values the paths in kwargs reach are decoded.  See
+    `Plucker.pluck_bytes()`.
+    """
+    return _compiled(__into, kwargs, codegen).pluck_bytes(__raw)
+
+
+async def apluck(
+    __data: aio.AsyncSource,
+    __into: Type[T],
+    *,
+    concurrency: int = aio.DEFAULT_CONCURRENCY,
+    **kwargs: Path,
+) -> T:
+    """
+    Pluck `__data` into `__into` like `pluck()`, awaiting any async mappers.
+
+    `__data` can also be an async iterable of bytes, e.g. an HTTP response body.
+    `concurrency` limits how many mappers are awaited at once, and is reserved as a
+    keyword and so can't be used as a field name.
+    """
+    return await _compiled(__into, kwargs).apluck(__data, concurrency=concurrency)
+
+
+async def apluck_many(
+    __rows: Union[Iterable[JSONStructure], AsyncIterable[JSONStructure]],
+    __into: Type[T],
+    *,
+    concurrency: int = aio.DEFAULT_CONCURRENCY,
+    **kwargs: Path,
+) -> List[T]:
+    """Pluck each of `__rows` (which can be an async iterable) like `apluck()`."""
+    plucker = _compiled(__into, kwargs)
+    return await plucker.apluck_many(__rows, concurrency=concurrency)
+
+
+def apluck_stream(
+    __source: AsyncIterable[Chunk],
+    __items: str,
+    __into: Type[T],
+    *,
+    concurrency: int = aio.DEFAULT_CONCURRENCY,
+    **kwargs: Path,
+) -> AsyncIterator[T]:
+    """
+    Pluck each item of the array at path `__items` in the async byte stream `__source`.
+
+    Like `pluck_stream()`, but awaiting any async mappers.
+    """
+    plucker = _compiled(__into, kwargs)
+    return plucker.apluck_stream(__source, __items, concurrency=concurrency)
+
+
+def pluck_many(
+    __rows: Iterable[JSONStructure],
+    __into: Type[T],
+    *,
+    codegen: bool = False,
+    **kwargs: Path,
+) -> List[T]:
+    """Pluck each of `__rows` into `__into`, compiling the paths given in kwargs once."""
+    return _compiled(__into, kwargs, codegen).pluck_many(__rows)
+
+
+def pluck_batch(
+    __rows: Iterable[JSONStructure],
+    __into: Type[T],
+    *,
+    on_error: str = "raise",
+    codegen: bool = False,
+    **kwargs: Path,
+) -> Batch[T]:
+    """
+    Pluck each of `__rows` into `__into`, returning any errors rather than raising.
+
+    The errors are returned alongside the good rows.  See `Plucker.pluck_batch()`.
+    """
+    plucker = _compiled(__into, kwargs, codegen, on_error)
+    return plucker.pluck_batch(__rows)
+
+
+def pluck_columns(
+    __rows: Iterable[JSONStructure],
+    __into: Type[T],
+    *,
+    codegen: bool = False,
+    **kwargs: Path,
+) -> Dict[str, List[Any]]:
+    """
+    Pluck each of `__rows`, returning a list of values for each field in kwargs.
+
+    `__into` is only used for the types of its fields; no instances are constructed.
+    """
+    return _compiled(__into, kwargs, codegen).pluck_columns(__rows)
+
+
+def pluck_arrays(
+    __rows: Iterable[JSONStructure],
+    __into: Type[T],
+    *,
+    numpy: bool = False,
+    codegen: bool = False,
+    **kwargs: Path,
+) -> Dict[str, Any]:
+    """
+    Pluck each of `__rows` into typed columns, one per field in kwargs.
+
+    See `Plucker.pluck_arrays()`.  `numpy` is reserved as a keyword and so can't be
+    used as a field name.
+    """
+    return _compiled(__into, kwargs, codegen).pluck_arrays(__rows, numpy=numpy)
+
+
+def pluck_stream(
+    __source: Source,
+    __items: str,
+    __into: Type[T],
+    *,
+    codegen: bool = False,
+    **kwargs: Path,
+) -> Iterator[T]:
+    """
+    Pluck each item of the array at path `__items` in the JSON input `__source`.
+
+    `__source` can be a file (opened in text or binary mode), a string or bytes, or an
+    iterable of strings or bytes, and is read incrementally.
+    """
+    return _compiled(__into, kwargs, codegen).pluck_stream(__source, __items)
+
+
+def pluck_parallel(
+    __data: JSONStructure,
+    __into: Type[T],
+    *,
+    executor: Executor,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    codegen: bool = False,
+    **kwargs: Path,
+) -> T:
+    """
+    Pluck `__data` into `__into`, finishing paths and long lists on `executor`.
+
+    See `Plucker.pluck_parallel()`.  With a process pool, `__into` and any mappers need
+    to be picklable.  `executor` and `chunk_size` are reserved as keywords and so can't
+    be used as field names.
+    """
+    plucker = _compiled(__into, kwargs, codegen)
+    return plucker.pluck_parallel(__data, executor, chunk_size=chunk_size)
+
 
-    print(attrs)
+def pluck_ndjson(
+    __source: NDJSONSource,
+    __into: Type[T],
+    *,
+    workers: int = 0,
+    codegen: bool = False,
+    **kwargs: Path,
+) -> Iterator[T]:
+    """
+    Pluck each line of the newline-delimited JSON `__source` into `__into`.
 
-    return __into(**attrs)  # type: ignore[call-arg]
+    `__source` can be a filename or a file.  With `workers` > 0, lines are plucked in
+    a pool of that many processes, in which case `__into` and any mappers need to be
+    picklable.  Errors have their `line` set to the line number of the bad record.
+    """
+    plucker = _compiled(__into, kwargs, codegen)
+    return plucker.pluck_ndjson(__source, workers=workers)
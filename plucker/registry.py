@@ -0,0 +1,147 @@
+"""
+Declare specs once, next to their dataclasses, and compile them when they're needed.
+
+A `Registry` holds the spec for each of a set of dataclasses:
+
+    @spec(sender=Path(".from"), ids=Path(".who[].id"))
+    @dataclass
+    class Message:
+        sender: str
+        ids: List[int]
+
+    message = plucker_for(Message).pluck(data)
+
+Declaring a spec only records its paths, so a module full of them is quick to
+import, and each spec is compiled the first time it's used.
+
+A server that forks its workers can instead call `warm_up()` before forking, which
+compiles every spec up front.  The workers then start with every `Plucker` ready,
+sharing the parent's copy of them (until they write to the memory holding them)
+rather than each compiling its own.  With `freeze=True`, `warm_up()` also calls
+`gc.freeze()`, so that the garbage collector in each worker doesn't touch (and so
+copy) every page holding the compiled objects when it runs.
+
+`spec()`, `warm_up()` and `plucker_for()` use the registry `default_registry`;
+create a `Registry` of your own to keep a set of specs separate, or to keep their
+compiled plans on disk with a `PlanCache` (see `plucker.plans`).
+"""
+import gc
+import threading
+from dataclasses import is_dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Type, TypeVar
+
+from .plans import PlanCache
+from .plucker import compile, ON_ERROR, Path, Plucker
+from .types import JSONStructure
+
+T = TypeVar("T")
+
+_Spec = Tuple[bool, str, Dict[str, Path]]
+
+
+class Registry:
+    """The specs of a set of dataclasses, each compiled into a `Plucker` on first use."""
+
+    def __init__(self, plans: Optional[PlanCache] = None):
+        """Make an empty registry, which loads and saves plans in `plans` if given."""
+        self.plans = plans
+        self._specs: Dict[type, _Spec] = {}
+        self._pluckers: Dict[type, Plucker[Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        __into: type,
+        *,
+        codegen: bool = False,
+        on_error: str = "raise",
+        **kwargs: Path,
+    ) -> None:
+        """
+        Record the spec for plucking into `__into`.
+
+        It's compiled as by `compile()` when it's first used.  Each dataclass can
+        only be registered once.
+        """
+        if not is_dataclass(__into):
+            raise ValueError("__into must be a dataclass")
+        if on_error not in ON_ERROR:
+            raise ValueError(f"on_error should be one of {', '.join(ON_ERROR)}")
+
+        with self._lock:
+            if __into in self._specs:
+                raise ValueError(f"{__into.__qualname__} is already registered")
+            self._specs[__into] = (codegen, on_error, kwargs)
+
+    def spec(
+        self, *, codegen: bool = False, on_error: str = "raise", **kwargs: Path
+    ) -> Callable[[Type[T]], Type[T]]:
+        """
+        Register the dataclass this decorates with the spec `kwargs`.
+
+        The decorator must be applied after (above) `@dataclass`.
+        """
+
+        def register(cls: Type[T]) -> Type[T]:
+            self.register(cls, codegen=codegen, on_error=on_error, **kwargs)
+            return cls
+
+        return register
+
+    def plucker_for(self, __into: Type[T]) -> Plucker[T]:
+        """Return the `Plucker` for `__into`, compiling its spec if need be."""
+        try:
+            return self._pluckers[__into]
+        except KeyError:
+            pass
+
+        with self._lock:
+            # Another thread may have compiled it while we waited for the lock.
+            if __into not in self._pluckers:
+                try:
+                    codegen, on_error, kwargs = self._specs[__into]
+                except KeyError:
+                    raise KeyError(f"{__into.__qualname__} isn't registered") from None
+                build = compile if self.plans is None else self.plans.compile
+                self._pluckers[__into] = build(
+                    __into, codegen=codegen, on_error=on_error, **kwargs
+                )
+
+            return self._pluckers[__into]
+
+    def pluck(self, __data: JSONStructure, __into: Type[T]) -> T:
+        """Pluck `__data` into `__into` using its registered spec."""
+        return self.plucker_for(__into).pluck(__data)
+
+    def warm_up(self, *, freeze: bool = False) -> None:
+        """
+        Compile every registered spec that hasn't been already, e.g. before forking.
+
+        With `freeze`, also move every object tracked by the garbage collector into
+        its permanent generation, so that it is never examined again.
+        """
+        for into in list(self._specs):
+            self.plucker_for(into)
+
+        if freeze:
+            gc.freeze()
+
+    def __contains__(self, __into: Any) -> bool:
+        """Return whether `__into` is registered."""
+        return __into in self._specs
+
+    def __iter__(self) -> Iterator[type]:
+        """Iterate over the registered dataclasses, in order of registration."""
+        return iter(list(self._specs))
+
+    def __len__(self) -> int:
+        """Return the number of registered dataclasses."""
+        return len(self._specs)
+
+
+# The registry used by the functions below.
+default_registry = Registry()
+
+spec = default_registry.spec
+plucker_for = default_registry.plucker_for
+warm_up = default_registry.warm_up
@@ -0,0 +1,651 @@
+"""
+Pluck from JSON input incrementally, without parsing the whole document first.
+
+The scanner here reads its input a chunk at a time and only ever materialises the
+parts of the document that the compiled paths will look at.  Everything else is
+skipped by matching up quotes and brackets, without building any Python objects.
+
+Given a path to an array, e.g. `.results[]`, each element of the array is pruned
+down to the subtrees that the plucker's paths reach and plucked as soon as it has
+been read, so memory use is bounded by the size of one (pruned) element rather than
+the size of the document.
+
+A whole document that is already in memory as bytes is scanned in place instead, by
+`parse_bytes()`, which can skip values much faster than the chunked scanner.
+"""
+import codecs
+import json
+import re
+import sys
+from json.decoder import scanstring  # type: ignore[attr-defined]
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    TypeVar,
+    Union,
+    TYPE_CHECKING,
+)
+
+from .exceptions import ExtractError
+from .extractor import _get_from_path
+from .tokeniser import (
+    tokenise,
+    Token,
+    Tokens,
+    ArrayToken,
+    NameToken,
+    IndexToken,
+    SliceToken,
+    FilterToken,
+    MAPPING_TOKENS,
+)
+
+if TYPE_CHECKING:
+    from .plucker import Plucker
+
+T = TypeVar("T")
+
+CHUNK_SIZE = 64 * 1024
+
+Chunk = Union[str, bytes, bytearray, memoryview]
+Source = Union[Chunk, Iterable[Chunk], Any]
+Buffer = Union[bytes, bytearray, memoryview]
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRUCTURAL = re.compile(r'(")|([\[{])|[\]}]')
+_STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SCALAR = re.compile(r"[^ \t\n\r,\]}]+")
+
+
+# Pruning
+# -------
+#
+# We work out which parts of each element we need by merging the token lists of all
+# the plucker's paths into a tree.
+
+
+class _Node:
+    """The parts of a value that need to be kept."""
+
+    def __init__(self) -> None:
+        self.names: Dict[str, _Node] = {}
+        self.array: Optional[_Node] = None
+        self.keep = False
+
+    def items(self) -> "_Node":
+        if self.array is None:
+            self.array = _Node()
+        return self.array
+
+    def child(self, token: Token) -> Optional["_Node"]:
+        """
+        Return the node for the parts of this value that `token` leads to.
+
+        Returns None if we can't tell, and so have to keep the whole value.
+        """
+        if isinstance(token, NameToken):
+            return self.names.setdefault(token.name, _Node())
+        elif isinstance(token, (ArrayToken, IndexToken, SliceToken)):
+            # We don't prune away the items an index or slice skips, but they are at
+            # least pruned down like the rest.
+            return self.items()
+        elif isinstance(token, FilterToken):
+            # We need whatever the filter compares as well.
+            items = self.items()
+            if token.name is None:
+                items.keep = True
+            else:
+                items.names.setdefault(token.name, _Node()).keep = True
+            return items
+        else:
+            self.keep = True
+            return None
+
+
+def _end(node: _Node, tokens: Tokens) -> Optional[_Node]:
+    """Follow `tokens` from `node`, unless they lead to a value we have to keep."""
+    for token in tokens:
+        child = node.child(token)
+        if child is None:
+            return None
+        node = child
+
+    return node
+
+
+def _prune_tree(plucker: "Plucker[Any]", node: Optional[_Node] = None) -> _Node:
+    """Build a tree of the parts of its input that `plucker` needs."""
+    node = node or _Node()
+
+    for path in plucker.paths.values():
+        end = _end(node, path.tokens)
+        if end is None:
+            continue
+
+        # `into()` plucks each item of the extracted value, which is the value at the
+        # end of the path if the path goes through one array, or the items of that
+        # value if it doesn't.  Anything more complicated, we just keep the lot.
+        arrays = sum(isinstance(token, MAPPING_TOKENS) for token in path.tokens)
+        if path.into is None or arrays > 1:
+            end.keep = True
+        elif arrays == 1:
+            _prune_tree(path.into, end)
+        else:
+            _prune_tree(path.into, end.items())
+
+    return node
+
+
+# Scanning
+# --------
+
+
+def _chunks(source: Source) -> Iterator[str]:
+    """Turn a file, string, bytes or iterable of these into an iterator of strings."""
+    if isinstance(source, (str, bytes, bytearray, memoryview)):
+        chunks: Iterable[Chunk] = [source]
+    elif hasattr(source, "read"):
+        chunks = iter(lambda: source.read(CHUNK_SIZE), source.read(0))
+    else:
+        chunks = source
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+        else:
+            yield decoder.decode(chunk)
+
+    yield decoder.decode(b"", final=True)
+
+
+class _Scanner:
+    """
+    A JSON scanner over a sequence of chunks of text.
+
+    The scanner keeps a buffer of text from the current position onwards (or from
+    `mark`, if we are capturing a value) and reads more from `chunks` as needed.
+    """
+
+    # Patterns over `str` here, and over `bytes` in `_BufferScanner`.
+    _whitespace: "re.Pattern[Any]" = _WHITESPACE
+    _structural: "re.Pattern[Any]" = _STRUCTURAL
+    _string_rest: "re.Pattern[Any]" = _STRING_REST
+    _scalar: "re.Pattern[Any]" = _SCALAR
+
+    def __init__(self, chunks: Iterator[str]):
+        self.chunks = chunks
+        self.buf = ""
+        self.pos = 0
+        self.mark: Optional[int] = None
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.buf, self.pos)
+
+    def _more(self) -> bool:
+        """Read more input, dropping any text we no longer need."""
+        for chunk in self.chunks:
+            if chunk:
+                break
+        else:
+            return False
+
+        keep = self.pos if self.mark is None else self.mark
+        self.buf = self.buf[keep:] + chunk
+        self.pos -= keep
+        if self.mark is not None:
+            self.mark -= keep
+
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace, returning the next character or '' at the end of input."""
+        while True:
+            self.pos = self._whitespace.match(self.buf, self.pos).end()  # type: ignore
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            elif not self._more():
+                return ""
+
+    def expect(self, ch: str):
+        if self.peek() != ch:
+            raise self._error(f"Expecting {ch!r}")
+        self.pos += 1
+
+    def _skip_string(self) -> None:
+        while True:
+            match = self._string_rest.match(self.buf, self.pos + 1)
+            if match:
+                self.pos = match.end()
+                return
+            elif not self._more():
+                raise self._error("Unterminated string")
+
+    def _skip_scalar(self) -> None:
+        while True:
+            match = self._scalar.match(self.buf, self.pos)
+            if match is None:
+                raise self._error("Expecting value")
+            elif match.end() < len(self.buf) or not self._more():
+                self.pos = match.end()
+                return
+
+    def _skip_container(self) -> None:
+        depth = 0
+
+        while True:
+            match = self._structural.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self._more():
+                    raise self._error("Unterminated container")
+                continue
+
+            self.pos = match.start()
+            if match.lastindex == 1:
+                self._skip_string()
+                continue
+
+            self.pos += 1
+            depth += 1 if match.lastindex == 2 else -1
+            if depth == 0:
+                return
+
+    def skip_value(self) -> None:
+        """Move past the next value without decoding it."""
+        ch = self.peek()
+        if ch == '"':
+            self._skip_string()
+        elif ch == "{" or ch == "[":
+            self._skip_container()
+        elif ch == "":
+            raise self._error("Expecting value")
+        else:
+            self._skip_scalar()
+
+    def capture_value(self) -> Any:
+        """Decode the next value."""
+        self.peek()
+        self.mark = self.pos
+        self.skip_value()
+        start, self.mark = self.mark, None
+
+        return self._decode(start, self.pos)
+
+    def _decode(self, start: int, end: int) -> Any:
+        """Decode the value between `start` and `end`."""
+        return json.loads(self.buf[start:end])
+
+    def _string(self, start: int) -> str:
+        """Decode the string starting at `start`."""
+        return scanstring(self.buf, start + 1)[0]
+
+    def _key(self) -> str:
+        if self.peek() != '"':
+            raise self._error("Expecting property name enclosed in double quotes")
+
+        self.mark = self.pos
+        self._skip_string()
+        key = self._string(self.mark)
+        self.mark = None
+
+        self.expect(":")
+        return key
+
+    def iter_object(self) -> Iterator[str]:
+        """Iterate over the keys of an object.  The caller must consume each value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+
+        while True:
+            yield self._key()
+
+            ch = self.peek()
+            self.pos += 1
+            if ch == "}":
+                return
+            elif ch != ",":
+                raise self._error("Expecting ',' delimiter")
+
+    def iter_array(self) -> Iterator[None]:
+        """Iterate over the items of an array.  The caller must consume each item."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+
+        while True:
+            yield None
+
+            ch = self.peek()
+            self.pos += 1
+            if ch == "]":
+                return
+            elif ch != ",":
+                raise self._error("Expecting ',' delimiter")
+
+    def parse(self, node: _Node) -> Any:
+        """Decode the next value, keeping only the parts described by `node`."""
+        ch = self.peek()
+
+        if ch == "{" and node.names and not node.keep:
+            obj = {}
+            for key in self.iter_object():
+                child = node.names.get(key)
+                if child is None:
+                    self.skip_value()
+                else:
+                    obj[key] = self.parse(child)
+            return obj
+
+        elif ch == "[" and node.array is not None and not node.keep:
+            return [self.parse(node.array) for _ in self.iter_array()]
+
+        else:
+            return self.capture_value()
+
+
+# Scanning bytes
+# --------------
+#
+# A whole document held as bytes lets us skip values much faster than a character at
+# a time, using bytes methods, which run at C speed.
+#
+# Strings are skipped by searching for the next quote.  Large containers are skipped
+# using a "skeleton" of the document: the document with everything but quotes and
+# brackets deleted, which is typically a tenth of the size, or if no strings contain
+# brackets, with only the brackets.  A regular expression finds the end of the
+# container in the skeleton, and we count our way back to the corresponding position
+# in the document.
+
+_NOT_STRUCTURAL = bytes(byte for byte in range(256) if byte not in b'"[]{}')
+_BRACKETS = [b"[", b"]", b"{", b"}"]
+
+# Where supported, possessive repeats stop the regular expression below saving a
+# backtracking point for every item in a container.
+_REPEAT = rb"*+" if sys.version_info >= (3, 11) else rb"*"
+
+# Skip containers with up to this many quotes and brackets one at a time, and any
+# bigger than that using the skeleton.
+SKELETON_THRESHOLD = 64
+
+
+def _container_pattern(depth: int) -> "re.Pattern[bytes]":
+    """Match a container nested up to `depth` deep in a skeleton."""
+    content = rb'(?:"[^"]*")' + _REPEAT
+    for _ in range(depth - 1):
+        content = rb'(?:"[^"]*"|[\[{]' + content + rb"[\]}])" + _REPEAT
+    return re.compile(rb"[\[{]" + content + rb"[\]}]")
+
+
+class _BufferScanner(_Scanner):
+    """
+    A `_Scanner` over a whole document of UTF-8 bytes.
+
+    Values are sliced out of a `memoryview` of the document, so nothing is copied
+    until the values we keep are decoded.
+    """
+
+    _whitespace = re.compile(rb"[ \t\n\r]*")
+    _structural = re.compile(rb'(")|([\[{])|[\]}]')
+    _scalar = re.compile(rb"[^ \t\n\r,\]}]+")
+    _plain_string = re.compile(rb'"([^"\\\x00-\x1f]*)"')
+    _container = _container_pattern(16)
+
+    def __init__(self, data: Union[bytes, bytearray], pos: int = 0):
+        super().__init__(iter(()))
+        self.data = data
+        self.buf = memoryview(data)  # type: ignore[assignment]
+        self.pos = pos
+
+        # Built the first time a large container is skipped.
+        self._clean: Union[bytes, bytearray, None] = None
+        self._skeleton: Union[bytes, bytearray] = b""
+        self._counted = _BRACKETS
+
+        # A position in the document and the corresponding index in the skeleton.
+        # Scanning only moves forwards, so counting can always start from here.
+        self._cursor = (0, 0)
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        # Positions are in bytes rather than characters, but these errors are never
+        # seen: `parse_bytes()` falls back to `json.loads()` to report them.
+        doc = str(self.data, "utf-8", "replace")
+        return json.JSONDecodeError(message, doc, self.pos)
+
+    def peek(self) -> str:
+        self.pos = self._whitespace.match(self.buf, self.pos).end()  # type: ignore
+        if self.pos < len(self.data):
+            return chr(self.data[self.pos])
+        return ""
+
+    def _decode(self, start: int, end: int) -> Any:
+        return json.loads(str(self.buf[start:end], "utf-8"))  # type: ignore[call-overload]
+
+    def _string(self, start: int) -> str:
+        # Most keys have no escapes to decode.
+        match = self._plain_string.match(self.buf, start)  # type: ignore
+        if match is not None:
+            return str(match.group(1), "utf-8")
+        return self._decode(start, self.pos)
+
+    def _skip_string(self) -> None:
+        data = self.data
+        end = self.pos
+
+        while True:
+            end = data.find(b'"', end + 1)
+            if end < 0:
+                self.pos = len(data)
+                raise self._error("Unterminated string")
+
+            # The quote is escaped if it follows an odd number of backslashes.
+            before = end - 1
+            while data[before] == 92:
+                before -= 1
+            if (end - before) % 2:
+                self.pos = end + 1
+                return
+
+    def _skip_container(self) -> None:
+        start = self.pos
+        depth = 0
+
+        for _ in range(SKELETON_THRESHOLD):
+            match = self._structural.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.data)
+                raise self._error("Unterminated container")
+
+            self.pos = match.start()
+            if match.lastindex == 1:
+                self._skip_string()
+                continue
+
+            self.pos += 1
+            depth += 1 if match.lastindex == 2 else -1
+            if depth == 0:
+                return
+
+        self.pos = start
+        if not self._skip_by_skeleton():
+            # Too deeply nested, or invalid.
+            super()._skip_container()
+
+    def _skip_by_skeleton(self) -> bool:
+        """Skip the container at `pos` using the skeleton, if we can."""
+        if self._clean is None:
+            clean = self.data
+            if b"\\" in clean:
+                # Hide escaped quotes, having first hidden escaped backslashes so that
+                # in `\\"` the quote is still a quote.
+                clean = clean.replace(b"\\\\", b"__").replace(b'\\"', b"__")
+            self._clean = clean
+            self._skeleton = clean.translate(None, _NOT_STRUCTURAL)
+
+            # Removing pairs of adjacent quotes merges neighbouring strings and drops
+            # empty ones.  If that leaves no quotes, no string contains a bracket.
+            brackets = self._skeleton.replace(b'""', b"")
+            if b'"' in brackets:
+                self._counted = [b'"', *_BRACKETS]
+            else:
+                self._skeleton = brackets
+
+        clean, skeleton = self._clean, self._skeleton
+        at, index = self._cursor
+        start = self.pos
+        index += sum(clean.count(byte, at, start) for byte in self._counted)
+
+        match = self._container.match(skeleton, index)
+        if match is None:
+            return False
+
+        # The end is the nth occurrence of the closing bracket from the start.
+        last = match.end() - 1
+        bracket = skeleton[last : last + 1]
+        end = start
+        for _ in range(skeleton.count(bracket, index, last)):
+            end = clean.find(bracket, end + 1)
+        end = clean.find(bracket, end + 1)
+
+        self.pos = end + 1
+        self._cursor = (self.pos, match.end())
+        return True
+
+
+def _walk_object(scanner: _Scanner, head: NameToken, rest: Tokens) -> Iterator[None]:
+    """Walk the object at `scanner` to the values that `head` then `rest` lead to."""
+    found = False
+    for key in scanner.iter_object():
+        if key == head.name and not found:
+            found = True
+            yield from _walk(scanner, rest)
+        else:
+            scanner.skip_value()
+
+    if not found:
+        raise ExtractError(head, f"Expected field name {head.name} to exist")
+
+
+def _walk(scanner: _Scanner, tokens: Tokens) -> Iterator[None]:
+    """Position `scanner` at each of the values that `tokens` lead to, in turn."""
+    if not tokens:
+        yield None
+        return
+
+    head = tokens[0]
+    ch = scanner.peek()
+
+    if isinstance(head, NameToken) and ch == "{":
+        yield from _walk_object(scanner, head, tokens[1:])
+
+    elif isinstance(head, ArrayToken) and ch == "[":
+        for _ in scanner.iter_array():
+            yield from _walk(scanner, tokens[1:])
+
+    else:
+        # Decoding the value and trying to walk it gets us the usual error message.
+        _get_from_path(scanner.capture_value(), (head,))
+
+
+def _items_tokens(items: str) -> Tokens:
+    """Tokenise `items`, checking that it's a path that `_walk()` can follow."""
+    tokens = tokenise(items)
+    if not tokens or not isinstance(tokens[-1], ArrayToken):
+        raise ValueError("__items must be a path to the items of an array")
+    elif not all(isinstance(token, (NameToken, ArrayToken)) for token in tokens):
+        raise ValueError("__items can only contain names and []")
+
+    return tokens
+
+
+def parse_items(
+    __source: Source, __items: str, __plucker: "Plucker[Any]"
+) -> Iterator[Any]:
+    """
+    Decode each item of the array at path `__items` in `__source`.
+
+    Only the parts of each item that `__plucker` needs are kept.
+    """
+    tokens = _items_tokens(__items)
+    scanner = _Scanner(_chunks(__source))
+    tree = _prune_tree(__plucker)
+
+    try:
+        for _ in _walk(scanner, tokens):
+            yield scanner.parse(tree)
+    except ExtractError as exc:
+        if exc.path is None:
+            exc.path = __items
+        raise exc
+
+
+def parse_pruned(__source: Source, __plucker: "Plucker[Any]") -> Any:
+    """Decode `__source`, keeping only the parts that `__plucker` needs."""
+    return _Scanner(_chunks(__source)).parse(_prune_tree(__plucker))
+
+
+def parse_bytes(__raw: Buffer, __tree: _Node) -> Any:
+    """
+    Decode the JSON document `__raw`, keeping only the parts in `__tree`.
+
+    The result is the same as `json.loads(__raw)` pruned down to `__tree`.  Where
+    `__raw` is invalid, or not UTF-8, it is handed to `json.loads()` as a whole, so
+    that errors are the same too.  Values that aren't kept are only checked for
+    matching brackets and quotes, though, so invalid JSON or UTF-8 within them goes
+    unnoticed.
+
+    A `memoryview` is scanned in place if it covers the whole of a `bytes` or
+    `bytearray`, and otherwise copied once.
+    """
+    data: Union[bytes, bytearray]
+    if isinstance(__raw, memoryview):
+        whole = isinstance(__raw.obj, (bytes, bytearray)) and __raw.nbytes == len(
+            __raw.obj
+        )
+        data = __raw.obj if whole else __raw.tobytes()  # type: ignore[assignment]
+    else:
+        data = __raw
+
+    encoding = json.detect_encoding(data[:4])
+    if encoding not in ("utf-8", "utf-8-sig"):
+        return json.loads(data)
+
+    scanner = _BufferScanner(data, 3 if encoding == "utf-8-sig" else 0)
+    try:
+        value = scanner.parse(__tree)
+        if scanner.peek() == "":
+            return value
+    except ValueError:
+        # Includes `JSONDecodeError` and `UnicodeDecodeError`.
+        pass
+
+    # Raises the error `json.loads()` would, for both bad input and extra data.
+    return json.loads(data)
+
+
+def pluck_items(
+    __source: Source,
+    __items: str,
+    __plucker: "Plucker[T]",
+) -> Iterator[T]:
+    """
+    Pluck each item of the array at path `__items` in `__source` with `__plucker`.
+
+    `__source` can be a file (opened in text or binary mode), a string or bytes, or an
+    iterable of strings or bytes.  Bytes are decoded as UTF-8.
+    """
+    pluck = __plucker.pluck
+    for item in parse_items(__source, __items, __plucker):
+        try:
+            yield pluck(item)
+        except ExtractError as exc:
+            if exc.path is None:
+                exc.path = __items
+            raise exc
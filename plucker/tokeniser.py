@@ -1,12 +1,36 @@
-from typing import List, Union, Tuple, Optional
+from typing import Any, List, Sequence, Union, Tuple, Optional
+import json
 import re
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
 
+from . import trace
 
-@dataclass
-class Range:
+
+class _Record:
+    """
+    A base for ranges and tokens, which are immutable, hashable and slotted.
+
+    Being slotted, each takes up little more memory than a tuple of its fields.  The
+    slots must be declared by hand, since `@dataclass(slots=True)` needs Python
+    3.10, and in the same order as the fields.
+    """
+
+    __slots__: Tuple[str, ...] = ()
+
+    def __reduce__(self):
+        # Pickle by calling the class, since unpickling the slots one by one would
+        # run into the frozen dataclass's `__setattr__()`.
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+
+@dataclass(frozen=True)
+class Range(_Record):
     """A range specified as indexes from the beginning of some external referent."""
 
+    __slots__ = ("start", "end")
+
     start: int
     end: int
 
@@ -18,26 +42,125 @@ class Range:
 # Token types
 # -----------
 #
-# We only have to kinds of tokens at the moment that the tokeniser can emit: names and
-# arrays.  Each keeps its own location in the string as a Range.
+# Names and indexes pick out a single value.  Arrays, slices, wildcards and recursive
+# descent pick out a list of values, and the rest of the path is applied to each one.
+# Each token keeps its own location in the string as a Range.
+#
+# Tokens are immutable, so the tuple of tokens for a path can be cached and shared by
+# everything that uses the path, and hashed as part of a cache key.
 
 
-@dataclass
-class NameToken:
+@dataclass(frozen=True)
+class NameToken(_Record):
     """A token that indexes into a JSON object."""
 
+    __slots__ = ("location", "name")
+
     location: Range
     name: str
 
 
-@dataclass
-class ArrayToken:
+@dataclass(frozen=True)
+class ArrayToken(_Record):
     """A token that tells us we are mapping an array."""
 
+    __slots__ = ("location",)
+
+    location: Range
+
+
+@dataclass(frozen=True)
+class IndexToken(_Record):
+    """A token that picks one item out of an array, e.g. `[0]` or `[-1]`."""
+
+    __slots__ = ("location", "index")
+
+    location: Range
+    index: int
+
+
+@dataclass(frozen=True)
+class SliceToken(_Record):
+    """A token that tells us we are mapping part of an array, e.g. `[2:10]`."""
+
+    __slots__ = ("location", "start", "stop")
+
+    location: Range
+    start: Optional[int]
+    stop: Optional[int]
+
+
+@dataclass(frozen=True)
+class WildcardToken(_Record):
+    """A token that tells us we are mapping the values of a JSON object, i.e. `.*`."""
+
+    __slots__ = ("location",)
+
+    location: Range
+
+
+@dataclass(frozen=True)
+class DescendToken(_Record):
+    """
+    A token that tells us we are mapping every value with a given key, e.g. `..id`.
+
+    The values can be at any depth within the current value.
+    """
+
+    __slots__ = ("location", "name")
+
+    location: Range
+    name: str
+
+
+@dataclass(frozen=True, eq=False)
+class FilterToken(_Record):
+    """
+    A token that tells us we are mapping the items of an array that match a predicate.
+
+    In `[?type=="add"]`, `name` is the key to compare in each item, `type`.  It can
+    also be None (spelled `@`) to compare the item itself.  `op` is one of `==`, `!=`,
+    `<`, `<=`, `>` and `>=`, and `value` is a JSON string, number, boolean or null.
+    """
+
+    __slots__ = ("location", "name", "op", "value")
+
     location: Range
+    name: Optional[str]
+    op: str
+    value: Any
+
+    def _key(self) -> Tuple[Any, ...]:
+        # The type of the value is included since e.g. `1.00 == True`, but
+        # `[?n==1.00]` and `[?n==true]` are different filters.
+        return self.location, self.name, self.op, type(self.value), self.value
+
+    def __eq__(self, other: Any) -> bool:
+        """Compare filters by the type of their values, as well as the values."""
+        if type(other) is not FilterToken:
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        """Hash consistently with `__eq__()`."""
+        return hash(self._key())
+
+
+Token = Union[
+    NameToken,
+    ArrayToken,
+    IndexToken,
+    SliceToken,
+    WildcardToken,
+    DescendToken,
+    FilterToken,
+]
 
+# The tokens of a path, in order.
+Tokens = Tuple[Token, ...]
 
-Token = Union[NameToken, ArrayToken]
+# Tokens that pick out a list of values rather than a single one.
+MAPPING_TOKENS = (ArrayToken, SliceToken, WildcardToken, DescendToken, FilterToken)
 
 # Tokeniser errors
 # ----------------
@@ -62,152 +185,258 @@ class TokeniserError(ValueError):
             return f"{self.message} at index {idx}:\n" + f"{path}\n" + f"{' ' * idx}^"
 
 
-# State machine states
-# --------------------
+# Tokenising
+# ----------
+#
+# Paths are tokenised in a single pass.  Names, quoted names and the insides of
+# brackets are consumed whole using a regex, and everything else is a matter of
+# looking at one character, so there is no per-character allocation.  Results are
+# cached by path string, since the same paths tend to get tokenised over and over
+# again.
 #
-# We have a bunch of these.  A given state can store different information.
+# Names are interned, so that a name used by many paths (`payload`, `id`) is stored
+# once, and looking it up in a dict whose key is the same string object needn't
+# compare the characters.
 
+NAME = re.compile(r"[a-zA-Z_-]")
+NAME_RUN = re.compile(r"[a-zA-Z_-]+")
+QUOTED_NAME = re.compile(r'"(?:[^"\\]|\\.)*"')
+INDEX = re.compile(r"\[(-?[0-9]+)\]")
+SLICE = re.compile(r"\[(-?[0-9]*):(-?[0-9]*)\]")
+FILTER = re.compile(
+    r'\[\?\s*(@|[a-zA-Z_-]+|"(?:[^"\\]|\\.)*")'
+    r"\s*(==|!=|<=|>=|<|>)\s*"
+    r'("(?:[^"\\]|\\.)*"|[^\]\s]+)\s*\]'
+)
+
+
+def _error(message: str, path: str, idx: int) -> TokeniserError:
+    exc = TokeniserError(message)
+    exc.context = path, idx
+    return exc
+
+
+def _name(path: str, idx: int) -> Optional[Tuple[str, int]]:
+    """Read a plain or quoted name at `idx`, returning it and the index after it."""
+    match = NAME_RUN.match(path, idx)
+    if match:
+        return sys.intern(match.group()), match.end()
+
+    match = QUOTED_NAME.match(path, idx)
+    if match:
+        try:
+            return sys.intern(json.loads(match.group())), match.end()
+        except ValueError:
+            raise _error("Invalid escape in quoted name", path, idx) from None
+    elif path[idx : idx + 1] == '"':
+        raise _error("Unterminated quoted name", path, idx)
 
-@dataclass
-class StartState:
-    """Initial state.  Nothing has been parsed yet."""
+    return None
 
-    pass
 
+def _bracket(path: str, idx: int) -> Token:
+    """Read the `[...]` at `idx`."""
+    if path[idx + 1 : idx + 2] == "]":
+        return ArrayToken(Range(idx, idx + 2))
 
-@dataclass
-class SeparatorState:
-    """We have just parsed a dot ('.')."""
+    match = INDEX.match(path, idx)
+    if match:
+        return IndexToken(Range(idx, match.end()), int(match.group(1)))
 
-    first: bool
+    match = SLICE.match(path, idx)
+    if match:
+        start, stop = (int(n) if n else None for n in match.groups())
+        return SliceToken(Range(idx, match.end()), start, stop)
 
+    if path[idx + 1 : idx + 2] == "?":
+        return _filter(path, idx)
 
-@dataclass
-class NameState:
-    """We are parsing a name."""
+    raise _error(
+        "Array indicators should be spelled [], [n] or [start:stop]", path, idx + 1
+    )
 
-    captured: str
-    started_at: int
 
+def _filter(path: str, idx: int) -> FilterToken:
+    """Read the `[?...]` at `idx`."""
+    match = FILTER.match(path, idx)
+    if match is None:
+        raise _error('Filters should look like [?name=="value"]', path, idx + 2)
 
-@dataclass
-class ArrayStartState:
-    """We have read an array start ('[') character."""
+    name_text, op, value_text = match.groups()
+    if name_text == "@":
+        name = None
+    else:
+        name = _name(path, match.start(1))[0]  # type: ignore[index]
 
-    started_at: int
+    try:
+        value = json.loads(value_text)
+        valid = not isinstance(value, (list, dict))
+    except ValueError:
+        valid = False
+    if not valid:
+        raise _error(
+            "Filter values should be a string, number, true, false or null",
+            path,
+            match.start(3),
+        )
 
+    return FilterToken(Range(idx, match.end()), name, op, value)
 
-@dataclass
-class ArrayEndState:
-    """We have read an array end (']') character."""
 
-    started_at: int
+@lru_cache(maxsize=1024)
+def _tokenise(path: str) -> Tokens:  # noqa: C901
+    if not path.startswith("."):
+        raise _error("All paths should start with the dot", path, 0)
 
+    tokens: List[Token] = []
+    end = len(path)
+    idx = 1
+
+    # A path of just "." is valid and refers to the input itself.
+    if idx == end:
+        return ()
+
+    # Each time round this loop we have just read a dot, and so expect a name, a
+    # quoted name, '*', '.' (making '..') or '['.
+    while True:
+        if idx == end:
+            raise _error("Trailing dot at the end of a path", path, idx)
+
+        name = _name(path, idx)
+        if name is not None:
+            tokens.append(NameToken(Range(idx, name[1]), name=name[0]))
+            idx = name[1]
+
+            if idx == end:
+                break
+            elif path[idx] == ".":
+                idx += 1
+                continue
+            elif path[idx] != "[":
+                raise _error(f"Was expecting something patching {NAME}", path, idx)
+
+        elif path[idx] in "*.":
+            if path[idx] == "*":
+                tokens.append(WildcardToken(Range(idx, idx + 1)))
+                idx += 1
+            else:
+                name = _name(path, idx + 1) if idx + 1 < end else None
+                if name is None:
+                    raise _error(
+                        "Recursive descent should be followed by a name", path, idx + 1
+                    )
+                tokens.append(DescendToken(Range(idx - 1, name[1]), name=name[0]))
+                idx = name[1]
+
+            if idx == end:
+                break
+            elif path[idx] == ".":
+                idx += 1
+                continue
+            elif path[idx] != "[":
+                raise _error(
+                    "Was expecting a separator or the end of the path", path, idx
+                )
+
+        elif path[idx] != "[":
+            raise _error(
+                "Expected a valid name or the start of an array",
+                path,
+                idx,
+            )
 
-@dataclass
-class FinishedState:
-    """Reached EOF without problems."""
+        # We're at a '[', and there may be several in a row, e.g. `[0][1]`.
+        while True:
+            token = _bracket(path, idx)
+            tokens.append(token)
+            idx = token.location.end
+
+            if idx == end or path[idx] != "[":
+                break
+
+        if idx == end:
+            break
+        elif path[idx] != ".":
+            raise _error(
+                "Array end should only be followed by EOF or separator",
+                path,
+                idx,
+            )
+        idx += 1
 
-    pass
+    return tuple(tokens)
 
 
-State = Union[
-    StartState,
-    SeparatorState,
-    NameState,
-    ArrayStartState,
-    ArrayEndState,
-    FinishedState,
-]
+def tokenise(path: str) -> Tokens:
+    """
+    Tokenise a path string, returning a tuple of tokens or raising TokeniserError.
 
-NAME = re.compile(r"[a-zA-Z_-]")
+    The same tuple is returned each time the same path is tokenised (while it's in
+    the cache), so it mustn't be modified.
+    """
+    if trace.hook is None:
+        return _tokenise(path)
 
+    with trace.span("tokenise", path):
+        return _tokenise(path)
 
-def _process_char(  # noqa: C901
-    state: State,
-    ch: Union[str, None],
-    idx: int,
-) -> Tuple[State, Optional[Token]]:
 
-    if isinstance(state, StartState):
-        if ch != ".":
-            raise TokeniserError("All paths should start with the dot")
+# Writing paths
+# -------------
+#
+# Errors refer to values by the path to them, written out from the tokens with the
+# index of each item filled in, e.g. `.payload.who[1].id`.
+
+
+def _write_name(name: str) -> str:
+    return name if NAME_RUN.fullmatch(name) else json.dumps(name)
+
+
+def _mapping_text(token: Token) -> str:
+    """Write out a token that picks out a list, apart from `[]` which is written ''."""
+    if isinstance(token, SliceToken):
+        start, stop = ("" if n is None else n for n in (token.start, token.stop))
+        return f"[{start}:{stop}]"
+    elif isinstance(token, WildcardToken):
+        return ".*"
+    elif isinstance(token, DescendToken):
+        return f"..{_write_name(token.name)}"
+    elif isinstance(token, FilterToken):
+        name = "@" if token.name is None else _write_name(token.name)
+        return f"[?{name}{token.op}{json.dumps(token.value)}]"
+    else:
+        return ""
+
+
+def _reconstruct_path(
+    tokens: Sequence[Token], indexes: Sequence[Union[int, str]]
+) -> str:
+    """
+    Write out `tokens` as a path, filling in `indexes` for each array.
+
+    Slices, `.*` and `..name` are written out as they are, followed by the index
+    into the list of values they pick out, e.g. `.*[2]`.
+
+    Any indexes left over once we run out of arrays index into the value at the end
+    of the path, and any arrays left over once we run out of indexes are written `[]`.
+    """
+    path = ""
+    cur_idx = 0
+
+    for t in tokens:
+        if isinstance(t, NameToken):
+            path += f".{_write_name(t.name)}"
+        elif isinstance(t, IndexToken):
+            path += f"[{t.index}]"
         else:
-            return SeparatorState(first=True), None
-
-    elif isinstance(state, SeparatorState):
-        if ch is None:
-            if state.first:
-                return FinishedState(), None
+            text = _mapping_text(t)
+            if cur_idx < len(indexes):
+                path += f"{text}[{indexes[cur_idx]}]"
             else:
-                raise TokeniserError("Trailing dot at the end of a path")
-        elif re.match(NAME, ch):
-            return NameState(captured=ch, started_at=idx), None
-        elif ch == "[":
-            return ArrayStartState(started_at=idx), None
-        else:
-            raise TokeniserError("Expected a valid name or the start of an array")
-
-    elif isinstance(state, NameState):
-
-        def _name_token(state: NameState) -> NameToken:
-            return NameToken(Range(state.started_at, idx), name=state.captured)
-
-        if ch is None:
-            return FinishedState(), _name_token(state)
-        elif re.match(NAME, ch):
-            state.captured += ch
-            return state, None
-        elif ch == "[":
-            return ArrayStartState(started_at=idx), _name_token(state)
-        elif ch == ".":
-            return SeparatorState(first=False), _name_token(state)
-        else:
-            raise TokeniserError(f"Was expecting something patching {NAME}")
-
-    elif isinstance(state, ArrayStartState):
-        if ch != "]":
-            raise TokeniserError("Array indicators should be spelled []")
-        else:
-            return ArrayEndState(started_at=state.started_at), None
-
-    elif isinstance(state, ArrayEndState):
-
-        def _array_token(state: ArrayEndState) -> ArrayToken:
-            return ArrayToken(Range(state.started_at, idx))
-
-        # We are expecting either EOF or a separator
-        if ch is None:
-            return FinishedState(), _array_token(state)
-        elif ch == ".":
-            return SeparatorState(first=False), _array_token(state)
-        else:
-            raise TokeniserError(
-                "Array end should only be followed by EOF or separator"
-            )
-
-    raise TokeniserError("Tokeniser got into a bad state")
+                path += text or "[]"
+            cur_idx += 1
 
+    for idx in indexes[cur_idx:]:
+        path += f"[{idx!r}]"
 
-def tokenise(path: str) -> List[Token]:
-    """Tokenise a path string, returning a list of tokens or raising TokeniserError."""
-    state: State = StartState()
-    tokens: List[Token] = []
-
-    # It's useful to have an 'EOF' input, so we use None.
-    split_path = [*path, None]
-
-    for idx, ch in enumerate(split_path):
-        try:
-            print(state)
-            state, token = _process_char(state, ch, idx)
-        except TokeniserError as exc:
-            exc.context = path, idx
-            raise exc
-
-        if token:
-            print(token)
-            tokens += [token]
-
-    assert isinstance(state, FinishedState)
-    return tokens
+    return path
@@ -0,0 +1,81 @@
+"""
+Hooks for tracing what plucking is doing, and how long it takes.
+
+Register a hook with `set_trace_hook()` (or temporarily, with the `tracing()` context
+manager) and it will be called with a `TraceEvent` for each step: tokenising a path,
+extracting a path's value, nesting it `into()` another dataclass, mapping it,
+type-checking it, and constructing the dataclass.
+
+When no hook is registered, plucking takes its usual fast paths and the only cost is
+checking whether a hook is set once per `pluck()`.
+
+e.g.
+
+    events = []
+    with tracing(events.append):
+        pluck(data, Struct, value=Path(".value"))
+
+    slowest = max(events, key=lambda event: event.duration)
+
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable, Iterator, Optional
+
+
+@dataclass(frozen=True)
+class TraceEvent:
+    """Something that happened while plucking."""
+
+    # One of "tokenise", "extract", "into", "map", "typecheck" or "construct".
+    kind: str
+
+    # The path being processed, or for "construct" the name of the dataclass.
+    target: str
+
+    # How long the step took, in seconds.
+    duration: float
+
+    # If the step failed, the exception it raised.
+    error: Optional[BaseException] = None
+
+
+TraceHook = Callable[[TraceEvent], None]
+
+hook: Optional[TraceHook] = None
+
+
+def set_trace_hook(new_hook: Optional[TraceHook]) -> Optional[TraceHook]:
+    """Set the hook to call with each `TraceEvent`, returning the previous one."""
+    global hook
+    previous, hook = hook, new_hook
+    return previous
+
+
+@contextmanager
+def tracing(new_hook: TraceHook) -> Iterator[None]:
+    """Call `new_hook` with each `TraceEvent` within a `with` block."""
+    previous = set_trace_hook(new_hook)
+    try:
+        yield
+    finally:
+        set_trace_hook(previous)
+
+
+@contextmanager
+def span(kind: str, target: str) -> Iterator[None]:
+    """Time the body of a `with` block and report it to the hook, if there is one."""
+    current = hook
+    if current is None:
+        yield
+        return
+
+    start = perf_counter()
+    try:
+        yield
+    except BaseException as exc:
+        current(TraceEvent(kind, target, perf_counter() - start, exc))
+        raise
+    else:
+        current(TraceEvent(kind, target, perf_counter() - start))
@@ -0,0 +1,212 @@
+"""
+Merge the token lists of a set of paths so that shared prefixes are walked once.
+
+With paths `.payload.from`, `.payload.to` and `.payload.who[].id`, walking each path
+separately looks up `payload` three times.  Merged into a trie, `payload` is looked
+up once, and each `[]` is iterated once no matter how many paths go through it.
+
+Paths with a default are marked as optional.  Where every path below a key or index
+is optional, and none of them have gone through a list of values yet, a missing key
+gives `MISSING` for each of them rather than an error.
+"""
+import dataclasses
+from typing import (
+    AbstractSet,
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from .extractor import descendants, optional_index, optional_key, MISSING
+from .tokeniser import (
+    Token,
+    ArrayToken,
+    NameToken,
+    IndexToken,
+    SliceToken,
+    WildcardToken,
+    FilterToken,
+)
+from .filters import matching
+
+C = TypeVar("C")
+
+
+def _step_key(token: Token) -> Tuple[Any, ...]:
+    """Tokens are equal apart from their location if they have the same key."""
+    # Types are included so that e.g. `[?n==1]` and `[?n==true]` are different.
+    return (type(token),) + tuple(
+        (type(value), value)
+        for value in (
+            getattr(token, field.name)
+            for field in dataclasses.fields(token)
+            if field.name != "location"
+        )
+    )
+
+
+def _checked(cls: Type[C], data: Any) -> C:
+    """Return `data`, raising `TypeError` if it isn't a `cls`."""
+    if not isinstance(data, cls):
+        raise TypeError(f"expected a {cls.__name__}")
+    return data
+
+
+def _items(token: Token, data: Any) -> List[Any]:
+    """The values that a slice, filter, wildcard or recursive descent token picks out."""
+    if isinstance(token, SliceToken):
+        return _checked(list, data)[token.start : token.stop]
+    elif isinstance(token, FilterToken):
+        return matching(_checked(list, data), token)
+    elif isinstance(token, WildcardToken):
+        return list(_checked(dict, data).values())
+    else:
+        return descendants(data, token.name)  # type: ignore[union-attr]
+
+
+class PathTrie:
+    """
+    A node in a trie of token lists.
+
+    `here` holds the indexes of the paths that end at this node, and `order` the
+    indexes of every path that ends at or below this node, in the order that `walk()`
+    returns their values.  `missing_ok` is set if this node's key or index can be
+    missing, in which case `missing` holds a `MISSING` for each path in `order`.
+    """
+
+    def __init__(self) -> None:
+        """Create a node with no paths through it."""
+        self.here: List[int] = []
+        self.names: Dict[str, PathTrie] = {}
+        self.array: Optional[PathTrie] = None
+        # Children for any other kind of token, keyed by `_step_key()`.
+        self.steps: Dict[Tuple[Any, ...], Tuple[Token, PathTrie]] = {}
+        self.order: List[int] = []
+        self.missing_ok = False
+        self.missing: List[Any] = []
+
+    @classmethod
+    def build(
+        cls, paths: Sequence[Sequence[Token]], optional: AbstractSet[int] = frozenset()
+    ) -> "PathTrie":
+        """
+        Build a trie from a sequence of token lists.
+
+        The paths at the indexes in `optional` have a default.
+        """
+        root = cls()
+
+        for idx, tokens in enumerate(paths):
+            node = root
+            for token in tokens:
+                node = node._child(token)
+            node.here.append(idx)
+
+        root._set_order(optional, True)
+        return root
+
+    def _child(self, token: Token) -> "PathTrie":
+        if isinstance(token, NameToken):
+            return self.names.setdefault(token.name, PathTrie())
+        elif isinstance(token, ArrayToken):
+            if self.array is None:
+                self.array = PathTrie()
+            return self.array
+        else:
+            key = _step_key(token)
+            if key not in self.steps:
+                self.steps[key] = (token, PathTrie())
+            return self.steps[key][1]
+
+    def _set_order(self, optional: AbstractSet[int], prefix: bool) -> None:
+        """Set `order`, where `prefix` is whether no list of values is above here."""
+        self.order = list(self.here)
+
+        for child in self.names.values():
+            child._set_order(optional, prefix)
+            self.order += child.order
+
+        if self.array is not None:
+            self.array._set_order(optional, False)
+            self.order += self.array.order
+
+        for token, child in self.steps.values():
+            child._set_order(optional, prefix and isinstance(token, IndexToken))
+            self.order += child.order
+
+        self.missing_ok = prefix and all(idx in optional for idx in self.order)
+        self.missing = [MISSING] * len(self.order) if self.missing_ok else []
+
+    def walk(self, data: Any) -> List[Any]:
+        """
+        Return the value of each path at or below this node, in the order of `order`.
+
+        This doesn't produce useful errors; if it raises `LookupError` or `TypeError`,
+        walk the paths one at a time with `extractor._get_from_path` to find out why.
+        """
+        values = [data] * len(self.here)
+
+        if self.names:
+            values += self._walk_names(data)
+
+        if self.array is not None:
+            if not isinstance(data, list):
+                raise TypeError("expected a list")
+            values += self.array._walk_items(data)
+
+        if self.steps:
+            values += self._walk_steps(data)
+
+        return values
+
+    def _walk_names(self, data: Any) -> List[Any]:
+        """Walk the children in `names`, returning the values of the paths below."""
+        if not isinstance(data, dict) and data is not None:
+            raise TypeError("expected a dict")
+
+        values: List[Any] = []
+        for name, child in self.names.items():
+            if child.missing_ok:
+                value = optional_key(data, name)
+                values += child.missing if value is MISSING else child.walk(value)
+            else:
+                values += child.walk(data[name])  # type: ignore[index]
+
+        return values
+
+    def _walk_steps(self, data: Any) -> List[Any]:
+        """Walk the children in `steps`, returning the values of the paths below."""
+        values: List[Any] = []
+        for token, child in self.steps.values():
+            if isinstance(token, IndexToken) and child.missing_ok:
+                value = optional_index(data, token.index)
+                values += child.missing if value is MISSING else child.walk(value)
+            elif isinstance(token, IndexToken):
+                if not isinstance(data, list):
+                    raise TypeError("expected a list")
+                values += child.walk(data[token.index])
+            else:
+                values += child._walk_items(_items(token, data))
+
+        return values
+
+    def _walk_items(self, items: List[Any]) -> List[Any]:
+        """Walk each of `items`, returning a list of values for each path."""
+        rows = [self.walk(entry) for entry in items]
+        if rows:
+            return list(map(list, zip(*rows)))
+        else:
+            return [[] for _ in self.order]
+
+    def walk_all(self, data: Any) -> List[Any]:
+        """Return the value of each path in the trie, in the order they were given."""
+        values = [None] * len(self.order)
+        for idx, value in zip(self.order, self.walk(data)):
+            values[idx] = value
+
+        return values
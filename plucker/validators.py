@@ -0,0 +1,281 @@
+"""
+Compile type annotations into validator functions.
+
+`validator_for(List[int])` inspects the annotation once and returns a closure that
+checks values against it, so that checking a value involves no `typing`
+introspection at all.  Validators are cached per annotation.
+
+Supported annotations are plain classes (including enums and dataclasses), `Any`,
+`List[T]`, `Dict[K, V]`, `Tuple[T, ...]`, `Tuple[A, B]`, `Optional[T]`, `Union[...]`
+and `Literal[...]`, nested to any depth.  Classes are checked exactly, so `True` is
+not an `int` and `1` is not a `float`.
+
+A validator returns nothing if a value is valid and raises `Invalid` otherwise.
+"""
+import sys
+import typing
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+Validator = Callable[[Any], None]
+
+# Index into a list or tuple, or key into a dict.
+Index = Union[int, str]
+
+if sys.version_info >= (3, 10):
+    from types import UnionType
+
+    _UNION_TYPES: Tuple[Any, ...] = (Union, UnionType)
+else:
+    _UNION_TYPES = (Union,)
+
+_NoneType = type(None)
+
+
+class Invalid(Exception):
+    """
+    A value didn't match the annotation it was validated against.
+
+    `indexes` gives the location of the bad value within the value that was validated,
+    outermost first.
+    """
+
+    def __init__(self, expected: str, value: Any):
+        """Record that `value` was found where a `expected` was expected."""
+        self.expected = expected
+        self.value = value
+        self._indexes: List[Index] = []
+
+    @property
+    def indexes(self) -> List[Index]:
+        """The location of the bad value, as a list of indexes and keys."""
+        # Indexes are added as the exception travels outwards through the validators.
+        return self._indexes[::-1]
+
+    @property
+    def actual(self) -> str:
+        """The name of the bad value's type."""
+        return type(self.value).__name__
+
+
+def _describe(annotation: Any) -> str:
+    if isinstance(annotation, type) and typing.get_origin(annotation) is None:
+        return annotation.__name__
+    else:
+        return str(annotation).replace("typing.", "")
+
+
+def _validate_any(value: Any):
+    pass
+
+
+def _class_validator(cls: type) -> Validator:
+    expected = cls.__name__
+
+    def validate(value: Any):
+        if type(value) is not cls:
+            raise Invalid(expected, value)
+
+    return validate
+
+
+def _sequence_validator(
+    annotation: Any, cls: Type[Sequence[Any]], item: Validator
+) -> Validator:
+    expected = _describe(annotation)
+
+    def validate(value: Any):
+        if not isinstance(value, cls):
+            raise Invalid(expected, value)
+
+        for idx, x in enumerate(value):
+            try:
+                item(x)
+            except Invalid as exc:
+                exc._indexes.append(idx)
+                raise exc
+
+    return validate
+
+
+def _dict_validator(annotation: Any, key: Validator, item: Validator) -> Validator:
+    expected = _describe(annotation)
+
+    def validate(value: Any):
+        if not isinstance(value, dict):
+            raise Invalid(expected, value)
+
+        for k, v in value.items():
+            try:
+                key(k)
+                item(v)
+            except Invalid as exc:
+                exc._indexes.append(k)
+                raise exc
+
+    return validate
+
+
+def _tuple_validator(annotation: Any, items: List[Validator]) -> Validator:
+    expected = _describe(annotation)
+
+    def validate(value: Any):
+        if not isinstance(value, tuple) or len(value) != len(items):
+            raise Invalid(expected, value)
+
+        for idx, (item, x) in enumerate(zip(items, value)):
+            try:
+                item(x)
+            except Invalid as exc:
+                exc._indexes.append(idx)
+                raise exc
+
+    return validate
+
+
+def _literal_validator(annotation: Any, values: Tuple[Any, ...]) -> Validator:
+    expected = _describe(annotation)
+    # Compare types as well as values, so that True doesn't pass for 1.
+    allowed = {(type(v), v) for v in values}
+
+    def validate(value: Any):
+        try:
+            ok = (type(value), value) in allowed
+        except TypeError:
+            ok = False
+
+        if not ok:
+            raise Invalid(expected, value)
+
+    return validate
+
+
+def _container_type(annotation: Any) -> Any:
+    """Return the class that values of `annotation` will be instances of, if known."""
+    origin = typing.get_origin(annotation) or annotation
+    return origin if isinstance(origin, type) else None
+
+
+def _only_options(
+    options: Tuple[Any, ...], validators: List[Validator]
+) -> Dict[Any, Validator]:
+    """
+    Map each class that only one of `options` could match to that option's validator.
+
+    Using that validator directly means that errors deep inside e.g. an
+    `Optional[List[int]]` are reported as precisely as they would be for a `List[int]`.
+    """
+    by_type: Dict[Any, List[Validator]] = {}
+    for option, option_validator in zip(options, validators):
+        by_type.setdefault(_container_type(option), []).append(option_validator)
+
+    # An option of unknown class could match anything.
+    if None in by_type:
+        return {}
+    else:
+        return {cls: vs[0] for cls, vs in by_type.items() if len(vs) == 1}
+
+
+def _union_validator(annotation: Any, options: Tuple[Any, ...]) -> Validator:
+    expected = _describe(annotation)
+    validators = [validator_for(option) for option in options]
+    only = _only_options(options, validators)
+
+    def validate(value: Any):
+        option_validator = only.get(type(value))
+        if option_validator is not None:
+            option_validator(value)
+            return
+
+        for option_validator in validators:
+            try:
+                option_validator(value)
+                return
+            except Invalid:
+                pass
+
+        raise Invalid(expected, value)
+
+    return validate
+
+
+def _compile(annotation: Any) -> Validator:  # noqa: C901
+    if annotation is Any or annotation is object:
+        return _validate_any
+    elif annotation is None or annotation is _NoneType:
+        return _class_validator(_NoneType)
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin is None:
+        if isinstance(annotation, type):
+            return _class_validator(annotation)
+        else:
+            raise ValueError(f"Can't validate against {annotation!r}")
+
+    elif origin in _UNION_TYPES:
+        return _union_validator(annotation, args)
+
+    elif origin is Literal:
+        return _literal_validator(annotation, args)
+
+    elif origin is list:
+        item = validator_for(args[0]) if args else _validate_any
+        return _sequence_validator(annotation, list, item)
+
+    elif origin is dict:
+        key, item = (validator_for(a) for a in args) if args else (_validate_any,) * 2
+        return _dict_validator(annotation, key, item)
+
+    elif origin is tuple:
+        if len(args) == 2 and args[1] is Ellipsis:
+            return _sequence_validator(annotation, tuple, validator_for(args[0]))
+        else:
+            return _tuple_validator(annotation, [validator_for(a) for a in args])
+
+    elif isinstance(origin, type):
+        return _class_validator(origin)
+
+    raise ValueError(f"Can't validate against {annotation!r}")
+
+
+def exact_type(annotation: Any) -> Optional[type]:
+    """If `annotation` is checked by comparing a value's type to a class, return it."""
+    if typing.get_origin(annotation) is None and isinstance(annotation, type):
+        return None if annotation is object else annotation
+    elif annotation is None:
+        return type(None)
+    else:
+        return None
+
+
+def is_optional(annotation: Any) -> bool:
+    """Whether `annotation` is `Optional[T]`, i.e. a union that includes `None`."""
+    origin = typing.get_origin(annotation)
+    return origin in _UNION_TYPES and type(None) in typing.get_args(annotation)
+
+
+@lru_cache(maxsize=None)
+def _cached(annotation: Any) -> Validator:
+    return _compile(annotation)
+
+
+def validator_for(annotation: Any) -> Validator:
+    """Return a (cached) validator for values of type `annotation`."""
+    try:
+        return _cached(annotation)
+    except TypeError:
+        # Some annotations, e.g. Literals of unhashable values, can't be cached.
+        return _compile(annotation)
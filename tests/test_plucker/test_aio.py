@@ -0,0 +1,193 @@
+import asyncio
+import json
+import pytest
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List
+from plucker import apluck, apluck_many, apluck_stream, compile, pluck, Path
+
+
+@dataclass
+class Contact:
+    id: int
+    name: str
+
+
+@dataclass
+class Struct:
+    sender: str
+    contacts: List[Contact]
+
+
+INPUT = {
+    "from": "m",
+    "who": [{"id": 1, "name": "x"}, {"id": 2, "name": "y"}, {"id": 3, "name": "z"}],
+}
+
+
+async def upper(value):
+    await asyncio.sleep(0)
+    return value.upper()
+
+
+def paths(mapper: Callable[[Any], Any] = upper) -> Dict[str, Any]:
+    return dict(
+        sender=Path(".from").map(mapper),
+        contacts=Path(".who[]").into(
+            Contact, id=Path(".id"), name=Path(".name").map(mapper)
+        ),
+    )
+
+
+EXPECTED = Struct(
+    sender="M", contacts=[Contact(1, "X"), Contact(2, "Y"), Contact(3, "Z")]
+)
+
+
+async def chunks(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        await asyncio.sleep(0)
+        yield data[start : start + size]
+
+
+def test_apluck():
+    assert asyncio.run(apluck(INPUT, Struct, **paths())) == EXPECTED
+
+
+def test_apluck_sync_mappers():
+    assert asyncio.run(apluck(INPUT, Struct, **paths(str.upper))) == EXPECTED
+
+
+def test_apluck_map_each():
+    @dataclass
+    class Names:
+        names: List[str]
+
+    result = asyncio.run(
+        apluck(INPUT, Names, names=Path(".who[].name").map_each(upper))
+    )
+
+    assert result == Names(["X", "Y", "Z"])
+
+
+def test_apluck_from_byte_stream():
+    source = chunks(json.dumps({"other": [1, 2, 3], **INPUT}).encode())
+
+    assert asyncio.run(apluck(source, Struct, **paths())) == EXPECTED
+
+
+def test_apluck_many():
+    rows = [INPUT] * 3
+
+    assert asyncio.run(apluck_many(rows, Struct, **paths())) == [EXPECTED] * 3
+
+
+def test_apluck_many_async_rows():
+    async def rows() -> AsyncIterator[Dict[str, Any]]:
+        for _ in range(3):
+            await asyncio.sleep(0)
+            yield INPUT
+
+    assert asyncio.run(apluck_many(rows(), Struct, **paths())) == [EXPECTED] * 3
+
+
+def test_apluck_stream():
+    async def run() -> List[Struct]:
+        source = chunks(json.dumps({"results": [INPUT, INPUT]}).encode())
+        return [
+            row async for row in apluck_stream(source, ".results[]", Struct, **paths())
+        ]
+
+    assert asyncio.run(run()) == [EXPECTED] * 2
+
+
+def test_concurrency_limit():
+    running = 0
+    most = 0
+
+    async def slow(value):
+        nonlocal running, most
+        running += 1
+        most = max(most, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return value
+
+    @dataclass
+    class Names:
+        names: List[str]
+
+    plucker = compile(Names, names=Path(".[]").map_each(slow))
+    data = ["a"] * 20
+
+    assert asyncio.run(plucker.apluck(data, concurrency=3)) == Names(data)
+    assert most == 3
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"from": 1, "who": []},
+        {"from": "m", "who": [{"id": 1, "name": "x"}, {"id": 2, "name": 3}]},
+        {"from": "m", "who": [{"id": "1", "name": 3}, {"id": 2, "name": "y"}]},
+        {"from": 1, "who": [{"id": 1}]},
+        {"who": []},
+    ],
+)
+def test_apluck_errors_match_pluck(data):
+    async def fails(value):
+        await asyncio.sleep(0)
+        return value.upper()
+
+    with pytest.raises(Exception) as expected:
+        pluck(data, Struct, **paths(str.upper))
+
+    with pytest.raises(expected.type) as actual:
+        asyncio.run(apluck(data, Struct, **paths(fails)))
+
+    assert str(actual.value) == str(expected.value)
+
+
+@pytest.mark.parametrize(
+    "items",
+    [
+        [{"v": 1}, {"v": "x"}],
+        [{"v": "x"}, {"v": 1}],
+        [{"v": 2}, {"v": 1}, {"v": "x"}],
+    ],
+)
+def test_apluck_item_errors_match_pluck(items):
+    @dataclass
+    class Sub:
+        v: int
+
+    @dataclass
+    class Items:
+        items: List[Sub]
+
+    def check(sub: Any) -> Any:
+        if sub.v == 1:
+            raise ValueError("one")
+        return sub
+
+    async def acheck(sub: Any) -> Any:
+        await asyncio.sleep(0)
+        return check(sub)
+
+    def spec(mapper: Callable[[Any], Any]) -> Path:
+        return Path(".items[]").into(Sub, v=Path(".v")).map_each(mapper)
+
+    with pytest.raises(Exception) as expected:
+        pluck({"items": items}, Items, items=spec(check))
+
+    with pytest.raises(expected.type) as actual:
+        asyncio.run(apluck({"items": items}, Items, items=spec(acheck)))
+
+    assert str(actual.value) == str(expected.value)
+
+
+def test_apluck_defaults():
+    spec = {**paths(), "sender": Path(".from", default="?").map(upper)}
+
+    result = asyncio.run(apluck({"who": []}, Struct, **spec))
+
+    assert result == Struct(sender="?", contacts=[])
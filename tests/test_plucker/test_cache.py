@@ -0,0 +1,113 @@
+import pickle
+import pytest
+import threading
+from dataclasses import dataclass
+from typing import List
+from plucker import pluck_many, compile, Path, PluckError, CachedMapper
+from plucker.cache import CacheInfo
+
+
+def test_cached_mapper_hits_and_misses():
+    calls = []
+
+    def double(value):
+        calls.append(value)
+        return value * 2
+
+    mapper = CachedMapper(double, 2)
+
+    assert [mapper(v) for v in [1, 2, 1, 1, 3, 2]] == [2, 4, 2, 2, 6, 4]
+    # 2 was evicted by 3, being least recently used.
+    assert calls == [1, 2, 3, 2]
+    assert mapper.cache_info() == CacheInfo(hits=2, misses=4, maxsize=2, currsize=2)
+
+    mapper.cache_clear()
+    assert mapper.cache_info() == CacheInfo(hits=0, misses=0, maxsize=2, currsize=0)
+
+
+def test_cached_mapper_keys_by_type():
+    mapper = CachedMapper(repr, 10)
+
+    assert [mapper(1), mapper(1.0), mapper(True)] == ["1", "1.0", "True"]
+
+
+def test_cached_mapper_skips_unhashable_values():
+    mapper = CachedMapper(len, 10)
+
+    assert mapper([1, 2]) == 2
+    assert mapper([1, 2]) == 2
+    assert mapper.cache_info() == CacheInfo(hits=0, misses=0, maxsize=10, currsize=0)
+
+
+def test_cached_mapper_does_not_cache_errors():
+    mapper = CachedMapper(int, 10)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            mapper("x")
+
+    assert mapper.cache_info().currsize == 0
+
+
+def test_cached_mapper_is_picklable():
+    mapper = CachedMapper(int, 10)
+    mapper("1")
+
+    copy = pickle.loads(pickle.dumps(mapper))
+
+    assert copy("2") == 2
+    assert copy.cache_info() == CacheInfo(hits=0, misses=1, maxsize=10, currsize=1)
+
+
+def test_cached_mapper_threads():
+    mapper = CachedMapper(str, 50)
+    values = list(range(100)) * 20
+
+    def run():
+        assert [mapper(v) for v in values] == [str(v) for v in values]
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    info = mapper.cache_info()
+    assert info.hits + info.misses == len(values) * 4
+    assert info.currsize == 50
+
+
+def test_path_map_cache():
+    @dataclass
+    class Struct:
+        value: int
+        values: List[int]
+
+    rows = [{"v": "1", "vs": ["1", "2"]}, {"v": "1", "vs": ["2", "2"]}]
+    value = Path(".v").map(int, cache=10)
+    values = Path(".vs[]").map_each(int, cache=10)
+
+    assert pluck_many(rows, Struct, value=value, values=values) == [
+        Struct(1, [1, 2]),
+        Struct(1, [2, 2]),
+    ]
+    assert isinstance(value.mapper, CachedMapper)
+    assert isinstance(values.each_mapper, CachedMapper)
+    assert value.mapper.cache_info() == CacheInfo(1, 1, 10, 1)
+    assert values.each_mapper.cache_info() == CacheInfo(2, 2, 10, 2)
+
+
+def test_path_map_cache_errors():
+    @dataclass
+    class Struct:
+        value: int
+
+    plucker = compile(Struct, value=Path(".v").map(int, cache=10))
+
+    with pytest.raises(PluckError, match=r"Couldn't map .v \(value is 'x'\)"):
+        plucker.pluck({"v": "x"})
+
+
+def test_path_map_cache_needs_a_function():
+    with pytest.raises(ValueError):
+        Path(".v").map({"a": 1}, cache=10)
@@ -0,0 +1,263 @@
+import gc
+import linecache
+import pytest
+from typing import List, Optional
+from dataclasses import dataclass
+
+from plucker import compile, Path, PluckError
+from plucker.codegen import compile_getter, getter_source, plucker_source
+from plucker.exceptions import ExtractError
+from plucker.extractor import extract, _get_optional
+from plucker.tokeniser import tokenise
+
+
+def test_getter_source():
+    assert getter_source(tokenise(".payload.who[].id")) == (
+        "def get(d):\n"
+        "    return [e0['id'] for e0 in _as_list(d['payload']['who'])]\n"
+    )
+
+
+def test_getter_source_nested_arrays():
+    assert getter_source(tokenise(".[].fred[].v")) == (
+        "def get(d):\n"
+        "    return [[e1['v'] for e1 in _as_list(e0['fred'])] for e0 in _as_list(d)]\n"
+    )
+
+
+def test_compiled_getter():
+    get = compile_getter(tokenise(".fred[].v"))
+    assert get({"fred": [{"v": 2}, {"v": 3}]}) == [2, 3]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"fred": [{"v": 2}, {"w": 3}]},
+        {"fred": {"v": 2}},
+        {"fred": [[]]},
+        {"fred": "v"},
+        [],
+    ],
+)
+def test_compiled_getter_errors_match_interpreter(data):
+    path = ".fred[].v"
+
+    with pytest.raises(ExtractError) as expected:
+        extract(data, path)
+
+    with pytest.raises(ExtractError) as actual:
+        compile_getter(tokenise(path))(data)
+
+    assert actual.value.token == expected.value.token
+    assert actual.value.message == expected.value.message
+
+
+@dataclass
+class Contact:
+    id: int
+    name: str
+
+
+@dataclass
+class Struct:
+    num: int
+    ids: List[int]
+    contacts: List[Contact]
+    label: str
+
+
+def _compile(codegen: bool):
+    return compile(
+        Struct,
+        codegen=codegen,
+        num=Path(".number"),
+        ids=Path(".who[].id"),
+        contacts=Path(".who[]").into(Contact, id=Path(".id"), name=Path(".name")),
+        label=Path(".label").map({"L": "label"}),
+    )
+
+
+def test_generated_plucker():
+    json = {
+        "number": 3,
+        "label": "L",
+        "who": [{"id": 12, "name": "X"}, {"id": 41, "name": "Y"}],
+    }
+
+    assert _compile(True).pluck(json) == _compile(False).pluck(json)
+
+
+@pytest.mark.parametrize(
+    "json",
+    [
+        {"number": "3", "label": "L", "who": []},
+        {"number": 3, "label": "L", "who": [{"id": "12", "name": "X"}]},
+        {"number": 3, "label": "M", "who": []},
+        {"number": 3, "label": "L", "who": {}},
+        {"number": 3, "who": []},
+    ],
+)
+def test_generated_plucker_errors_match_interpreter(json):
+    with pytest.raises((PluckError, ExtractError)) as expected:
+        _compile(False).pluck(json)
+
+    with pytest.raises(expected.type) as actual:
+        _compile(True).pluck(json)
+
+    assert str(actual.value) == str(expected.value)
+
+
+def test_generated_plucker_with_shared_prefixes():
+    @dataclass
+    class Wide:
+        a: int
+        b: str
+        ids: List[int]
+
+    plucker = compile(
+        Wide,
+        codegen=True,
+        a=Path(".p.a"),
+        b=Path(".p.b"),
+        ids=Path(".p.who[].id"),
+    )
+    json = {
+        "p": {
+            "a": 1,
+            "b": "x",
+            "who": [{"id": 1, "tags": [{"name": "n"}]}, {"id": 2, "tags": []}],
+        }
+    }
+
+    assert plucker.pluck(json) == Wide(1, "x", [1, 2])
+
+
+@pytest.mark.parametrize(
+    "path",
+    [".items[0].id", ".items[-1:].id", ".counts.*.n", "..id", '."weird key"[]'],
+)
+def test_compiled_getter_extended_paths(path):
+    data = {
+        "items": [{"id": 1}, {"id": 2}],
+        "counts": {"a": {"n": 1, "id": 3}},
+        "weird key": [4],
+    }
+
+    assert compile_getter(tokenise(path))(data) == extract(data, path)[0]
+
+
+@pytest.mark.parametrize(
+    "data", [{"items": []}, {"items": {"0": 1}}, {"items": [{}]}, {"counts": []}]
+)
+def test_compiled_getter_extended_path_errors_match_interpreter(data):
+    for path in [".items[0].id", ".counts.*.n"]:
+        with pytest.raises(ExtractError) as expected:
+            extract(data, path)
+
+        with pytest.raises(ExtractError) as actual:
+            compile_getter(tokenise(path))(data)
+
+        assert actual.value.token == expected.value.token
+        assert actual.value.message == expected.value.message
+
+
+@pytest.mark.parametrize(
+    "path", ['.events[?type=="add"].id', ".events[?n>1].id", '.events[?@=="x"]']
+)
+def test_compiled_getter_filters(path):
+    data = {"events": [{"type": "add", "id": 1, "n": 2}, "x", {"type": "x", "id": 2}]}
+
+    assert compile_getter(tokenise(path))(data) == extract(data, path)[0]
+
+
+@pytest.mark.parametrize(
+    "path", [".n[?@==Infinity]", ".n[?@<-Infinity]", ".n[?@!=NaN]", ".n[?@>=1e400]"]
+)
+def test_generated_code_with_non_finite_filter_values(path):
+    data = {"n": [1.0, float("inf"), float("-inf"), float("nan")]}
+    expected = extract(data, path)[0]
+
+    @dataclass
+    class Numbers:
+        n: List[float]
+
+    compiled = compile(Numbers, codegen=True, n=Path(path))
+
+    assert repr(compile_getter(tokenise(path))(data)) == repr(expected)
+    assert repr(compiled.pluck(data)) == repr(Numbers(expected))
+
+
+def test_optional_getter_source():
+    assert getter_source(tokenise(".a[0].b[].c"), optional=True) == (
+        "def get(d):\n"
+        "    t = (d.get('a', MISSING) if type(d) is dict else optional_key(d, 'a'))\n"
+        "    if t is MISSING:\n"
+        "        return MISSING\n"
+        "    t = optional_index(t, 0)\n"
+        "    if t is MISSING:\n"
+        "        return MISSING\n"
+        "    t = (t.get('b', MISSING) if type(t) is dict else optional_key(t, 'b'))\n"
+        "    if t is MISSING:\n"
+        "        return MISSING\n"
+        "    return [e0['c'] for e0 in _as_list(t)]\n"
+    )
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"a": [{"b": [{"c": 1}]}]},
+        {"a": [{}]},
+        {"a": []},
+        {"a": None},
+        {"a": [{"b": [{}]}]},
+        {"a": [{"b": {}}]},
+        {"a": {}},
+    ],
+)
+def test_compiled_optional_getter_matches_interpreter(data):
+    tokens = tokenise(".a[0].b[].c")
+    get = compile_getter(tokens, optional=True)
+
+    try:
+        expected = _get_optional(data, tokens)
+    except ExtractError as exc:
+        with pytest.raises(ExtractError, match=exc.message):
+            get(data)
+    else:
+        assert get(data) == expected
+
+
+def test_generated_plucker_skips_missing_keys():
+    @dataclass
+    class Struct:
+        number: int
+        label: Optional[str]
+        ids: List[int]
+
+    plucker = compile(
+        Struct,
+        codegen=True,
+        number=Path(".payload.number", default=0),
+        label=Path(".payload.label"),
+        ids=Path(".payload.who[].id", default=[]),
+    )
+
+    assert "d.get('payload', MISSING)" in plucker_source(plucker)
+    assert plucker.pluck({}) == Struct(0, None, [])
+    assert plucker.pluck({"payload": {"who": [{"id": 1}]}}) == Struct(0, None, [1])
+
+
+def test_generated_source_is_forgotten_with_its_function():
+    compiled = _compile(True)
+    filenames = [
+        compiled._pluck.__code__.co_filename,
+        compiled._construct.__code__.co_filename,
+    ]
+    assert all(filename in linecache.cache for filename in filenames)
+
+    del compiled
+    gc.collect()
+
+    assert not any(filename in linecache.cache for filename in filenames)
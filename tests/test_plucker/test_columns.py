@@ -0,0 +1,165 @@
+import pytest
+from contextlib import nullcontext
+from array import array
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+from plucker import pluck, pluck_arrays, compile, Path, PluckError, ListColumn
+from plucker import tracing
+from plucker.exceptions import ExtractError
+
+
+@dataclass
+class Order:
+    id: int
+    total: float
+    item_ids: List[int]
+    note: Optional[str]
+
+
+ROWS = [
+    {"id": 1, "total": 9.5, "items": [{"id": 3}, {"id": 4}], "note": None},
+    {"id": 2, "total": 12.0, "items": [], "note": "gift"},
+    {"id": 3, "total": 0.5, "items": [{"id": 7}], "note": None},
+]
+
+PATHS: Dict[str, Any] = dict(
+    id=Path(".id"),
+    total=Path(".total"),
+    item_ids=Path(".items[].id"),
+    note=Path(".note"),
+)
+
+
+def test_pluck_arrays():
+    columns = pluck_arrays(ROWS, Order, **PATHS)
+
+    assert columns["id"] == array("q", [1, 2, 3])
+    assert columns["total"] == array("d", [9.5, 12.0, 0.5])
+    assert columns["item_ids"] == ListColumn(
+        array("q", [3, 4, 7]), array("q", [0, 2, 2, 3])
+    )
+    assert columns["note"] == [None, "gift", None]
+
+
+def test_list_column_rows():
+    item_ids = compile(Order, **PATHS).pluck_arrays(ROWS)["item_ids"]
+
+    assert len(item_ids) == 3
+    assert [list(item_ids[i]) for i in range(3)] == [[3, 4], [], [7]]
+
+
+def test_pluck_arrays_mapped():
+    @dataclass
+    class Struct:
+        value: int
+
+    columns = pluck_arrays([{"v": "1"}, {"v": "2"}], Struct, value=Path(".v").map(int))
+
+    assert columns["value"] == array("q", [1, 2])
+
+
+@pytest.mark.parametrize(
+    "row",
+    [
+        {"id": "1", "total": 1.0, "items": [], "note": None},
+        {"id": 1, "total": 1, "items": [], "note": None},
+        {"id": True, "total": 1.0, "items": [], "note": None},
+        {"id": 1, "total": 1.0, "items": {}, "note": None},
+        {"id": 1, "total": 1.0, "items": [{"id": 1}, {"id": 2.0}], "note": None},
+        {"id": 1, "total": 1.0, "items": [], "note": 3},
+        {"id": 1, "total": 1.0, "items": [{"id": 1}, {}], "note": None},
+        {"id": 1, "total": 1.0, "note": None},
+    ],
+)
+def test_pluck_arrays_errors_match_pluck(row):
+    with pytest.raises((PluckError, ExtractError)) as expected:
+        pluck(row, Order, **PATHS)
+
+    with pytest.raises(expected.type) as actual:
+        pluck_arrays([ROWS[0], row], Order, **PATHS)
+
+    assert str(actual.value) == str(expected.value)
+
+
+def test_pluck_arrays_reports_the_first_bad_field():
+    @dataclass
+    class Sub:
+        v: int
+
+    @dataclass
+    class Struct:
+        a: int
+        items: List[Sub]
+
+    paths: Dict[str, Any] = dict(
+        a=Path(".a"), items=Path(".items[]").into(Sub, v=Path(".v"))
+    )
+    row = {"a": "oops", "items": [{"v": "bad"}]}
+
+    with pytest.raises(PluckError) as expected:
+        pluck(row, Struct, **paths)
+
+    with pytest.raises(PluckError) as actual:
+        pluck_arrays([row], Struct, **paths)
+
+    assert str(actual.value) == str(expected.value)
+    assert ".a" in str(actual.value)
+
+
+def test_pluck_arrays_overflow():
+    @dataclass
+    class Struct:
+        value: int
+
+    with pytest.raises(PluckError, match="doesn't fit in 64 bits"):
+        pluck_arrays([{"v": 2**64}], Struct, value=Path(".v"))
+
+
+@pytest.mark.parametrize("traced", [False, True])
+def test_pluck_arrays_defaults(traced: bool):
+    @dataclass
+    class Struct:
+        x: int
+        y: int
+        ids: List[int]
+        other_ids: List[int]
+
+    paths: Dict[str, Any] = dict(
+        x=Path(".x", default=None),
+        y=Path(".y", default=0),
+        ids=Path(".ids", default=[]),
+        other_ids=Path(".other", default=None),
+    )
+    rows = [{"x": 1, "y": 2, "ids": [3], "other": [4]}, {}]
+
+    # As with `pluck()`, defaults are used as they are, even if they aren't arrays.
+    with tracing(lambda event: None) if traced else nullcontext():
+        columns = pluck_arrays(rows, Struct, **paths)
+
+    assert columns == {
+        "x": [1, None],
+        "y": array("q", [2, 0]),
+        "ids": ListColumn(array("q", [3]), array("q", [0, 1, 1])),
+        "other_ids": [[4], None],
+    }
+    assert asdict(pluck({}, Struct, **paths)) == {
+        "x": None,
+        "y": 0,
+        "ids": [],
+        "other_ids": None,
+    }
+
+    # Nulls aren't missing, though.
+    with pytest.raises(PluckError):
+        pluck_arrays([{"x": None}], Struct, **paths)
+
+
+def test_pluck_arrays_numpy():
+    numpy = pytest.importorskip("numpy")
+
+    columns = pluck_arrays(ROWS, Order, numpy=True, **PATHS)
+
+    assert columns["id"].dtype == numpy.int64
+    assert columns["total"].tolist() == [9.5, 12.0, 0.5]
+    assert columns["item_ids"].values.tolist() == [3, 4, 7]
+    assert columns["item_ids"].offsets.tolist() == [0, 2, 2, 3]
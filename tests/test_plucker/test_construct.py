@@ -0,0 +1,218 @@
+import dataclasses
+import pytest
+import sys
+from dataclasses import dataclass, field, make_dataclass, InitVar
+from typing import Any, List, Optional, Tuple
+
+import plucker.plucker
+from plucker import compile, Path, PluckError, Plucker
+from plucker.construct import constructor, field_types
+
+needs_slots = pytest.mark.skipif(
+    sys.version_info < (3, 10), reason="dataclass slots and kw_only need Python 3.10"
+)
+
+
+@dataclass
+class Plain:
+    a: int
+    b: str
+
+
+@dataclass(frozen=True)
+class Frozen:
+    a: int
+    b: str
+
+
+@dataclass
+class Defaults:
+    a: int
+    b: str = "b"
+    c: List[int] = field(default_factory=list)
+    d: int = field(default=4, init=False)
+    e: List[int] = field(default_factory=lambda: [5], init=False)
+
+
+@dataclass(frozen=True)
+class FrozenBase:
+    a: int
+    b: str = "b"
+    e: List[int] = field(default_factory=lambda: [5], init=False)
+
+
+@dataclass(frozen=True)
+class FrozenDefaults(FrozenBase):
+    f: Optional[int] = None
+
+
+@dataclass
+class PostInit:
+    a: int
+    b: str
+    c: int = field(init=False)
+
+    def __post_init__(self):
+        self.c = self.a * 2
+
+
+@dataclass
+class WithInitVar:
+    a: int
+    b: str
+    scale: InitVar[int] = 1
+
+
+@dataclass(init=False)
+class HandWritten(Plain):
+    def __init__(self, a: int, b: str):
+        self.a = a + 1
+        self.b = b
+
+
+@dataclass
+class New(Plain):
+    made_by_new = False
+
+    def __new__(cls, *args, **kwargs):
+        instance = super().__new__(cls)
+        instance.made_by_new = True
+        return instance
+
+
+CLASSES: List[type] = [
+    Plain,
+    Frozen,
+    Defaults,
+    FrozenDefaults,
+    PostInit,
+    WithInitVar,
+    HandWritten,
+]
+
+if sys.version_info >= (3, 10):
+
+    @dataclass(slots=True)
+    class Slotted:
+        a: int
+        b: str
+        c: int = field(default=3, init=False)
+
+    @dataclass(frozen=True, slots=True)
+    class FrozenSlotted:
+        a: int
+        b: str = field(default="b", kw_only=True)
+
+    CLASSES += [Slotted, FrozenSlotted]
+
+
+def _state(instance: Any) -> Tuple[Any, ...]:
+    cls: type = type(instance)
+    return (
+        cls,
+        {name: getattr(instance, name, None) for name in field_types(cls)},
+        getattr(instance, "__dict__", None),
+    )
+
+
+@pytest.mark.parametrize("cls", CLASSES)
+@pytest.mark.parametrize("names", [("a", "b"), ("b", "a"), ("a",)])
+def test_constructor_matches_calling_the_class(cls, names):
+    values = {"a": 1, "b": "x"}
+    values = {name: values[name] for name in names}
+
+    try:
+        expected = cls(**values)
+    except TypeError as exc:
+        with pytest.raises(TypeError) as actual:
+            constructor(cls, names)(*values.values())
+        assert str(actual.value) == str(exc)
+        return
+
+    actual = constructor(cls, names)(*values.values())
+
+    assert _state(actual) == _state(expected)
+
+
+def test_constructor_fills_in_default_factories_afresh():
+    construct = constructor(Defaults, ["a"])
+
+    first, second = construct(1), construct(1)
+
+    assert first == Defaults(1)
+    assert first.c is not second.c
+    assert first.e is not second.e
+
+
+def test_constructor_calls_new():
+    assert constructor(New, ["a", "b"])(1, "x").made_by_new
+
+
+def test_constructor_unknown_fields():
+    with pytest.raises(TypeError, match="unexpected keyword argument 'c'"):
+        constructor(Plain, ["a", "b", "c"])(1, "x", 2)
+
+
+def test_field_types_include_inherited_fields():
+    assert dict(field_types(FrozenDefaults)) == {
+        "a": int,
+        "b": str,
+        "e": List[int],
+        "f": Optional[int],
+    }
+
+
+@dataclass
+class Annotated:
+    a: "int"
+    b: "Optional[List[str]]"
+
+
+def test_field_types_resolves_strings():
+    assert dict(field_types(Annotated)) == {"a": int, "b": Optional[List[str]]}
+
+
+def test_field_types_unresolvable_strings():
+    cls = make_dataclass("Local", [("a", "Undefined")])
+
+    assert dict(field_types(cls)) == {"a": "Undefined"}
+
+
+def test_plucking_inherited_fields():
+    plucker = compile(FrozenDefaults, a=Path(".a"), f=Path(".f"))
+
+    assert plucker.pluck({"a": 1, "f": 2}) == FrozenDefaults(a=1, f=2)
+    # Python 3.8 spells `Optional[int]` as `Union[int, NoneType]`.
+    expected = r"(Optional\[int\]|Union\[int, NoneType\])"
+    with pytest.raises(PluckError, match=f".f should be '{expected}' but is 'str'"):
+        plucker.pluck({"a": 1, "f": "2"})
+
+
+def test_constructor_is_only_generated_for_pluckers_used_again(monkeypatch):
+    generated = []
+
+    def recording(cls, names):
+        generated.append(cls)
+        return constructor(cls, names)
+
+    monkeypatch.setattr(plucker.plucker, "constructor", recording)
+    compiled = compile(Plain, a=Path(".a"), b=Path(".b"))
+
+    assert compiled.pluck({"a": 1, "b": "x"}) == Plain(1, "x")
+    assert generated == []
+    assert compiled.pluck({"a": 2, "b": "y"}) == Plain(2, "y")
+    assert compiled.pluck({"a": 3, "b": "z"}) == Plain(3, "z")
+    assert generated == [Plain]
+
+
+@needs_slots
+@pytest.mark.parametrize("codegen", [False, True])
+def test_plucking_frozen_slotted_dataclasses(codegen):
+    cls = CLASSES[-1]
+    plucker: Plucker[Any] = compile(cls, codegen=codegen, a=Path(".a"), b=Path(".b"))
+
+    result = plucker.pluck({"a": 1, "b": "x"})
+
+    assert result == cls(a=1, b="x")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        result.a = 2
@@ -1,9 +1,9 @@
+import pickle
 import pytest
-from typing import List
 
 from plucker.types import JSONValue
-from plucker.extractor import extract, _get_from_path
-from plucker.tokeniser import ArrayToken, NameToken, Range, Token
+from plucker.extractor import extract, _get_from_path, _get_optional, MISSING
+from plucker.tokeniser import ArrayToken, NameToken, Range, Tokens, tokenise
 from plucker.exceptions import ExtractError
 
 
@@ -13,19 +13,19 @@ fr = Range(0, 0)
 
 def test_getter():
     data = {"fred": 2}
-    path: List[Token] = [NameToken(fr, "fred")]
+    path: Tokens = (NameToken(fr, "fred"),)
     assert _get_from_path(data, path) == 2
 
 
 def test_getter_array():
     data = {"fred": [2, 3, 4]}
-    path: List[Token] = [NameToken(fr, "fred")]
+    path: Tokens = (NameToken(fr, "fred"),)
     assert _get_from_path(data, path) == [2, 3, 4]
 
 
 def test_getter_array_subs():
     data = {"fred": [{"v": 2}, {"v": 3}]}
-    path: List[Token] = [NameToken(fr, "fred"), ArrayToken(fr), NameToken(fr, "v")]
+    path: Tokens = (NameToken(fr, "fred"), ArrayToken(fr), NameToken(fr, "v"))
     assert _get_from_path(data, path) == [2, 3]
 
 
@@ -34,12 +34,12 @@ def test_getter_array_sub_subs():
         {"fred": [{"v": 2}, {"v": 3}]},
         {"fred": [{"v": 2}, {"v": 3}]},
     ]
-    path: List[Token] = [
+    path: Tokens = (
         ArrayToken(fr),
         NameToken(fr, "fred"),
         ArrayToken(fr),
         NameToken(fr, "v"),
-    ]
+    )
     assert _get_from_path(data, path) == [[2, 3], [2, 3]]
 
 
@@ -53,3 +53,132 @@ def test_getter_array_error():
         extract(data, path)
 
     assert "expected fred to be 'dict' but it was 'list'" in str(exc)
+
+
+DOC = {
+    "items": [{"id": 1}, {"id": 2}, {"id": 3}, {"id": 4}],
+    "counts": {"a": {"n": 1}, "b": {"n": 2}},
+    "weird key": {"id": 5},
+}
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        (".items[0].id", 1),
+        (".items[-1].id", 4),
+        (".items[1:3].id", [2, 3]),
+        (".items[2:].id", [3, 4]),
+        (".items[:-3].id", [1]),
+        (".items[10:].id", []),
+        (".counts.*.n", [1, 2]),
+        ("..id", [1, 2, 3, 4, 5]),
+        ("..n", [1, 2]),
+        ("..missing", []),
+        ('."weird key".id', 5),
+    ],
+)
+def test_extended_paths(path, expected):
+    assert extract(DOC, path)[0] == expected
+
+
+def test_descend_searches_found_values():
+    assert extract({"a": {"a": 1}}, "..a")[0] == [{"a": 1}, 1]
+
+
+@pytest.mark.parametrize(
+    "path, message, underline",
+    [
+        (".items[4]", "Expected index 4 to exist", "      ^^^"),
+        (".counts[0]", "expected 'list' but it was 'dict'", "       ^^^"),
+        (".counts[1:]", "expected 'list' but it was 'dict'", "       ^^^^"),
+        (".items.*", "expected 'dict' but it was 'list'", "       ^"),
+    ],
+)
+def test_extended_path_errors(path, message, underline):
+    with pytest.raises(ExtractError) as exc:
+        extract(DOC, path)
+
+    assert message in str(exc.value)
+    assert str(exc.value).endswith(f"{path}\n{underline}")
+
+
+EVENTS = {
+    "events": [
+        {"type": "add", "id": 1, "n": 5},
+        {"type": "remove", "id": 2, "n": 1.5},
+        {"type": "add", "id": 3, "n": True},
+        {"id": 4, "n": "5"},
+        "add",
+        {"type": "add", "id": 5, "n": None},
+    ]
+}
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ('.events[?type=="add"].id', [1, 3, 5]),
+        ('.events[?type!="add"].id', [2]),
+        (".events[?n==5].id", [1]),
+        (".events[?n==5.0].id", [1]),
+        (".events[?n>=1.5].id", [1, 2]),
+        (".events[?n<2].id", [2]),
+        (".events[?n==true].id", [3]),
+        (".events[?n==null].id", [5]),
+        ('.events[?n=="5"].id', [4]),
+        ('.events[?@=="add"]', ["add"]),
+    ],
+)
+def test_filters(path, expected):
+    assert extract(EVENTS, path)[0] == expected
+
+
+def test_filter_error():
+    with pytest.raises(ExtractError) as exc:
+        extract({"events": {}}, '.events[?type=="add"]')
+
+    assert "expected 'list' but it was 'dict'" in str(exc.value)
+    assert str(exc.value).endswith("       ^^^^^^^^^^^^^^")
+
+
+@pytest.mark.parametrize(
+    "path, data, expected",
+    [
+        (".a.b", {"a": {"b": 1}}, 1),
+        (".a.b", {"a": {}}, MISSING),
+        (".a.b", {}, MISSING),
+        (".a.b", {"a": None}, MISSING),
+        (".a.b", {"a": {"b": None}}, None),
+        (".a[1].b", {"a": [{"b": 1}]}, MISSING),
+        (".a[-1].b", {"a": [{"b": 1}]}, 1),
+        (".a[].b", {"a": [{"b": 1}]}, [1]),
+        (".a[].b", {}, MISSING),
+    ],
+)
+def test_get_optional(path, data, expected):
+    assert _get_optional(data, tokenise(path)) == expected
+
+
+@pytest.mark.parametrize(
+    "path, data",
+    [
+        (".a.b", {"a": 1}),
+        (".a[0]", {"a": {}}),
+        # Keys missing from the items of a list are still errors.
+        (".a[].b", {"a": [{"b": 1}, {}]}),
+    ],
+)
+def test_get_optional_errors(path, data):
+    with pytest.raises(ExtractError) as expected:
+        _get_from_path(data, tokenise(path))
+
+    with pytest.raises(ExtractError) as actual:
+        _get_optional(data, tokenise(path))
+
+    assert actual.value.message == expected.value.message
+    assert actual.value.token == expected.value.token
+
+
+def test_missing_survives_pickling():
+    assert pickle.loads(pickle.dumps(MISSING)) is MISSING
@@ -0,0 +1,75 @@
+import pickle
+import pytest
+from dataclasses import asdict, dataclass, field, replace
+from typing import List
+
+from plucker import compile, pluck, Path, PluckError
+
+
+@dataclass(frozen=True)
+class Struct:
+    value: int
+    ids: List[int]
+    label: str = "default"
+    tags: List[str] = field(default_factory=list)
+
+
+JSON = {"value": 1, "who": [{"id": 2}, {"id": 3}]}
+
+
+def test_lazy_equals_eager():
+    lazy = pluck(JSON, Struct, lazy=True, value=Path(".value"), ids=Path(".who[].id"))
+    eager = pluck(JSON, Struct, value=Path(".value"), ids=Path(".who[].id"))
+
+    assert lazy == eager
+    assert eager == lazy
+    assert isinstance(lazy, Struct)
+    assert repr(lazy) == repr(eager)
+    assert asdict(lazy) == asdict(eager)
+    assert replace(lazy, value=2) == replace(eager, value=2)
+    assert pickle.loads(pickle.dumps(lazy)) == eager
+
+
+def test_lazy_fields_are_plucked_once_on_read():
+    calls = []
+
+    def count(value: int) -> int:
+        calls.append(value)
+        return value
+
+    plucker = compile(Struct, value=Path(".value").map(count), ids=Path(".who[].id"))
+    lazy = plucker.pluck_lazy(JSON)
+
+    assert calls == []
+    assert lazy.value == 1
+    assert lazy.value == 1
+    assert calls == [1]
+
+
+def test_lazy_errors_are_raised_on_read():
+    lazy = pluck({"value": "1"}, Struct, lazy=True, value=Path(".value"), ids=Path(".x"))
+
+    with pytest.raises(PluckError):
+        lazy.value
+
+
+def test_lazy_not_equal():
+    plucker = compile(Struct, value=Path(".value"), ids=Path(".who[].id"))
+    assert plucker.pluck_lazy(JSON) != replace(plucker.pluck(JSON), value=3)
+
+
+def test_lazy_requires_paths_for_required_fields():
+    with pytest.raises(TypeError):
+        pluck(JSON, Struct, lazy=True, value=Path(".value"))
+
+
+def test_lazy_hash():
+    @dataclass(frozen=True)
+    class Point:
+        x: int
+        y: int
+
+    json = {"x": 1, "y": 2}
+    lazy = pluck(json, Point, lazy=True, x=Path(".x"), y=Path(".y"))
+
+    assert hash(lazy) == hash(Point(1, 2))
@@ -0,0 +1,114 @@
+import io
+import json
+import pickle
+import pytest
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from plucker import compile, pluck_ndjson, Path, PluckError, PluckErrors
+from plucker.exceptions import DecodeError, ExtractError
+from plucker.ndjson import _blocks
+
+
+@dataclass
+class Struct:
+    id: int
+    name: str
+
+
+PATHS: Dict[str, Any] = dict(id=Path(".id"), name=Path(".payload.name").map(str.upper))
+
+LINES = "".join(f'{{"id": {n}, "payload": {{"name": "n{n}"}}}}\n' for n in range(50))
+EXPECTED = [Struct(n, f"N{n}") for n in range(50)]
+
+
+def test_blocks_are_cut_at_line_boundaries():
+    chunks = [b'{"a": 1}\n{"a"', b": 2}\n", b'{"a": 3}']
+
+    assert list(_blocks(chunks)) == [
+        (1, b'{"a": 1}\n'),
+        (2, b'{"a": 2}\n'),
+        (3, b'{"a": 3}'),
+    ]
+
+
+def test_pluck_ndjson_from_text_file():
+    assert list(pluck_ndjson(io.StringIO(LINES), Struct, **PATHS)) == EXPECTED
+
+
+def test_pluck_ndjson_from_filename(tmp_path):
+    path = tmp_path / "input.ndjson"
+    path.write_text(LINES + "\n")
+
+    assert list(pluck_ndjson(path, Struct, **PATHS)) == EXPECTED
+
+
+def test_pluck_ndjson_from_empty_file(tmp_path):
+    path = tmp_path / "input.ndjson"
+    path.write_text("")
+
+    assert list(pluck_ndjson(str(path), Struct, **PATHS)) == []
+
+
+def test_pluck_ndjson_with_workers(monkeypatch):
+    monkeypatch.setattr("plucker.ndjson.BLOCK_SIZE", 100)
+
+    data = io.BytesIO(LINES.encode())
+    assert list(pluck_ndjson(data, Struct, workers=2, **PATHS)) == EXPECTED
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_pluck_ndjson_errors_have_line_numbers(workers: int):
+    data = io.BytesIO(b'{"id": 1, "payload": {"name": "x"}}\n\n{"id": 2}\n')
+
+    with pytest.raises(ExtractError) as exc_info:
+        list(pluck_ndjson(data, Struct, workers=workers, **PATHS))
+
+    assert exc_info.value.line == 3
+    assert str(exc_info.value).startswith(
+        "Line 3: Expected field name payload to exist:\n"
+    )
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_bad_json_has_line_numbers(workers: int, monkeypatch):
+    monkeypatch.setattr("plucker.ndjson.BLOCK_SIZE", 100)
+    lines = LINES.splitlines()
+    lines[30] = '{"id": 30, "payload": }'
+    data = io.BytesIO("\n".join(lines).encode())
+
+    with pytest.raises(DecodeError) as exc_info:
+        list(pluck_ndjson(data, Struct, workers=workers, **PATHS))
+
+    assert isinstance(exc_info.value, json.JSONDecodeError)
+    assert exc_info.value.line == exc_info.value.lineno == 31
+    assert str(exc_info.value) == "Line 31: Expecting value: column 23 (char 22)"
+
+
+def test_pluck_error_line_numbers():
+    data = io.StringIO('{"id": "1", "payload": {"name": "x"}}')
+
+    with pytest.raises(PluckError) as exc_info:
+        list(pluck_ndjson(data, Struct, **PATHS))
+
+    assert str(exc_info.value) == "Line 1: .id should be 'int' but is 'str' instead"
+
+
+def test_plucker_can_be_pickled():
+    plucker = pickle.loads(pickle.dumps(compile(Struct, codegen=True, **PATHS)))
+    assert plucker.pluck({"id": 1, "payload": {"name": "x"}}) == Struct(1, "X")
+
+
+def test_plucker_options_survive_pickling():
+    plucker = compile(
+        Struct,
+        on_error="collect",
+        id=Path(".id"),
+        name=Path(".payload.name", default="?"),
+    )
+    plucker = pickle.loads(pickle.dumps(plucker))
+
+    assert plucker.pluck({"id": 1}) == Struct(1, "?")
+    with pytest.raises(PluckErrors) as exc_info:
+        plucker.pluck({"id": "1", "payload": {"name": 2}})
+    assert [e.field for e in exc_info.value.errors] == ["id", "name"]
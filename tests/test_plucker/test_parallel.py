@@ -0,0 +1,185 @@
+import os
+import pickle
+import pytest
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import plucker.parallel
+from plucker import compile, pluck, pluck_parallel, Path, PluckError, PluckErrors
+from plucker.exceptions import ExtractError
+from plucker.parallel import default_executor
+
+
+@dataclass
+class Item:
+    id: int
+    name: str
+
+
+@dataclass
+class Document:
+    title: str
+    ids: List[int]
+    names: List[str]
+    items: List[Item]
+    scores: List[float]
+    meta: Dict[str, int]
+    count: int
+    note: Optional[str]
+
+
+PATHS: Dict[str, Any] = dict(
+    title=Path(".title"),
+    ids=Path(".payload.items[].id"),
+    names=Path(".payload.items[].name").map_each(str.upper),
+    items=Path(".payload.items[]").into(Item, id=Path(".id"), name=Path(".name")),
+    scores=Path(".payload.scores"),
+    meta=Path(".meta"),
+    count=Path(".payload.items").map(len),
+    note=Path(".payload.note"),
+)
+
+
+def document(length: int) -> Dict[str, Any]:
+    return {
+        "title": "t",
+        "payload": {
+            "items": [{"id": n, "name": f"n{n}"} for n in range(length)],
+            "scores": [n / 2 for n in range(length)],
+        },
+        "meta": {"a": 1},
+    }
+
+
+@pytest.fixture(scope="module")
+def processes():
+    with ProcessPoolExecutor(2) as pool:
+        yield pool
+
+
+@pytest.fixture(params=["threads", "processes"])
+def executor(request):
+    if request.param == "processes":
+        yield request.getfixturevalue("processes")
+    else:
+        with ThreadPoolExecutor(4) as pool:
+            yield pool
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+@pytest.mark.parametrize("length", [0, 3, 10])
+def test_pluck_parallel_matches_pluck(executor, codegen, length):
+    data = document(length)
+    compiled = compile(Document, codegen=codegen, **PATHS)
+
+    result = compiled.pluck_parallel(data, executor, chunk_size=3)
+
+    assert result == compiled.pluck(data)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {**document(10), "title": 1},
+        {**document(10), "payload": {"items": [{"id": 1, "name": "x"}] * 5 + [{}]}},
+        {
+            **document(10),
+            "payload": {"items": [{"id": n, "name": n} for n in range(7)]},
+        },
+        {**document(10), "meta": {"a": "1"}},
+        {"title": "t"},
+    ],
+)
+def test_pluck_parallel_errors_match_pluck(executor, data):
+    with pytest.raises(Exception) as expected:
+        pluck(data, Document, **PATHS)
+
+    with pytest.raises(expected.type) as actual:
+        pluck_parallel(data, Document, executor=executor, chunk_size=3, **PATHS)
+
+    assert str(actual.value) == str(expected.value)
+
+
+def test_pluck_parallel_collects_errors(executor):
+    compiled = compile(Document, on_error="collect", **PATHS)
+    data = {**document(10), "title": 1, "meta": {"a": "1"}}
+
+    with pytest.raises(PluckErrors) as exc_info:
+        compiled.pluck_parallel(data, executor, chunk_size=3)
+
+    assert [error.field for error in exc_info.value.errors] == ["title", "meta"]
+
+
+def test_long_lists_are_split_into_chunks():
+    submitted = []
+
+    class Recording(ThreadPoolExecutor):
+        def submit(
+            self, __fn: Callable[..., Any], *args: Any, **kwargs: Any
+        ) -> "Future[Any]":
+            submitted.append(args[1:3] + (len(args[3]), args[4]))
+            return super().submit(__fn, *args, **kwargs)
+
+    with Recording(2) as pool:
+        compiled = compile(Document, **PATHS)
+        compiled.pluck_parallel(document(7), pool, chunk_size=3)
+
+    # (path index, tokens looked up, values sent, whether they're items of a list)
+    assert submitted == [
+        (1, 2, 3, True),
+        (1, 2, 3, True),
+        (1, 2, 1, True),
+        (2, 2, 3, True),
+        (2, 2, 3, True),
+        (2, 2, 1, True),
+        (3, 2, 3, True),
+        (3, 2, 3, True),
+        (3, 2, 1, True),
+        (4, 2, 7, False),
+        (5, 1, 1, False),
+        # `count` is mapped as a whole, and so can't be split.
+        (6, 2, 7, False),
+    ]
+
+
+def test_default_executor(monkeypatch):
+    monkeypatch.setattr(plucker.parallel, "free_threaded", lambda: False)
+    with default_executor(1) as executor:
+        assert isinstance(executor, ProcessPoolExecutor)
+
+    monkeypatch.setattr(plucker.parallel, "free_threaded", lambda: True)
+    with default_executor(1) as executor:
+        assert isinstance(executor, ThreadPoolExecutor)
+
+
+def test_pickling_errors_are_raised(processes, monkeypatch):
+    @dataclass
+    class Local:
+        ids: List[int]
+
+    replucked: List[Any] = []
+    compiled = compile(Local, ids=Path(".ids").map_each(lambda v: v))
+    monkeypatch.setattr(compiled, "pluck", replucked.append)
+
+    with pytest.raises(Exception, match="pickle") as exc_info:
+        compiled.pluck_parallel({"ids": [1, 2]}, processes)
+
+    assert not isinstance(exc_info.value, (PluckError, ExtractError))
+    assert replucked == []
+
+
+def test_broken_process_pools_are_raised():
+    with ProcessPoolExecutor(1) as pool:
+        with pytest.raises(BrokenProcessPool):
+            pool.submit(os._exit, 1).result()
+
+        with pytest.raises(BrokenProcessPool):
+            compile(Document, **PATHS).pluck_parallel(document(3), pool)
+
+
+def test_unpickled_pluckers_are_reused():
+    pickled = pickle.dumps(compile(Item, id=Path(".id"), name=Path(".name")))
+
+    assert pickle.loads(pickled) is pickle.loads(pickled)
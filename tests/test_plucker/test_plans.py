@@ -0,0 +1,157 @@
+import builtins
+import linecache
+import os
+import pytest
+import shutil
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import plucker.plans
+from plucker import compile, Path, PlanCache, Registry
+from plucker.plans import plan_key
+
+
+@dataclass
+class Contact:
+    id: int
+    name: str
+
+
+@dataclass
+class Message:
+    sender: str
+    number: Optional[int]
+    contacts: List[Contact]
+
+
+PATHS: Dict[str, Any] = dict(
+    sender=Path(".from").map(str.upper),
+    number=Path(".n"),
+    contacts=Path(".who[]").into(Contact, id=Path(".id"), name=Path(".name")),
+)
+
+DATA = {"from": "m", "who": [{"id": 1, "name": "x"}, {"id": 2, "name": "y"}]}
+
+EXPECTED = Message("M", None, [Contact(1, "x"), Contact(2, "y")])
+
+
+@pytest.fixture
+def saves(monkeypatch):
+    """Record the key of each plan saved."""
+    keys = []
+    save = PlanCache.save
+
+    def recording(self, key, plan):
+        keys.append(key)
+        save(self, key, plan)
+
+    monkeypatch.setattr(PlanCache, "save", recording)
+    return keys
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_plans_are_saved_and_loaded(tmp_path, saves, monkeypatch, codegen):
+    plans = PlanCache(tmp_path)
+
+    assert plans.compile(Message, codegen=codegen, **PATHS).pluck(DATA) == EXPECTED
+    assert os.listdir(tmp_path) == [saves[0] + ".plan"]
+
+    def fail(*args):
+        raise AssertionError("compiled from scratch")
+
+    monkeypatch.setattr(plucker.plans, "tokenise", fail)
+    if codegen:
+        monkeypatch.setattr(builtins, "compile", fail)
+
+    loaded = plans.compile(Message, codegen=codegen, **PATHS)
+
+    assert loaded.pluck(DATA) == EXPECTED
+    assert len(saves) == 1
+
+
+def test_loaded_code_can_be_shown_in_tracebacks(tmp_path):
+    plans = PlanCache(tmp_path)
+    plans.compile(Message, codegen=True, **PATHS)
+    linecache.clearcache()
+
+    plucker = plans.compile(Message, codegen=True, **PATHS)
+
+    filename = plucker._pluck.__code__.co_filename
+    assert filename.startswith("<plucker-plan-")
+    assert linecache.getline(filename, 1) == "def pluck(d):\n"
+
+
+def test_plan_keys():
+    key = plan_key(Message, **PATHS)
+
+    assert plan_key(Message, **PATHS) == key
+    assert plan_key(Message, codegen=True, **PATHS) != key
+    assert plan_key(Message, on_error="collect", **PATHS) != key
+    assert plan_key(Message, **{**PATHS, "number": Path(".number")}) != key
+    assert plan_key(Message, **{**PATHS, "number": Path(".n", default=0)}) != key
+
+    contacts = Path(".who[]").into(Contact, id=Path(".id"), name=Path(".nom"))
+    assert plan_key(Message, **{**PATHS, "contacts": contacts}) != key
+
+    @dataclass
+    class Other(Message):
+        extra: int = 0
+
+    assert plan_key(Other, **PATHS) != key
+
+
+def test_plan_keys_include_the_library_version(monkeypatch):
+    key = plan_key(Message, **PATHS)
+    monkeypatch.setattr(plucker.plans, "_library_version", lambda: "99.0")
+
+    assert plan_key(Message, **PATHS) != key
+
+
+def test_plans_are_only_a_shortcut(tmp_path):
+    plans = PlanCache(tmp_path)
+    paths: Dict[str, Any] = dict(id=Path(".contact.id"), name=Path(".contact.name"))
+    plans.compile(Contact, codegen=True, **paths)
+
+    # A plan for another spec, as though it had the same key.
+    [filename] = os.listdir(tmp_path)
+    other = plan_key(Contact, codegen=True, id=Path(".id"), name=Path(".name"))
+    shutil.copy(tmp_path / filename, tmp_path / f"{other}.plan")
+
+    plucker = plans.compile(Contact, codegen=True, id=Path(".id"), name=Path(".name"))
+
+    assert plucker.pluck({"id": 1, "name": "x"}) == Contact(1, "x")
+
+
+def test_bad_plans_are_ignored(tmp_path, saves):
+    plans = PlanCache(tmp_path)
+    key = plan_key(Message, codegen=True, **PATHS)
+    (tmp_path / f"{key}.plan").write_bytes(b"not a plan")
+
+    assert plans.compile(Message, codegen=True, **PATHS).pluck(DATA) == EXPECTED
+    assert saves == [key]
+    assert plans.load(key).code_by_hash
+
+
+def test_unwritable_directories_are_ignored(tmp_path):
+    (tmp_path / "file").write_text("")
+    plans = PlanCache(tmp_path / "file" / "plans")
+
+    assert plans.compile(Message, **PATHS).pluck(DATA) == EXPECTED
+
+
+def test_registry_with_plans(tmp_path):
+    registry = Registry(PlanCache(tmp_path))
+    registry.register(Message, codegen=True, **PATHS)
+
+    registry.warm_up()
+
+    assert len(os.listdir(tmp_path)) == 1
+    assert registry.pluck(DATA, Message) == EXPECTED
+
+
+def test_compiling_without_plans_is_unaffected(tmp_path):
+    PlanCache(tmp_path).compile(Message, codegen=True, **PATHS)
+
+    plucker = compile(Message, codegen=True, **PATHS)
+
+    assert plucker._pluck.__code__.co_filename.startswith("<plucker-generated-")
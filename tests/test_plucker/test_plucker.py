@@ -1,7 +1,13 @@
+import pickle
 import pytest
-from typing import List
+from typing import Any, Callable, Dict, List, Optional
 from dataclasses import dataclass
-from plucker import pluck, Path, PluckError
+from plucker import pluck, pluck_many, pluck_columns, compile, Path, PluckError
+from plucker import pluck_batch, Batch, FieldError, PluckErrors, Plucker
+from plucker.exceptions import ExtractError
+from plucker.extractor import MISSING
+from plucker.tokeniser import tokenise
+from plucker.types import JSONStructure
 
 
 def test_plucking_basic():
@@ -167,6 +173,99 @@ def test_failed_function_mapping():
     assert "Couldn't map .value (value is [1, 2, 3, 4])" in str(exc_info.value)
 
 
+def test_failed_mapping_of_array():
+    @dataclass
+    class Struct:
+        total: int
+
+    json = {"items": [{"n": 1}, {"n": "2"}]}
+
+    with pytest.raises(PluckError) as exc_info:
+        pluck(json, Struct, total=Path(".items[].n").map(sum))
+
+    assert "Couldn't map .items[].n (value is [1, '2'])" in str(exc_info.value)
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_map_each(codegen):
+    @dataclass
+    class Struct:
+        names: List[str]
+        colours: List[int]
+
+    json = {"who": [{"name": "x"}, {"name": "y"}], "colours": ["RED", "GREEN"]}
+
+    plucker = compile(
+        Struct,
+        codegen=codegen,
+        names=Path(".who[].name").map_each(str.upper),
+        colours=Path(".colours").map_each({"RED": 1, "GREEN": 2}),
+    )
+
+    assert plucker.pluck(json) == Struct(names=["X", "Y"], colours=[1, 2])
+
+
+def test_map_each_after_into_and_before_map():
+    @dataclass
+    class Contact:
+        id: int
+
+    @dataclass
+    class Struct:
+        ids: str
+
+    json = [{"id": 12}, {"id": 53}]
+
+    assert pluck(
+        json,
+        Struct,
+        ids=Path(".[]")
+        .into(Contact, id=Path(".id"))
+        .map_each(lambda contact: str(contact.id))
+        .map(",".join),
+    ) == Struct(ids="12,53")
+
+
+@pytest.mark.parametrize(
+    "json, message",
+    [
+        ({"who": [{"n": "1"}, {"n": "x"}]}, "Couldn't map .who[1].n (value is 'x')"),
+        (
+            {"who": [{"n": "1"}, {"n": "1.5"}]},
+            "Couldn't map .who[1].n (value is '1.5')",
+        ),
+        (
+            {"who": [{"n": "1"}, {"n": 2.5}]},
+            ".who[1].n should be 'int' but is 'float' instead",
+        ),
+    ],
+)
+def test_failed_map_each(json, message):
+    @dataclass
+    class Struct:
+        ns: List[int]
+
+    with pytest.raises(PluckError) as exc_info:
+        pluck(
+            json,
+            Struct,
+            ns=Path(".who[].n").map_each(lambda n: n if type(n) is float else int(n)),
+        )
+
+    assert message in str(exc_info.value)
+
+
+def test_map_each_of_non_list():
+    @dataclass
+    class Struct:
+        value: List[int]
+
+    with pytest.raises(PluckError) as exc_info:
+        pluck({"value": 3}, Struct, value=Path(".value").map_each(int))
+
+    assert "Couldn't map each item of .value (value is 3)" in str(exc_info.value)
+
+
 def test_sub_structure():
     @dataclass
     class Contact:
@@ -191,3 +290,564 @@ def test_sub_structure():
         )
         == Struct([Contact(id=12, name="Judy"), Contact(id=53, name="Max")])
     )
+
+
+def test_compiled_plucker_is_reusable():
+    @dataclass
+    class Struct:
+        value: int
+        ids: List[int]
+
+    plucker = compile(Struct, value=Path(".value"), ids=Path(".who[].id"))
+
+    assert plucker.pluck({"value": 1, "who": [{"id": 2}]}) == Struct(1, [2])
+    assert plucker.pluck({"value": 3, "who": []}) == Struct(3, [])
+
+
+def test_compiled_plucker_reports_errors():
+    @dataclass
+    class Struct:
+        value: int
+
+    plucker = compile(Struct, value=Path(".value"))
+
+    with pytest.raises(PluckError) as exc_info:
+        plucker.pluck({"value": "1"})
+
+    assert ".value should be 'int' but is 'str' instead" in str(exc_info.value)
+
+
+def test_compile_requires_a_dataclass():
+    with pytest.raises(ValueError):
+        compile(dict, value=Path(".value"))
+
+
+def test_pluck_many():
+    @dataclass
+    class Struct:
+        value: int
+
+    rows = [{"value": 1}, {"value": 2}]
+
+    assert pluck_many(rows, Struct, value=Path(".value")) == [Struct(1), Struct(2)]
+
+
+def test_pluck_many_errors():
+    @dataclass
+    class Struct:
+        value: int
+
+    rows: List[JSONStructure] = [{"value": 1}, {"value": "2"}]
+
+    with pytest.raises(PluckError) as exc_info:
+        pluck_many(rows, Struct, value=Path(".value"))
+
+    assert ".value should be 'int' but is 'str' instead" in str(exc_info.value)
+
+
+def test_pluck_columns():
+    @dataclass
+    class Struct:
+        value: int
+        ids: List[int]
+        other: str
+
+    rows = [
+        {"value": 1, "who": [{"id": 2}, {"id": 3}]},
+        {"value": 4, "who": []},
+    ]
+
+    assert pluck_columns(
+        rows,
+        Struct,
+        value=Path(".value"),
+        ids=Path(".who[].id"),
+    ) == {"value": [1, 4], "ids": [[2, 3], []]}
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_extended_paths(codegen):
+    @dataclass
+    class Struct:
+        first: int
+        last: int
+        middle: List[int]
+        counts: List[int]
+        ids: List[int]
+        weird: str
+
+    json = {
+        "who": [{"id": 1}, {"id": 2}, {"id": 3}, {"id": 4}],
+        "counts": {"a": 5, "b": 6},
+        "odd key": "x",
+    }
+
+    plucker = compile(
+        Struct,
+        codegen=codegen,
+        first=Path(".who[0].id"),
+        last=Path(".who[-1].id"),
+        middle=Path(".who[1:3].id"),
+        counts=Path(".counts.*"),
+        ids=Path("..id"),
+        weird=Path('."odd key"'),
+    )
+
+    assert plucker.pluck(json) == Struct(1, 4, [2, 3], [5, 6], [1, 2, 3, 4], "x")
+
+
+@pytest.mark.parametrize(
+    "path, json, message",
+    [
+        (".who[1:].id", {"who": [{"id": 1}, {"id": 2}, {"id": "3"}]}, ".who[1:][1].id"),
+        (".counts.*", {"counts": {"a": 1, "b": "2"}}, ".counts.*[1]"),
+        ("..id", {"a": {"id": 1}, "b": [{"id": "2"}]}, "..id[1]"),
+        ('."odd key"[-1]', {"odd key": [[1], [1, "2"]]}, '."odd key"[-1][1]'),
+    ],
+)
+def test_extended_path_type_errors(path, json, message):
+    @dataclass
+    class Struct:
+        ids: List[int]
+
+    with pytest.raises(PluckError) as exc_info:
+        pluck(json, Struct, ids=Path(path))
+
+    assert str(exc_info.value).startswith(f"{message} should be 'int'")
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_filters_skip_into_and_mapping(codegen):
+    @dataclass
+    class Event:
+        id: int
+
+    @dataclass
+    class Struct:
+        added: List[Event]
+        later: List[int]
+
+    json = {
+        "events": [
+            {"type": "add", "id": 1},
+            {"type": "remove", "id": "not an int"},
+            {"type": "add", "id": 3},
+            {"type": "remove", "id": 4},
+        ]
+    }
+    mapped = []
+
+    def record(value):
+        mapped.append(value)
+        return value
+
+    plucker = compile(
+        Struct,
+        codegen=codegen,
+        added=Path('.events[?type=="add"]').into(Event, id=Path(".id").map(record)),
+        # Comparing a string with a number doesn't match, rather than failing.
+        later=Path(".events[?id>2].id"),
+    )
+
+    assert plucker.pluck(json) == Struct([Event(1), Event(3)], [3, 4])
+    assert mapped == [1, 3]
+
+
+def test_filter_type_error_path():
+    @dataclass
+    class Struct:
+        ids: List[int]
+
+    json = {"events": [{"type": "add", "id": 1}, {"type": "add", "id": "2"}]}
+
+    with pytest.raises(PluckError) as exc_info:
+        pluck(json, Struct, ids=Path('.events[?type=="add"].id'))
+
+    assert str(exc_info.value).startswith(
+        """.events[?type=="add"][1].id should be 'int'"""
+    )
+
+
+@dataclass
+class Contact:
+    name: str
+
+
+@dataclass
+class Defaults:
+    number: int
+    label: Optional[str]
+    email: Optional[str]
+    contacts: List[Contact]
+
+
+def _defaults(codegen: bool) -> Plucker[Defaults]:
+    return compile(
+        Defaults,
+        codegen=codegen,
+        number=Path(".payload.number", default=0),
+        label=Path(".payload.label").map(str.upper).optional(),
+        email=Path(".payload.who[0].email"),
+        contacts=Path(".payload.who", default=[]).into(Contact, name=Path(".name")),
+    )
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+@pytest.mark.parametrize(
+    "json, expected",
+    [
+        (
+            {
+                "payload": {
+                    "number": 3,
+                    "label": "l",
+                    "who": [{"name": "X", "email": "e"}],
+                }
+            },
+            Defaults(3, "L", "e", [Contact("X")]),
+        ),
+        (
+            {"payload": {"who": [{"name": "X"}]}},
+            Defaults(0, None, None, [Contact("X")]),
+        ),
+        ({"payload": {"who": []}}, Defaults(0, None, None, [])),
+        ({"payload": None}, Defaults(0, None, None, [])),
+        ({}, Defaults(0, None, None, [])),
+    ],
+)
+def test_defaults(codegen, json, expected):
+    assert _defaults(codegen).pluck(json) == expected
+
+
+@pytest.mark.parametrize(
+    "json, error",
+    [
+        ({"payload": {"number": "3"}}, ".payload.number should be 'int'"),
+        ({"payload": {"who": [{"email": "e"}]}}, "Expected field name name to exist"),
+        ({"payload": {"who": {}}}, "Data not in expected format"),
+        ({"payload": 3}, "expected number to be 'dict'"),
+    ],
+)
+def test_defaults_errors(json, error):
+    # Defaults only stand in for missing values, not for values of the wrong type.
+    with pytest.raises((PluckError, ExtractError)) as expected:
+        _defaults(False).pluck(json)
+
+    assert error in str(expected.value)
+
+    with pytest.raises(expected.type) as actual:
+        _defaults(True).pluck(json)
+
+    assert str(actual.value) == str(expected.value)
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_mutable_defaults_are_not_shared(codegen):
+    @dataclass
+    class Struct:
+        tags: List[str]
+        meta: Dict[str, int]
+        contacts: List[Contact]
+
+    plucker = compile(
+        Struct,
+        codegen=codegen,
+        tags=Path(".tags", default=[]),
+        meta=Path(".meta", default={}),
+        contacts=Path(".who", default=[]).into(Contact, name=Path(".name")),
+    )
+
+    first, second = plucker.pluck({}), plucker.pluck({})
+    first.tags.append("x")
+    first.meta["x"] = 1
+    first.contacts.append(Contact("X"))
+
+    assert second == Struct([], {}, [])
+
+    tags = plucker.pluck_arrays([{}, {}])["tags"]
+    assert tags == [[], []] and tags[0] is not tags[1]
+
+
+def test_missing_items_are_errors():
+    @dataclass
+    class Struct:
+        ids: Optional[List[int]]
+
+    assert pluck({}, Struct, ids=Path(".who[].id")) == Struct(None)
+
+    with pytest.raises(ExtractError, match="Expected field name id to exist"):
+        pluck({"who": [{"id": 1}, {}]}, Struct, ids=Path(".who[].id"))
+
+
+@dataclass
+class Checked:
+    number: int
+    label: str
+    ids: List[int]
+
+
+def _checked(codegen: bool, on_error: str = "collect") -> Plucker[Checked]:
+    return compile(
+        Checked,
+        codegen=codegen,
+        on_error=on_error,
+        number=Path(".number"),
+        label=Path(".label").map({"L": "label"}),
+        ids=Path(".who[].id"),
+    )
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_collect_errors(codegen):
+    json = {"number": "3", "label": "M", "who": [{"id": 1}, {"id": "2"}]}
+
+    with pytest.raises(PluckErrors) as exc_info:
+        _checked(codegen).pluck(json)
+
+    number, label, ids = exc_info.value.errors
+    assert [e.field for e in exc_info.value.errors] == ["number", "label", "ids"]
+
+    assert (number.expected, number.actual, number.indexes) == ("int", "str", [])
+    assert (ids.expected, ids.value, ids.indexes) == ("int", "2", [1])
+    assert ids.tokens == tokenise(".who[].id")
+    assert label.expected is None and isinstance(label.error, PluckError)
+
+    assert str(exc_info.value) == (
+        "3 bad field(s):\n"
+        "number: .number should be 'int' but is 'str' instead\n"
+        "label: Couldn't map .label (value is 'M')\n"
+        "ids: .who[1].id should be 'int' but is 'str' instead"
+    )
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+def test_collect_errors_of_good_records(codegen):
+    json = {"number": 3, "label": "L", "who": [{"id": 1}]}
+
+    assert _checked(codegen).pluck(json) == Checked(3, "label", [1])
+
+
+def test_collect_errors_missing_fields():
+    with pytest.raises(PluckErrors) as exc_info:
+        _checked(False).pluck({"number": 3})
+
+    label, ids = exc_info.value.errors
+    assert isinstance(label.error, ExtractError)
+    assert label.message == str(label.error)
+    assert ids.field == "ids"
+
+
+def test_collect_errors_of_nested_paths_with_the_same_tokens():
+    @dataclass
+    class Inner:
+        values: List[int]
+
+    @dataclass
+    class Outer:
+        inner: List[Inner]
+
+    inner = Path(".x[]").into(Inner, values=Path(".x[]"))
+    plucker = compile(Outer, on_error="collect", inner=inner)
+
+    with pytest.raises(PluckErrors) as exc_info:
+        plucker.pluck({"x": [{"x": ["a"]}]})
+
+    [error] = exc_info.value.errors
+    assert error.field == "inner"
+    assert error.expected is None and isinstance(error.error, FieldError)
+    assert error.message == ".x[0] should be 'int' but is 'str' instead"
+
+
+def test_type_errors_are_field_errors():
+    with pytest.raises(FieldError) as exc_info:
+        _checked(False, "raise").pluck({"number": "3"})
+
+    assert exc_info.value.expected == "int"
+    assert exc_info.value.field is None
+    assert str(exc_info.value) == ".number should be 'int' but is 'str' instead"
+
+
+@pytest.mark.parametrize("codegen", [False, True])
+@pytest.mark.parametrize("on_error", ["raise", "collect"])
+def test_pluck_batch(codegen, on_error):
+    rows: List[JSONStructure] = [
+        {"number": 1, "label": "L", "who": []},
+        {"number": "2", "label": "M", "who": []},
+        {"number": 3, "label": "L", "who": [{"id": 3}]},
+        {"number": 4, "label": "L", "who": [{}]},
+    ]
+
+    batch = _checked(codegen, on_error).pluck_batch(rows)
+
+    assert batch.values == [Checked(1, "label", []), Checked(3, "label", [3])]
+    assert list(batch.errors) == [1, 3]
+
+    fields = {idx: [e.field for e in errors] for idx, errors in batch.errors.items()}
+    if on_error == "collect":
+        assert fields == {1: ["number", "label"], 3: ["ids"]}
+    else:
+        assert fields == {1: ["number"], 3: ["ids"]}
+
+    with pytest.raises(PluckError) as expected:
+        _checked(codegen, "raise").pluck(rows[1])
+    assert batch.errors[1][0].message == str(expected.value)
+
+
+def test_pluck_batch_function():
+    @dataclass
+    class Struct:
+        value: int
+
+    batch = pluck_batch([{"v": 1}, {"v": "2"}], Struct, value=Path(".v"))
+
+    assert batch == Batch([Struct(1)], {1: batch.errors[1]})
+    assert batch.errors[1][0].message == ".v should be 'int' but is 'str' instead"
+
+
+def test_on_error_must_be_known():
+    with pytest.raises(ValueError):
+        _checked(False, "ignore")
+
+
+def test_paths_are_immutable():
+    path = Path(".value")
+
+    with pytest.raises(AttributeError):
+        path.path = ".other"
+    with pytest.raises(AttributeError):
+        path.extra = 1
+    with pytest.raises(AttributeError):
+        del path.mapper
+    with pytest.raises(TypeError):
+        path.into(Contact, id=Path(".id")).type_kwargs["id"] = Path(".x")  # type: ignore
+
+
+def test_path_builders_return_new_paths():
+    path = Path(".value")
+    mapped = path.map(int)
+    optional = mapped.optional()
+
+    assert (path.mapper, path.default) == (None, MISSING)
+    assert (mapped.mapper, mapped.default) == (int, MISSING)
+    assert (optional.mapper, optional.default) == (int, None)
+
+    assert path.into(Contact).type is Contact
+    assert path.type is None
+    assert path.map_each(str).each_mapper is str
+    assert path.each_mapper is None
+
+
+def test_shared_path_specs():
+    @dataclass
+    class Struct:
+        value: int
+        other: str
+
+    value = Path(".v")
+
+    assert pluck({"v": 1, "o": "2"}, Struct, value=value, other=value.map(str)) == (
+        Struct(1, "1")
+    )
+
+
+def test_path_equality_and_hashing():
+    def spec() -> Path:
+        return Path(".who[]").into(Contact, id=Path(".id").map(int), name=Path(".n"))
+
+    assert spec() == spec()
+    assert hash(spec()) == hash(spec())
+    assert len({spec(), spec(), Path(".who[]")}) == 2
+
+    assert Path(".v") != Path(".w")
+    assert Path(".v").map(int) != Path(".v").map(str)
+    assert Path(".v", default=1) != Path(".v", default=True)
+    assert Path(".v").map_each(int) != Path(".v").map(int)
+
+    # Mapping with a dict still works.
+    assert hash(Path(".v").map({"a": 1})) == hash(Path(".v").map({"a": 1}))
+    assert Path(".v").map({"a": 1}) != Path(".v").map({"a": 2})
+
+
+def test_paths_are_only_hashed_once(monkeypatch):
+    @dataclass
+    class Struct:
+        value: int
+
+    paths: Dict[str, Any] = dict(value=Path(".v").map(int))
+    pluck({"v": "1"}, Struct, **paths)
+    pluck({"v": "1"}, Struct, **paths)
+
+    def fail(self: Path) -> None:
+        raise AssertionError("hashed again")
+
+    monkeypatch.setattr(Path, "_key", fail)
+
+    assert hash(paths["value"]) == hash(paths["value"])
+    assert pluck({"v": "2"}, Struct, **paths) == Struct(2)
+
+
+def test_path_pickling():
+    path = Path(".who[]", default=[]).into(Contact, id=Path(".id"), name=Path(".n"))
+
+    copy = pickle.loads(pickle.dumps(path))
+
+    assert copy == path and hash(copy) == hash(path)
+    assert copy.default == []
+    with pytest.raises(TypeError):
+        copy.type_kwargs["id"] = Path(".x")
+
+
+def test_path_repr():
+    path = Path(".who[]", default=[]).into(Contact, id=Path(".id")).map(len)
+
+    assert repr(path) == (
+        "Path('.who[]', default=[]).into(Contact, id=Path('.id'))"
+        ".map(<built-in function len>)"
+    )
+
+
+def test_plucking_functions_reuse_compiled_specs(monkeypatch):
+    @dataclass
+    class Struct:
+        value: int
+
+    compiled: List[Any] = []
+    monkeypatch.setattr(Plucker, "__init__", _recording(Plucker.__init__, compiled))
+
+    # A spec is plucked without compiling it the first time, and compiled the second.
+    for value in range(3):
+        assert pluck({"v": value}, Struct, value=Path(".v")) == Struct(value)
+    assert pluck_many([{"v": 1}], Struct, value=Path(".v")) == [Struct(1)]
+    assert len(compiled) == 1
+
+    pluck({"v": 1}, Struct, value=Path(".v").map(int))
+    assert len(compiled) == 1
+    for _ in range(3):
+        pluck_many([{"v": 1}], Struct, codegen=True, value=Path(".v"))
+    assert len(compiled) == 3
+
+
+def test_specs_used_once_dont_push_out_reused_ones(monkeypatch):
+    @dataclass
+    class Struct:
+        value: int
+
+    pluck({"v": 1}, Struct, value=Path(".v"))
+    pluck({"v": 1}, Struct, value=Path(".v"))
+    compiled: List[Any] = []
+    monkeypatch.setattr(Plucker, "__init__", _recording(Plucker.__init__, compiled))
+
+    for value in range(1000):
+        path = Path(".v").map(lambda v: v)
+        assert pluck({"v": value}, Struct, value=path) == Struct(value)
+    pluck({"v": 1}, Struct, value=Path(".v"))
+
+    assert compiled == []
+
+
+def _recording(init: Callable[..., None], calls: List[Any]) -> Callable[..., None]:
+    def recording_init(self: Any, *args: Any, **kwargs: Any) -> None:
+        calls.append(args)
+        init(self, *args, **kwargs)
+
+    return recording_init
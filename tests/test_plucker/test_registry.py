@@ -0,0 +1,140 @@
+import gc
+import pytest
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import plucker.registry
+from plucker import compile, plucker_for, spec, Path, PluckErrors, Plucker, Registry
+
+
+@dataclass
+class Message:
+    sender: str
+    ids: List[int]
+
+
+@dataclass
+class Contact:
+    id: int
+
+
+MESSAGE_PATHS: Dict[str, Any] = dict(sender=Path(".from"), ids=Path(".who[].id"))
+
+DATA = {"from": "m", "who": [{"id": 1}, {"id": 2}]}
+
+
+@pytest.fixture
+def compiled(monkeypatch):
+    """Record the dataclass of each spec compiled."""
+    calls = []
+
+    def counting(__into, **kwargs):
+        calls.append(__into)
+        return compile(__into, **kwargs)
+
+    monkeypatch.setattr(plucker.registry, "compile", counting)
+    return calls
+
+
+def test_specs_are_compiled_on_first_use(compiled):
+    registry = Registry()
+
+    @registry.spec(**MESSAGE_PATHS)
+    @dataclass
+    class Local(Message):
+        pass
+
+    assert Local in registry and compiled == []
+
+    first = registry.plucker_for(Local)
+    assert isinstance(first, Plucker)
+    assert registry.plucker_for(Local) is first
+    assert registry.pluck(DATA, Local) == Local("m", [1, 2])
+    assert compiled == [Local]
+
+
+def test_spec_options():
+    registry = Registry()
+    registry.register(Message, codegen=True, on_error="collect", **MESSAGE_PATHS)
+
+    with pytest.raises(PluckErrors):
+        registry.pluck({"from": 1, "who": [{"id": "1"}]}, Message)
+    assert registry.plucker_for(Message)._spec[:2] == (True, "collect")
+
+
+def test_warm_up_compiles_every_spec(compiled):
+    registry = Registry()
+    registry.register(Message, **MESSAGE_PATHS)
+    registry.register(Contact, id=Path(".id"))
+    registry.plucker_for(Contact)
+
+    registry.warm_up()
+    registry.warm_up()
+
+    assert compiled == [Contact, Message]
+    assert list(registry) == [Message, Contact] and len(registry) == 2
+
+
+def test_warm_up_can_freeze(monkeypatch):
+    frozen = []
+    monkeypatch.setattr(gc, "freeze", lambda: frozen.append(True))
+    registry = Registry()
+
+    registry.warm_up()
+    assert frozen == []
+    registry.warm_up(freeze=True)
+    assert frozen == [True]
+
+
+def test_warm_up_raises_compile_errors():
+    registry = Registry()
+    registry.register(Contact, name=Path(".name"))
+
+    with pytest.raises(KeyError):
+        registry.warm_up()
+
+
+def test_register_errors():
+    registry = Registry()
+    registry.register(Contact, id=Path(".id"))
+
+    with pytest.raises(ValueError, match="Contact is already registered"):
+        registry.register(Contact, id=Path(".key"))
+    with pytest.raises(ValueError, match="must be a dataclass"):
+        registry.register(int, id=Path(".id"))
+    with pytest.raises(ValueError, match="on_error"):
+        registry.register(Message, on_error="ignore")
+    with pytest.raises(KeyError, match="Message isn't registered"):
+        registry.plucker_for(Message)
+
+
+def test_concurrent_first_use_compiles_once(compiled):
+    registry = Registry()
+    registry.register(Message, **MESSAGE_PATHS)
+    barrier = threading.Barrier(8)
+    pluckers = []
+
+    def run():
+        barrier.wait()
+        pluckers.append(registry.plucker_for(Message))
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert compiled == [Message]
+    assert len(pluckers) == 8 and all(p is pluckers[0] for p in pluckers)
+
+
+@spec(id=Path(".contact.id"))
+@dataclass
+class Registered:
+    id: int
+
+
+def test_default_registry():
+    assert Registered in plucker.registry.default_registry
+    assert plucker_for(Registered).pluck({"contact": {"id": 3}}) == Registered(3)
@@ -0,0 +1,353 @@
+import codecs
+import io
+import json
+import pytest
+import random
+from typing import Any, Dict, Iterator, List
+from dataclasses import dataclass
+
+from plucker import pluck, pluck_bytes, pluck_stream, compile, Path, PluckError
+from plucker.exceptions import ExtractError
+from plucker import stream
+from plucker.stream import _BufferScanner, _Scanner, _chunks, _prune_tree
+
+
+@dataclass
+class Contact:
+    id: int
+    name: str
+
+
+@dataclass
+class Struct:
+    id: int
+    ids: List[int]
+    contacts: List[Contact]
+
+
+PATHS: Dict[str, Any] = dict(
+    id=Path(".id"),
+    ids=Path(".who[].id"),
+    contacts=Path(".who[]").into(Contact, id=Path(".id"), name=Path(".name")),
+)
+
+DOCUMENT: Dict[str, Any] = {
+    "meta": {"count": 2, "tags": ["a", "]", "}"], "note": 'escaped \\" quote'},
+    "results": [
+        {
+            "id": 1,
+            "skipped": {"deep": [[1, 2], {"x": "y"}], "unicode": "café ☃"},
+            "who": [{"id": 12, "name": "Xé", "extra": [1]}, {"id": 41, "name": "Y"}],
+        },
+        {"who": [], "id": 2, "skipped": None},
+    ],
+    "trailer": True,
+}
+
+
+def _expected() -> List[Struct]:
+    return [pluck(row, Struct, **PATHS) for row in DOCUMENT["results"]]
+
+
+def test_stream_from_bytes():
+    raw = json.dumps(DOCUMENT).encode()
+    assert list(pluck_stream(raw, ".results[]", Struct, **PATHS)) == _expected()
+
+
+def test_stream_from_binary_file():
+    raw = json.dumps(DOCUMENT, indent=2, ensure_ascii=False).encode()
+    result = pluck_stream(io.BytesIO(raw), ".results[]", Struct, **PATHS)
+    assert list(result) == _expected()
+
+
+def test_stream_from_text_file():
+    text = json.dumps(DOCUMENT, indent=2)
+    result = pluck_stream(io.StringIO(text), ".results[]", Struct, **PATHS)
+    assert list(result) == _expected()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_stream_from_small_chunks(size: int):
+    raw = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+    chunks = [raw[idx : idx + size] for idx in range(0, len(raw), size)]
+
+    assert list(pluck_stream(chunks, ".results[]", Struct, **PATHS)) == _expected()
+
+
+def test_stream_yields_items_as_they_are_read():
+    def chunks() -> Iterator[str]:
+        yield '{"results": [{"id": 1, "who": []},'
+        raise AssertionError("read too far")
+
+    result = pluck_stream(chunks(), ".results[]", Struct, **PATHS)
+    assert next(result) == Struct(1, [], [])
+
+
+def test_stream_nested_items():
+    data = '{"pages": [{"items": [{"id": 1}]}, {"items": [{"id": 2}, {"id": 3}]}]}'
+
+    @dataclass
+    class Item:
+        id: int
+
+    result = pluck_stream(data, ".pages[].items[]", Item, id=Path(".id"))
+    assert list(result) == [Item(1), Item(2), Item(3)]
+
+
+def test_prune_keeps_only_what_is_needed():
+    tree = _prune_tree(compile(Struct, **PATHS))
+    scanner = _Scanner(_chunks(json.dumps(DOCUMENT["results"][0])))
+
+    assert scanner.parse(tree) == {
+        "id": 1,
+        "who": [{"id": 12, "name": "Xé"}, {"id": 41, "name": "Y"}],
+    }
+
+
+def test_prune_extended_paths():
+    @dataclass
+    class Extended:
+        first: int
+        counts: List[int]
+
+    plucker = compile(Extended, first=Path(".who[0].id"), counts=Path(".counts.*"))
+    data = {"who": [{"id": 1, "x": 2}, {"id": 3}], "counts": {"a": {"b": 1}}, "y": 4}
+    scanner = _Scanner(_chunks(json.dumps(data)))
+
+    assert scanner.parse(_prune_tree(plucker)) == {
+        "who": [{"id": 1}, {"id": 3}],
+        "counts": {"a": {"b": 1}},
+    }
+
+
+def test_prune_keeps_what_filters_compare():
+    @dataclass
+    class Ids:
+        ids: List[int]
+
+    data = {
+        "events": [
+            {"type": "add", "id": 1, "x": 2},
+            {"type": "remove", "id": 2, "x": 3},
+        ]
+    }
+
+    result = list(
+        pluck_stream(
+            json.dumps({"results": [data]}),
+            ".results[]",
+            Ids,
+            ids=Path('.events[?type=="add"].id'),
+        )
+    )
+
+    assert result == [Ids([1])]
+
+
+def test_items_path_must_be_an_array():
+    with pytest.raises(ValueError):
+        list(pluck_stream("{}", ".results", Struct, **PATHS))
+
+
+def test_items_path_must_be_names_and_arrays():
+    with pytest.raises(ValueError):
+        list(pluck_stream("{}", ".results.*.items[]", Struct, **PATHS))
+
+
+def test_missing_items():
+    with pytest.raises(ExtractError) as exc_info:
+        list(pluck_stream('{"result": []}', ".results[]", Struct, **PATHS))
+
+    assert "Expected field name results to exist" in str(exc_info.value)
+    assert ".results[]" in str(exc_info.value)
+
+
+def test_items_of_wrong_type():
+    with pytest.raises(ExtractError) as exc_info:
+        list(pluck_stream('{"results": {}}', ".results[]", Struct, **PATHS))
+
+    assert "expected 'list' but it was 'dict'" in str(exc_info.value)
+
+
+@pytest.mark.parametrize(
+    "row",
+    [
+        {"id": "1", "who": []},
+        {"id": 1, "who": [{"id": 1}]},
+        {"id": 1, "who": {"id": 1}},
+        {"who": []},
+    ],
+)
+def test_errors_match_pluck(row):
+    with pytest.raises((PluckError, ExtractError)) as expected:
+        pluck(row, Struct, **PATHS)
+
+    raw = json.dumps({"results": [row]})
+    with pytest.raises(expected.type) as actual:
+        list(pluck_stream(raw, ".results[]", Struct, **PATHS))
+
+    assert str(actual.value) == str(expected.value)
+
+
+@pytest.mark.parametrize(
+    "raw",
+    ['{"results": [{"id": 1, "who": []}', '{"results": [{"id": 1 "who": []}]}'],
+)
+def test_malformed_input(raw: str):
+    with pytest.raises(json.JSONDecodeError):
+        list(pluck_stream(raw, ".results[]", Struct, **PATHS))
+
+
+def _document_bytes(**kwargs) -> bytes:
+    return json.dumps(DOCUMENT["results"][0], **kwargs).encode()
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        _document_bytes(),
+        _document_bytes(ensure_ascii=False, indent=2),
+        bytearray(_document_bytes()),
+        memoryview(_document_bytes(ensure_ascii=False)),
+        memoryview(b"  " + _document_bytes() + b"  ")[1:-1],
+        codecs.BOM_UTF8 + _document_bytes(ensure_ascii=False),
+        json.dumps(DOCUMENT["results"][0]).encode("utf-16"),
+    ],
+)
+def test_pluck_bytes(raw):
+    expected = pluck(json.loads(bytes(raw)), Struct, **PATHS)
+
+    assert pluck_bytes(raw, Struct, **PATHS) == expected
+    assert compile(Struct, codegen=True, **PATHS).pluck_bytes(raw) == expected
+
+
+def test_pluck_bytes_escapes():
+    raw = r'{"id": 1, "who": [{"id": 2, "name": "\"é\u00e9😀"}], "\u0069d": 3}'.encode()
+
+    assert pluck_bytes(raw, Struct, **PATHS) == pluck(json.loads(raw), Struct, **PATHS)
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        b"",
+        b"[",
+        b'{"id": 1, "who": []} []',
+        b'{"id": 1, "who": [}',
+        b'{"id": 1 "who": []}',
+        b'{"id": 01, "who": []}',
+        b'{"id": 1, "who": [{"id": 1, "name": "\xff"}]}',
+        b'{"id": 1, "who": [{"id": 1, "name": "\t"}]}',
+    ],
+)
+def test_pluck_bytes_malformed_input(raw):
+    with pytest.raises(ValueError) as expected:
+        json.loads(raw)
+
+    with pytest.raises(expected.type) as actual:
+        pluck_bytes(raw, Struct, **PATHS)
+
+    assert str(actual.value) == str(expected.value)
+
+
+@pytest.mark.parametrize("row", [{"id": "1", "who": []}, {"who": []}])
+def test_pluck_bytes_errors_match_pluck(row):
+    with pytest.raises((PluckError, ExtractError)) as expected:
+        pluck(row, Struct, **PATHS)
+
+    with pytest.raises(expected.type) as actual:
+        pluck_bytes(json.dumps(row).encode(), Struct, **PATHS)
+
+    assert str(actual.value) == str(expected.value)
+
+
+def test_pluck_bytes_skips_values_not_needed():
+    raw = b'{"id": 1, "who": [], "skipped": {"not": json, "x": [1,, 2]}}'
+
+    assert pluck_bytes(raw, Struct, **PATHS) == Struct(1, [], [])
+
+
+STRINGS = ["", "x", "[", "]}", '"', "\\", '\\"', "\\\\", 'a\\"[', "é☃", "\n"]
+
+
+def _random_value(rng: random.Random, depth: int = 0):
+    kind = rng.randrange(6 if depth < 4 else 3)
+    if kind == 0:
+        return rng.choice(STRINGS)
+    elif kind == 1:
+        return rng.choice([0, -1.5, 1e100, True, False, None])
+    elif kind == 2:
+        return rng.choice(STRINGS) * rng.randrange(1, 3)
+    elif kind == 3:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randrange(30))]
+    else:
+        keys = rng.choices(STRINGS, k=rng.randrange(10))
+        return {key: _random_value(rng, depth + 1) for key in keys}
+
+
+def _skipped(raw: bytes):
+    """Skip each item of the array `raw`, checking where each one ends."""
+    scanner = _BufferScanner(raw)
+    values = json.loads(raw)
+
+    for value, _ in zip(values, scanner.iter_array()):
+        scanner.peek()
+        start = scanner.pos
+        scanner.skip_value()
+        assert json.loads(raw[start : scanner.pos]) == value
+
+
+@pytest.mark.parametrize("threshold", [0, 64])
+@pytest.mark.parametrize("seed", range(10))
+def test_buffer_scanner_skips_values(monkeypatch, threshold, seed):
+    monkeypatch.setattr(stream, "SKELETON_THRESHOLD", threshold)
+    rng = random.Random(seed)
+    values = [_random_value(rng) for _ in range(20)]
+    values.append([[[[[[[[[[[[[[[[[[[["deep"]]]]]]]]]]]]]]]]]]]])
+
+    _skipped(json.dumps(values, ensure_ascii=seed % 2 == 0).encode())
+
+
+def test_buffer_scanner_skips_values_without_brackets_in_strings(monkeypatch):
+    monkeypatch.setattr(stream, "SKELETON_THRESHOLD", 0)
+    values = [{"a": [1, {"b": ""}], "": 'e\\"f', "g": {}}, "x", [[]]] * 3
+
+    _skipped(json.dumps(values, indent=1).encode())
+
+
+@pytest.mark.parametrize("threshold", [0, 64])
+@pytest.mark.parametrize("seed", range(10))
+def test_pluck_bytes_random_documents(monkeypatch, threshold, seed):
+    monkeypatch.setattr(stream, "SKELETON_THRESHOLD", threshold)
+    rng = random.Random(seed)
+    rows = [
+        {"skipped": _random_value(rng), "id": n, "who": [{"id": n, "name": "x"}]}
+        for n in range(5)
+    ]
+    raw = json.dumps({"results": rows, "after": _random_value(rng)}).encode()
+    plucker = compile(Struct, **PATHS)
+    items = compile(Items, items=Path(".results[]").into(Struct, **PATHS))
+
+    assert items.pluck_bytes(raw) == items.pluck(json.loads(raw))
+    assert plucker.pluck_bytes(json.dumps(rows[0]).encode()) == plucker.pluck(rows[0])
+
+
+@dataclass
+class Items:
+    items: List[Struct]
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [b'{"id": 1, "who": [], "x": [' + b"[" * 20 + b"]" * 19 + b"}", b'{"id": [1, "]'],
+)
+def test_pluck_bytes_unterminated_containers(monkeypatch, raw):
+    monkeypatch.setattr(stream, "SKELETON_THRESHOLD", 0)
+
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads(raw)
+
+    with pytest.raises(json.JSONDecodeError) as actual:
+        pluck_bytes(raw, Struct, **PATHS)
+
+    assert str(actual.value) == str(expected.value)
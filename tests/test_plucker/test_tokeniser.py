@@ -1,24 +1,39 @@
+import copy
+import pickle
 import pytest
-from plucker.tokeniser import tokenise, ArrayToken, NameToken, Range, Token
+import sys
+from plucker.tokeniser import (
+    tokenise,
+    ArrayToken,
+    NameToken,
+    IndexToken,
+    SliceToken,
+    WildcardToken,
+    DescendToken,
+    FilterToken,
+    Range,
+    Token,
+    TokeniserError,
+)
 
 
 def test_minimal():
-    assert tokenise(".") == []
+    assert tokenise(".") == ()
 
 
 def test_name_only():
-    assert tokenise(".fred") == [NameToken(Range(1, 5), "fred")]
+    assert tokenise(".fred") == (NameToken(Range(1, 5), "fred"),)
 
 
 def test_root_array():
-    assert tokenise(".[]") == [ArrayToken(Range(1, 3))]
+    assert tokenise(".[]") == (ArrayToken(Range(1, 3)),)
 
 
 def test_name_then_array():
-    assert tokenise(".names[]") == [
+    assert tokenise(".names[]") == (
         NameToken(Range(1, 6), "names"),
         ArrayToken(Range(6, 8)),
-    ]
+    )
 
 
 def test_array_slices_are_correct():
@@ -38,12 +53,12 @@ def test_array_slices_are_correct():
 
 
 def test_name_then_array_then_name_then_array():
-    assert tokenise(".names[].freddo[]") == [
+    assert tokenise(".names[].freddo[]") == (
         NameToken(Range(1, 6), "names"),
         ArrayToken(Range(6, 8)),
         NameToken(Range(9, 15), "freddo"),
         ArrayToken(Range(15, 17)),
-    ]
+    )
 
 
 def test_no_initial_dot():
@@ -76,3 +91,172 @@ def test_tokeniser_locations_are_correct():
 
     #             ".names[].freddo[]"
     assert out == " nnnnn** nnnnnn**"
+
+
+@pytest.mark.parametrize(
+    "path, message, idx",
+    [
+        ("", "All paths should start with the dot", 0),
+        (".fred.", "Trailing dot at the end of a path", 6),
+        (".fred.!", "Expected a valid name or the start of an array", 6),
+        (".fred!", "Was expecting something patching", 5),
+        (".fred[", "Array indicators should be spelled []", 6),
+        (".fred[]x", "Array end should only be followed by EOF or separator", 7),
+    ],
+)
+def test_error_context(path: str, message: str, idx: int):
+    with pytest.raises(TokeniserError) as exc_info:
+        tokenise(path)
+
+    assert exc_info.value.message.startswith(message)
+    assert exc_info.value.context == (path, idx)
+
+
+def test_cached_tokens_are_shared_tuples():
+    tokens = tokenise(".fred[]")
+
+    assert tokenise(".fred[]") is tokens
+    assert {tokens: "cached"}[tokenise(".fred[]")] == "cached"
+
+
+def test_tokens_are_immutable():
+    token = tokenise(".fred")[0]
+    assert isinstance(token, NameToken)
+
+    with pytest.raises(AttributeError):
+        token.name = "barney"  # type: ignore[misc]
+    with pytest.raises(AttributeError):
+        token.extra = 1  # type: ignore[attr-defined]
+    with pytest.raises(AttributeError):
+        token.location.end = 3  # type: ignore[misc]
+
+
+def test_tokens_are_slotted():
+    tokens = tokenise(".fred[0][1:].*..id[?n==1][]")
+
+    assert not any(hasattr(token, "__dict__") for token in tokens)
+    assert not hasattr(tokens[0].location, "__dict__")
+
+
+def test_names_are_interned():
+    name = "".join(["fr", "ed"])
+    first = tokenise(".fred")[0]
+    second = tokenise('.wilma.."fred"')[1]
+    assert isinstance(first, NameToken) and isinstance(second, DescendToken)
+
+    assert first.name is second.name is sys.intern(name)
+
+
+def test_filter_tokens_compare_values_by_type():
+    one, true = tokenise(".[?n==1.00]")[0], tokenise(".[?n==true]")[0]
+    assert isinstance(one, FilterToken) and isinstance(true, FilterToken)
+
+    assert one.value == true.value and one.location == true.location
+    assert one != true
+    assert len({one, true}) == 2
+
+
+@pytest.mark.parametrize("path", [".fred[0][1:].*..id[]", '.[?"a b">=-1.5][?@==null]'])
+def test_tokens_can_be_pickled(path):
+    tokens = tokenise(path)
+
+    assert pickle.loads(pickle.dumps(tokens)) == tokens
+    assert copy.deepcopy(tokens) == tokens
+
+
+def test_index_tokens():
+    assert tokenise(".names[0][-1]") == (
+        NameToken(Range(1, 6), "names"),
+        IndexToken(Range(6, 9), 0),
+        IndexToken(Range(9, 13), -1),
+    )
+
+
+@pytest.mark.parametrize(
+    "path, start, stop",
+    [
+        (".[2:10]", 2, 10),
+        (".[:3]", None, 3),
+        (".[-2:]", -2, None),
+        (".[:]", None, None),
+    ],
+)
+def test_slice_tokens(path, start, stop):
+    assert tokenise(path) == (SliceToken(Range(1, len(path)), start, stop),)
+
+
+def test_wildcard_token():
+    assert tokenise(".counts.*.n") == (
+        NameToken(Range(1, 7), "counts"),
+        WildcardToken(Range(8, 9)),
+        NameToken(Range(10, 11), "n"),
+    )
+
+
+def test_descend_token():
+    assert tokenise("..id") == (DescendToken(Range(0, 4), "id"),)
+    assert tokenise(".who..id[0]") == (
+        NameToken(Range(1, 4), "who"),
+        DescendToken(Range(4, 8), "id"),
+        IndexToken(Range(8, 11), 0),
+    )
+
+
+def test_quoted_names():
+    assert tokenise('."weird key"."x\\"y"[]') == (
+        NameToken(Range(1, 12), "weird key"),
+        NameToken(Range(13, 19), 'x"y'),
+        ArrayToken(Range(19, 21)),
+    )
+    assert tokenise('.."$ref"') == (DescendToken(Range(0, 8), "$ref"),)
+
+
+@pytest.mark.parametrize(
+    "path, message, idx",
+    [
+        (".fred[x]", "Array indicators should be spelled []", 6),
+        (".fred[1:2:3]", "Array indicators should be spelled []", 6),
+        (".fred[0]x", "Array end should only be followed by EOF or separator", 8),
+        (".fred..", "Recursive descent should be followed by a name", 7),
+        (".fred..[]", "Recursive descent should be followed by a name", 7),
+        (".*x", "Was expecting a separator or the end of the path", 2),
+        ('."fred', "Unterminated quoted name", 1),
+        ('."\\q"', "Invalid escape in quoted name", 1),
+    ],
+)
+def test_extended_error_context(path: str, message: str, idx: int):
+    with pytest.raises(TokeniserError) as exc_info:
+        tokenise(path)
+
+    assert exc_info.value.message.startswith(message)
+    assert exc_info.value.context == (path, idx)
+
+
+@pytest.mark.parametrize(
+    "path, name, op, value",
+    [
+        ('.[?type=="add"]', "type", "==", "add"),
+        (".[?n != null]", "n", "!=", None),
+        (".[?@<=-1.5]", None, "<=", -1.5),
+        ('.[?"a b">true]', "a b", ">", True),
+    ],
+)
+def test_filter_tokens(path, name, op, value):
+    assert tokenise(path) == (FilterToken(Range(1, len(path)), name, op, value),)
+
+
+@pytest.mark.parametrize(
+    "path, message, idx",
+    [
+        (".fred[?]", "Filters should look like", 7),
+        (".fred[?type=]", "Filters should look like", 7),
+        (".fred[?type==add]", "Filter values should be a string", 13),
+        (".fred[?type==[1]]", "Filter values should be a string", 13),
+    ],
+)
+def test_filter_errors(path: str, message: str, idx: int):
+    with pytest.raises(TokeniserError) as exc_info:
+        tokenise(path)
+
+    assert exc_info.value.message.startswith(message)
+    assert exc_info.value.context == (path, idx)
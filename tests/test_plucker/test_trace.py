@@ -0,0 +1,75 @@
+import pytest
+from dataclasses import dataclass
+from typing import Any, List
+
+from plucker import compile, pluck, Path, PluckError, tracing, TraceEvent
+from plucker import trace
+
+
+@dataclass
+class Contact:
+    id: int
+
+
+@dataclass
+class Struct:
+    value: int
+    contacts: List[Contact]
+
+
+def _pluck(json: Any) -> Struct:
+    return pluck(
+        json,
+        Struct,
+        value=Path(".value").map(int),
+        contacts=Path(".who[]").into(Contact, id=Path(".id")),
+    )
+
+
+def _kinds(events: List[TraceEvent]):
+    return [(event.kind, event.target) for event in events]
+
+
+def test_tracing_reports_each_step():
+    events: List[TraceEvent] = []
+
+    with tracing(events.append):
+        _pluck({"value": "1", "who": [{"id": 2}]})
+
+    assert _kinds(events) == [
+        ("tokenise", ".value"),
+        ("tokenise", ".id"),
+        ("tokenise", ".who[]"),
+        ("extract", ".value"),
+        ("map", ".value"),
+        ("typecheck", ".value"),
+        ("extract", ".who[]"),
+        ("extract", ".id"),
+        ("typecheck", ".id"),
+        ("construct", "Contact"),
+        ("into", ".who[]"),
+        ("typecheck", ".who[]"),
+        ("construct", "Struct"),
+    ]
+    assert all(event.duration >= 0 for event in events)
+    assert trace.hook is None
+
+
+def test_tracing_reports_errors():
+    events: List[TraceEvent] = []
+
+    with tracing(events.append), pytest.raises(PluckError):
+        _pluck({"value": "x", "who": []})
+
+    assert events[-1].kind == "map"
+    assert isinstance(events[-1].error, PluckError)
+
+
+def test_tracing_codegen():
+    events: List[TraceEvent] = []
+    plucker = compile(Struct, codegen=True, value=Path(".v"), contacts=Path(".c"))
+
+    with tracing(events.append):
+        assert plucker.pluck_many([{"v": 1, "c": []}]) == [Struct(1, [])]
+
+    assert ("construct", "Struct") in _kinds(events)
@@ -0,0 +1,116 @@
+import pytest
+from typing import List
+
+from plucker.extractor import _get_from_path, MISSING
+from plucker.tokeniser import tokenise
+from plucker.trie import PathTrie
+
+PATHS = [
+    ".payload.from",
+    ".payload.to",
+    ".payload.who[].id",
+    ".number",
+    ".payload.who[].tags[].name",
+    ".payload.who[]",
+    ".",
+]
+
+DATA = {
+    "number": 3,
+    "payload": {
+        "from": "M",
+        "to": "R",
+        "who": [
+            {"id": 12, "tags": [{"name": "a"}, {"name": "b"}]},
+            {"id": 41, "tags": []},
+        ],
+    },
+}
+
+
+def _trie(paths: List[str]) -> PathTrie:
+    return PathTrie.build([tokenise(path) for path in paths])
+
+
+def test_shared_prefixes_are_merged():
+    trie = _trie(PATHS)
+
+    assert list(trie.names) == ["payload", "number"]
+    assert list(trie.names["payload"].names) == ["from", "to", "who"]
+    assert trie.here == [6]
+    assert trie.names["payload"].names["who"].array.here == [5]  # type: ignore
+
+
+def test_walk_matches_walking_each_path():
+    expected = [_get_from_path(DATA, tokenise(path)) for path in PATHS]
+    assert _trie(PATHS).walk_all(DATA) == expected
+
+
+def test_walk_extended_paths():
+    paths = [
+        ".payload.who[0].id",
+        ".payload.who[-1].tags[].name",
+        ".payload.who[1:].id",
+        ".payload.*",
+        "..name",
+        ".payload.who[0].tags[0:1].name",
+        ".payload.who[?id==12].tags[].name",
+        ".payload.who[?id==41].id",
+        ".payload.who[?id==true].id",
+    ]
+    expected = [_get_from_path(DATA, tokenise(path)) for path in paths]
+
+    assert _trie(paths).walk_all(DATA) == expected
+
+
+def test_walk_empty_arrays():
+    data = {"payload": {"from": "M", "to": "R", "who": []}, "number": 3}
+    expected = [_get_from_path(data, tokenise(path)) for path in PATHS]
+
+    assert _trie(PATHS).walk_all(data) == expected
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"payload": {"from": "M", "to": "R", "who": {}}, "number": 3},
+        {"payload": {"from": "M", "to": "R", "who": [[]]}, "number": 3},
+        {"payload": {"from": "M", "who": []}, "number": 3},
+        [],
+    ],
+)
+def test_walk_errors(data):
+    with pytest.raises((LookupError, TypeError)):
+        _trie(PATHS).walk_all(data)
+
+
+def test_walk_optional_paths():
+    paths = [".a.b", ".a.c", ".d[0].e", ".d[].f", ".g"]
+    trie = PathTrie.build([tokenise(path) for path in paths], {0, 2, 3})
+
+    assert trie.names["a"].missing_ok is False
+    assert trie.names["a"].names["b"].missing_ok is True
+    assert trie.names["d"].array.missing_ok is False  # type: ignore[union-attr]
+
+    data = {"a": {"c": 1}, "d": [], "g": 2}
+    assert trie.walk_all(data) == [MISSING, 1, MISSING, [], 2]
+
+    data = {"a": {"b": None, "c": 1}, "d": [{"f": 3}], "g": 2}
+    assert trie.walk_all(data) == [None, 1, MISSING, [3], 2]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"a": {}},
+        {"a": {"b": 1}, "c": 1},
+        {"a": {"b": 1}, "c": [{}]},
+        {"a": 1},
+    ],
+)
+def test_walk_optional_path_errors(data):
+    paths = [".a.b", ".c[].d"]
+    trie = PathTrie.build([tokenise(path) for path in paths], {1})
+
+    with pytest.raises((LookupError, TypeError)):
+        trie.walk_all(data)
@@ -0,0 +1,80 @@
+import pytest
+from enum import Enum
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+from dataclasses import dataclass
+
+from plucker import pluck, Path, PluckError
+from plucker.validators import validator_for, Invalid
+
+
+class Colour(Enum):
+    RED = 1
+
+
+@dataclass
+class Point:
+    x: int
+
+
+@pytest.mark.parametrize(
+    "annotation, value",
+    [
+        (int, 1),
+        (Any, object()),
+        (Colour, Colour.RED),
+        (Point, Point(1)),
+        (List[List[int]], [[1], [], [2, 3]]),
+        (Optional[int], None),
+        (Optional[int], 1),
+        (Union[int, str], "1"),
+        (Dict[str, List[int]], {"a": [1]}),
+        (Tuple[int, str], (1, "a")),
+        (Tuple[int, ...], (1, 2, 3)),
+        (Literal["a", "b"], "b"),
+    ],
+)
+def test_valid(annotation, value):
+    validator_for(annotation)(value)
+
+
+@pytest.mark.parametrize(
+    "annotation, value, indexes, expected, actual",
+    [
+        (int, True, [], "int", "bool"),
+        (float, 1, [], "float", "int"),
+        (Colour, 1, [], "Colour", "int"),
+        (List[int], (1,), [], "List[int]", "tuple"),
+        (List[List[int]], [[1], [], [2, "3"]], [2, 1], "int", "str"),
+        (Optional[List[int]], [1, None], [1], "int", "NoneType"),
+        (Union[int, str], 1.0, [], "Union[int, str]", "float"),
+        (Dict[str, List[int]], {"a": [1], "b": ["x"]}, ["b", 0], "int", "str"),
+        (Tuple[int, str], (1, 2), [1], "str", "int"),
+        (Tuple[int, str], (1,), [], "Tuple[int, str]", "tuple"),
+        (Literal["a", "b"], "c", [], "Literal['a', 'b']", "str"),
+        (Literal[1], True, [], "Literal[1]", "bool"),
+    ],
+)
+def test_invalid(annotation, value, indexes, expected, actual):
+    with pytest.raises(Invalid) as exc_info:
+        validator_for(annotation)(value)
+
+    assert exc_info.value.indexes == indexes
+    assert exc_info.value.expected == expected
+    assert exc_info.value.actual == actual
+
+
+def test_validators_are_cached():
+    assert validator_for(List[List[int]]) is validator_for(List[List[int]])
+
+
+def test_doubly_nested_error_path():
+    @dataclass
+    class Struct:
+        values: List[List[int]]
+
+    json = {"a": [{"b": [1, 2]}, {"b": [3, "4"]}]}
+
+    with pytest.raises(PluckError) as exc_info:
+        pluck(json, Struct, values=Path(".a[].b"))
+
+    assert str(exc_info.value) == ".a[1].b[1] should be 'int' but is 'str' instead"